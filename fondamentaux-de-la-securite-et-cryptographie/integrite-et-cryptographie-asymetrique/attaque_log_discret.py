@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+═══════════════════════════════════════════════════════════════════════════
+    ATTAQUES DU LOGARITHME DISCRET (paramètres Diffie-Hellman faibles)
+    Module: Fondamentaux de la Sécurité et Cryptographie
+    ISGA Marrakech
+    
+    Auteur: Farah El Alem
+═══════════════════════════════════════════════════════════════════════════
+
+Le TP1 casse César par force brute (26 clés). Ici, on casse Diffie-Hellman
+quand les paramètres sont trop petits: retrouver a à partir de A = g^a mod p.
+
+✅ Pas de bébé - pas de géant (table de hachage compacte), en √n
+✅ Rho de Pollard à points distingués, réparti sur plusieurs processus
+✅ Pohlig-Hellman: quand p - 1 n'a que de petits facteurs, p peut être énorme
+✅ Benchmark sur des premiers de taille croissante: où commence la sécurité?
+
+Exemples:
+    python3 attaque_log_discret.py demo
+    python3 attaque_log_discret.py solve --p 23 --g 5 --h 8
+    python3 attaque_log_discret.py bench --max-bits 40 -j 4
+"""
+
+import os
+import sys
+import math
+import time
+import array
+import random
+import secrets
+from typing import Tuple, Optional, Dict, List
+
+from diffie_hellman import est_probablement_premier
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Pas de bébé - pas de géant: entrées de 64 bits (32 bits de l'élément, 32 bits d'indice)
+BSGS_PAS_MAX = 2 ** 28                  # 2^28 pas de bébé: table de 4 Gio
+BSGS_REMPLISSAGE = 2                    # Capacité = 2 × nombre d'entrées (adressage ouvert)
+HACHAGE_MULTIPLICATEUR = 0x9E3779B1     # Hachage multiplicatif de Knuth (32 bits)
+
+# Rho de Pollard
+RHO_MARCHES = 20                        # Multiplicateurs de la marche « r-adding »
+RHO_PAS_PAR_TACHE = 1 << 16             # Pas effectués par tâche envoyée à un processus
+RHO_POINTS_VISES = 64                   # Points distingués attendus avant la collision
+RHO_PAS_MAX_FACTEUR = 10                # Abandon après 10·√n pas (√(πn/2) attendus)
+
+# Factorisation de l'ordre (Pohlig-Hellman)
+DIVISION_BORNE = 1 << 16
+
+# Benchmark
+BENCH_TAILLES = (24, 28, 32, 36, 40)    # Dès 24 bits: premiers à p - 1 lisse de même taille
+BENCH_LIMITE_S = 60.0                   # Une méthode n'est plus essayée au-delà
+BENCH_PROJECTIONS = (64, 80, 128, 160, 224, 256)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           PAS DE BÉBÉ - PAS DE GÉANT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def log_discret_bsgs(g: int, h: int, p: int, n: Optional[int] = None, borne: Optional[int] = None) -> Optional[int]:
+    """
+    Logarithme discret par pas de bébé - pas de géant (Shanks)
+    
+    Avec m = ⌈√borne⌉: x = i·m + j, on stocke g^j (pas de bébé) puis on
+    cherche h·g^(-i·m) dans la table (pas de géant). √n opérations et √n
+    entrées en mémoire.
+    
+    La table est compacte: un tableau array('Q') en adressage ouvert dont
+    chaque case contient 32 bits de g^j et l'indice j (8 octets par entrée,
+    contre ~100 octets pour un dict Python). Une coïncidence sur 32 bits
+    est vérifiée par un pow().
+    
+    Args:
+        g: Base
+        h: Élément dont on cherche le logarithme (h = g^x mod p)
+        p: Module premier
+        n: Ordre de g (défaut: p - 1)
+        borne: x est cherché dans [0, borne) (défaut: n); un exposant court se casse en √borne
+    
+    Returns:
+        Optional[int]: x tel que g^x ≡ h (mod p), ou None
+    """
+    n = n or p - 1
+    borne = min(borne or n, n)
+    m = math.isqrt(borne - 1) + 1
+    if m > BSGS_PAS_MAX:
+        raise ValueError(f"Trop de pas de bébé ({m}): utiliser log_discret_rho()")
+    
+    bits_table = max(4, (BSGS_REMPLISSAGE * m - 1).bit_length())
+    masque, decalage = (1 << bits_table) - 1, 32 - bits_table if bits_table <= 32 else 0
+    table = array.array('Q', bytes(8 << bits_table))
+    
+    # Pas de bébé: g^j pour j < m
+    e = 1
+    for j in range(m):
+        etiquette = e & 0xFFFFFFFF
+        i = ((etiquette * HACHAGE_MULTIPLICATEUR) & 0xFFFFFFFF) >> decalage & masque
+        while table[i]:
+            i = (i + 1) & masque
+        table[i] = (etiquette << 32) | (j + 1)
+        e = e * g % p
+    
+    # Pas de géant: h · (g^-m)^i
+    facteur = pow(g, -m, p)
+    gamma = h % p
+    for i_geant in range(m):
+        etiquette = gamma & 0xFFFFFFFF
+        i = ((etiquette * HACHAGE_MULTIPLICATEUR) & 0xFFFFFFFF) >> decalage & masque
+        while table[i]:
+            entree = table[i]
+            if entree >> 32 == etiquette:
+                x = i_geant * m + (entree & 0xFFFFFFFF) - 1
+                if pow(g, x, p) == h % p:
+                    return x % n
+            i = (i + 1) & masque
+        gamma = gamma * facteur % p
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           RHO DE POLLARD (POINTS DISTINGUÉS)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _multiplicateurs_rho(g: int, h: int, p: int, n: int, graine: int) -> List[Tuple[int, int, int]]:
+    """Les RHO_MARCHES sauts (g^c·h^d, c, d), identiques pour tous les processus"""
+    alea = random.Random(graine)
+    sauts = []
+    for _ in range(RHO_MARCHES):
+        c, d = alea.randrange(n), alea.randrange(n)
+        sauts.append((pow(g, c, p) * pow(h, d, p) % p, c, d))
+    return sauts
+
+
+def _marches_rho(g: int, h: int, p: int, n: int, sauts: List[Tuple[int, int, int]],
+                 masque: int, pas: int, graine: int) -> Tuple[List[Tuple[int, int, int]], int]:
+    """
+    Marches aléatoires x = g^a·h^b (exécuté dans un processus du pool)
+    
+    Chaque marche avance par x ← x·g^c·h^d (saut choisi selon x) jusqu'à
+    un point distingué (x & masque == 0), renvoyé au coordinateur avec
+    (a, b); une nouvelle marche repart alors d'un point aléatoire.
+    
+    Returns:
+        Tuple: (points distingués [(x, a, b)], pas effectués)
+    """
+    alea = random.Random(graine)
+    points = []
+    longueur_max = 20 * (masque + 1)     # Une marche piégée dans un cycle sans point distingué est abandonnée
+    r = len(sauts)
+    effectues = 0
+    
+    while effectues < pas:
+        a, b = alea.randrange(n), alea.randrange(n)
+        x = pow(g, a, p) * pow(h, b, p) % p
+        effectues += 1
+        for _ in range(longueur_max):
+            if not x & masque:
+                points.append((x, a % n, b % n))
+                break
+            m, c, d = sauts[x % r]
+            x = x * m % p
+            a += c
+            b += d
+            effectues += 1
+    return points, effectues
+
+
+def _resoudre_collision(g: int, h: int, p: int, n: int, a1: int, b1: int, a2: int, b2: int) -> Optional[int]:
+    """g^a1·h^b1 = g^a2·h^b2  ⇒  (b1 - b2)·x ≡ a2 - a1 (mod n)"""
+    db, da = (b1 - b2) % n, (a2 - a1) % n
+    d = math.gcd(db, n)
+    if db == 0 or da % d:
+        return None
+    # d solutions modulo n (d = 1 si n est premier)
+    n_reduit = n // d
+    x0 = (da // d) * pow(db // d, -1, n_reduit) % n_reduit
+    if d > 1 << 16:
+        return None
+    for k in range(d):
+        x = x0 + k * n_reduit
+        if pow(g, x, p) == h % p:
+            return x
+    return None
+
+
+def log_discret_rho(g: int, h: int, p: int, n: int, workers: int = 1,
+                    bits_distingues: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Logarithme discret par la méthode rho de Pollard, en parallèle
+    
+    Méthode de van Oorschot et Wiener: des marches aléatoires indépendantes
+    (une par processus) ne remontent au coordinateur que les points
+    « distingués ». Deux marches qui passent par un même point le suivent
+    ensuite ensemble jusqu'au même point distingué: la collision donne x.
+    Mémoire presque nulle, √(πn/2) pas au total, partagés entre processus.
+    
+    Args:
+        g: Base (d'ordre n, idéalement premier)
+        h: Élément cible
+        p: Module premier
+        n: Ordre de g
+        workers: Nombre de processus (1 = dans le processus courant)
+        bits_distingues: Bits à zéro d'un point distingué (défaut: environ RHO_POINTS_VISES points attendus)
+    
+    Returns:
+        Tuple[int, int]: (x, nombre total de pas)
+    
+    Raises:
+        ValueError: Aucune collision utile après RHO_PAS_MAX_FACTEUR·√n pas
+            (h hors du sous-groupe engendré par g, ou n n'est pas l'ordre de g)
+    """
+    if pow(g, 0, p) == h % p:
+        return 0, 0
+    pas_attendus = math.isqrt(n) + 1
+    if bits_distingues is None:
+        bits_distingues = max(0, (pas_attendus // RHO_POINTS_VISES).bit_length() - 1)
+    masque = (1 << bits_distingues) - 1
+    sauts = _multiplicateurs_rho(g, h, p, n, secrets.randbits(64))
+    # Des tâches courtes sur les petits groupes, au moins quelques marches complètes sur les grands
+    pas_par_tache = max(min(RHO_PAS_PAR_TACHE, pas_attendus // (2 * workers)), 4 * (masque + 1), 256)
+    pas_max = max(RHO_PAS_MAX_FACTEUR * pas_attendus, 4 * workers * pas_par_tache)
+    
+    vus: Dict[int, Tuple[int, int]] = {}
+    total = 0
+    
+    def examiner(points) -> Optional[int]:
+        for x, a, b in points:
+            precedent = vus.setdefault(x, (a, b))
+            if precedent != (a, b):
+                solution = _resoudre_collision(g, h, p, n, precedent[0], precedent[1], a, b)
+                if solution is not None:
+                    return solution
+        return None
+    
+    def abandonner():
+        raise ValueError(f"Rho: aucun logarithme trouvé en {total} pas "
+                         f"(h hors du sous-groupe de g, ou ordre n incorrect?)")
+    
+    if workers <= 1:
+        while total < pas_max:
+            points, pas = _marches_rho(g, h, p, n, sauts, masque, pas_par_tache, secrets.randbits(64))
+            total += pas
+            solution = examiner(points)
+            if solution is not None:
+                return solution, total
+        abandonner()
+    
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    
+    with ProcessPoolExecutor(max_workers=workers) as executeur:
+        en_cours = set()
+        while total < pas_max:
+            while len(en_cours) < workers * 2:
+                en_cours.add(executeur.submit(_marches_rho, g, h, p, n, sauts, masque,
+                                              pas_par_tache, secrets.randbits(64)))
+            faits, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in faits:
+                points, pas = future.result()
+                total += pas
+                solution = examiner(points)
+                if solution is not None:
+                    for restant in en_cours:
+                        restant.cancel()
+                    return solution, total
+        for restant in en_cours:
+            restant.cancel()
+        abandonner()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           POHLIG-HELLMAN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _facteur_brent(n: int) -> int:
+    """Un facteur non trivial de n composé (rho de Pollard, variante de Brent)"""
+    if n % 2 == 0:
+        return 2
+    while True:
+        y, c, m = secrets.randbelow(n - 1) + 1, secrets.randbelow(n - 1) + 1, 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def factoriser(n: int) -> Dict[int, int]:
+    """
+    Décomposition en facteurs premiers {premier: exposant}
+    
+    Division par les petits nombres, puis rho de Pollard (Brent) pour les
+    cofacteurs composés: rapide tant que n n'a pas deux grands facteurs.
+    """
+    facteurs: Dict[int, int] = {}
+    for d in (2, 3):
+        while n % d == 0:
+            facteurs[d] = facteurs.get(d, 0) + 1
+            n //= d
+    d = 5
+    while d < DIVISION_BORNE and d * d <= n:
+        for diviseur in (d, d + 2):
+            while n % diviseur == 0:
+                facteurs[diviseur] = facteurs.get(diviseur, 0) + 1
+                n //= diviseur
+        d += 6
+    
+    a_decomposer = [n] if n > 1 else []
+    while a_decomposer:
+        m = a_decomposer.pop()
+        if est_probablement_premier(m):
+            facteurs[m] = facteurs.get(m, 0) + 1
+        else:
+            f = _facteur_brent(m)
+            a_decomposer += [f, m // f]
+    return dict(sorted(facteurs.items()))
+
+
+def log_discret_pohlig_hellman(g: int, h: int, p: int, n: Optional[int] = None,
+                               facteurs: Optional[Dict[int, int]] = None) -> int:
+    """
+    Logarithme discret par Pohlig-Hellman
+    
+    Si n = Π qi^ei, le problème se ramène à un logarithme dans chaque
+    sous-groupe d'ordre qi (résolu chiffre par chiffre en base qi, par
+    pas de bébé - pas de géant), puis les résultats sont recollés par le
+    théorème des restes chinois. Le coût dépend du plus grand qi, pas de
+    la taille de p: d'où l'exigence d'un premier « sûr » p = 2q + 1.
+    
+    Args:
+        g: Base d'ordre n
+        h: Élément cible
+        p: Module premier
+        n: Ordre de g (défaut: p - 1)
+        facteurs: Factorisation de n (défaut: factoriser(n))
+    
+    Returns:
+        int: x tel que g^x ≡ h (mod p)
+    """
+    n = n or p - 1
+    facteurs = facteurs or factoriser(n)
+    
+    restes, modules = [], []
+    for q, e in facteurs.items():
+        gamma = pow(g, n // q, p)              # Élément d'ordre q
+        x = 0
+        for k in range(e):
+            # (g^-x · h)^(n / q^(k+1)) = gamma^(k-ième chiffre)
+            hk = pow(pow(g, -x, p) * h % p, n // q ** (k + 1), p)
+            chiffre = 0 if hk == 1 else log_discret_bsgs(gamma, hk, p, q)
+            if chiffre is None:
+                raise ValueError(f"Pas de logarithme dans le sous-groupe d'ordre {q}: h n'est pas une puissance de g")
+            x += chiffre * q ** k
+        restes.append(x)
+        modules.append(q ** e)
+    
+    # Théorème des restes chinois
+    x, module = 0, 1
+    for reste, m in zip(restes, modules):
+        x += module * ((reste - x) * pow(module, -1, m) % m)
+        module *= m
+    return x % n
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           PARAMÈTRES DE TEST
+# ═══════════════════════════════════════════════════════════════════════════
+
+def generer_premier_sur(bits: int) -> Tuple[int, int, int]:
+    """
+    Premier sûr p = 2q + 1 de `bits` bits et g d'ordre q (premier)
+    
+    Returns:
+        Tuple[int, int, int]: (p, g, q)
+    """
+    while True:
+        q = secrets.randbits(bits - 1) | (1 << (bits - 2)) | 1
+        if est_probablement_premier(q, 20) and est_probablement_premier(2 * q + 1, 20):
+            p = 2 * q + 1
+            while True:
+                g = pow(secrets.randbelow(p - 3) + 2, 2, p)   # Un carré ≠ 1 est d'ordre q
+                if g != 1:
+                    return p, g, q
+
+
+def generer_premier_lisse(bits: int, borne: int = 1 << 16) -> Tuple[int, int, int]:
+    """
+    Premier p de `bits` bits dont p - 1 n'a que des facteurs < borne, et un générateur g
+    
+    Returns:
+        Tuple[int, int, int]: (p, g, p - 1)
+    """
+    petits = [q for q in range(3, borne, 2) if est_probablement_premier(q, 8)]
+    while True:
+        n = 2
+        while n.bit_length() < bits - 1:
+            n *= random.choice(petits)
+        if n.bit_length() == bits - 1 and est_probablement_premier(2 * n + 1, 20):
+            p = 2 * n + 1
+            facteurs = factoriser(p - 1)
+            while True:
+                g = secrets.randbelow(p - 3) + 2
+                if all(pow(g, (p - 1) // q, p) != 1 for q in facteurs):
+                    return p, g, p - 1
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           DÉMONSTRATION ET BENCHMARK
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _formater_duree(secondes: float) -> str:
+    """Durée lisible (de la milliseconde à l'âge de l'univers)"""
+    for unite, duree in (("ans", 365.25 * 86400), ("jours", 86400), ("h", 3600), ("min", 60), ("s", 1)):
+        if secondes >= duree:
+            valeur = secondes / duree
+            return f"{valeur:.3g} {unite}" if valeur < 1e6 else f"{valeur:.2e} {unite}"
+    return f"{secondes * 1000:.2f} ms"
+
+
+def demo_attaque():
+    """Casse l'exemple de diffie_hellman.html, puis une clé sur un groupe trop petit"""
+    print("\n" + "=" * 80)
+    print("💀 ATTAQUE DU LOGARITHME DISCRET")
+    print("=" * 80)
+    
+    p, g, A = 23, 5, 8
+    print(f"\n📝 Exemple de la page HTML: p = {p}, g = {g}, Alice publie A = {A}")
+    print(f"   Ève retrouve a = {log_discret_bsgs(g, A, p)} (pas de bébé - pas de géant)")
+    
+    p, g, q = generer_premier_sur(32)
+    a = secrets.randbelow(q - 2) + 2
+    A = pow(g, a, p)
+    debut = time.perf_counter()
+    trouve, pas = log_discret_rho(g, A, p, q)
+    print(f"\n🔐 p de 32 bits: a = {a}")
+    print(f"   Rho de Pollard: a = {trouve} en {pas} pas, {_formater_duree(time.perf_counter() - debut)} "
+          f"{'✅' if trouve == a else '❌'}")
+    
+    p, g, n = generer_premier_lisse(256)
+    a = secrets.randbelow(n - 2) + 2
+    debut = time.perf_counter()
+    trouve = log_discret_pohlig_hellman(g, pow(g, a, p), p, n)
+    print(f"\n⚠️  p de 256 bits, mais p - 1 = {' × '.join(str(q) for q in list(factoriser(n))[:4])} × ...")
+    print(f"   Pohlig-Hellman: a retrouvé en {_formater_duree(time.perf_counter() - debut)} "
+          f"{'✅' if trouve == a else '❌'}")
+    
+    print("\n💡 La taille de p ne suffit pas: il faut un premier sûr (p = 2q + 1),")
+    print("   comme ceux des RFC 3526 / 7919 (voir diffie_hellman.py).")
+    print("\n" + "=" * 80)
+
+
+def benchmark_log_discret(tailles=BENCH_TAILLES, workers: int = 1, limite_s: float = BENCH_LIMITE_S,
+                          projections=BENCH_PROJECTIONS) -> List[dict]:
+    """
+    Temps pour casser un logarithme discret selon la taille du premier
+    
+    Pour chaque taille: un premier sûr (sous-groupe d'ordre q ≈ p/2),
+    résolu par pas de bébé - pas de géant et par rho; puis un premier de
+    même taille dont p - 1 est lisse, résolu par Pohlig-Hellman. Une
+    méthode qui dépasse `limite_s` n'est plus essayée aux tailles
+    suivantes; le coût en √q des attaques génériques est ensuite projeté
+    sur des sous-groupes plus grands.
+    
+    Les attaques génériques ne sont pas les meilleures contre p lui-même
+    (le crible algébrique est sous-exponentiel): les projections mesurent
+    la taille minimale du sous-groupe, pas celle de p.
+    
+    Returns:
+        List[dict]: Mesures (bits, methode, secondes, pas)
+    """
+    resultats = []
+    abandon = set()
+    print(f"\n⏱️  Logarithme discret ({workers} processus pour rho)")
+    print(f"   {'Bits':>5} {'BSGS':>12} {'Rho':>12} {'Pohlig-Hellman (p-1 lisse)':>28}")
+    
+    for bits in tailles:
+        p, g, q = generer_premier_sur(bits)
+        x = secrets.randbelow(q - 2) + 2
+        h = pow(g, x, p)
+        ligne = {}
+        
+        for methode, resoudre in (('bsgs', lambda: (log_discret_bsgs(g, h, p, q), math.isqrt(q))),
+                                  ('rho', lambda: log_discret_rho(g, h, p, q, workers))):
+            if methode in abandon or (methode == 'bsgs' and math.isqrt(q) >= BSGS_PAS_MAX):
+                ligne[methode] = "—"
+                continue
+            debut = time.perf_counter()
+            trouve, pas = resoudre()
+            duree = time.perf_counter() - debut
+            if trouve != x:
+                raise AssertionError(f"{methode}: résultat faux sur {bits} bits")
+            resultats.append({'bits': bits, 'methode': methode, 'secondes': duree, 'pas': pas})
+            ligne[methode] = _formater_duree(duree)
+            if duree > limite_s:
+                abandon.add(methode)
+        
+        p, g, n = generer_premier_lisse(bits)
+        x = secrets.randbelow(n - 2) + 2
+        debut = time.perf_counter()
+        if log_discret_pohlig_hellman(g, pow(g, x, p), p, n) != x:
+            raise AssertionError(f"Pohlig-Hellman: résultat faux sur {bits} bits")
+        duree = time.perf_counter() - debut
+        resultats.append({'bits': bits, 'methode': 'pohlig-hellman', 'secondes': duree, 'pas': None})
+        print(f"   {bits:>5} {ligne['bsgs']:>12} {ligne['rho']:>12} {_formater_duree(duree):>28}")
+    
+    # Projection: rho fait en moyenne √(πq/2) pas, au débit mesuré
+    mesures_rho = [r for r in resultats if r['methode'] == 'rho']
+    if mesures_rho:
+        debit = sum(r['pas'] for r in mesures_rho) / sum(r['secondes'] for r in mesures_rho)
+        print(f"\n📈 Rho de Pollard projeté (sous-groupe d'ordre q, {workers} processus, {debit:,.0f} pas/s):")
+        for bits in projections:
+            secondes = math.sqrt(math.pi * 2 ** bits / 2) / debit
+            print(f"   q de {bits:>3} bits: {_formater_duree(secondes)}")
+        print("\n💡 Sûr à partir d'un sous-groupe de ~224-256 bits (2^112-2^128 opérations),")
+        print("   avec p ≥ 2048 bits contre le crible algébrique.")
+    
+    return resultats
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           INTERFACE EN LIGNE DE COMMANDE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _cli_solve(args) -> int:
+    n = args.order or args.p - 1
+    debut = time.perf_counter()
+    if args.method == 'bsgs':
+        x = log_discret_bsgs(args.g, args.h, args.p, n, args.bound)
+    elif args.method == 'rho':
+        try:
+            x, _ = log_discret_rho(args.g, args.h, args.p, n, args.jobs)
+        except ValueError as e:
+            print(f"⚠️  {e}")
+            x = None
+    else:
+        x = log_discret_pohlig_hellman(args.g, args.h, args.p, n)
+    if x is None:
+        print("❌ Aucun logarithme trouvé")
+        return 1
+    print(f"✅ x = {x} ({_formater_duree(time.perf_counter() - debut)})")
+    return 0
+
+
+def main(argv: List[str]) -> int:
+    """
+    Point d'entrée en ligne de commande
+    
+    Returns:
+        int: Code de sortie (0 = succès)
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="attaque_log_discret.py",
+                                     description="Attaques du logarithme discret (Diffie-Hellman faible)")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    
+    p = commandes.add_parser('demo', help="Casser quelques clés Diffie-Hellman faibles")
+    p.set_defaults(fonction=lambda args: demo_attaque() or 0)
+    
+    p = commandes.add_parser('solve', help="Trouver x tel que g^x = h mod p")
+    for nom in ('p', 'g', 'h'):
+        p.add_argument(f'--{nom}', type=lambda v: int(v, 0), required=True)
+    p.add_argument('--order', type=lambda v: int(v, 0), help="Ordre de g (défaut: p - 1)")
+    p.add_argument('--bound', type=lambda v: int(v, 0), help="x < borne (exposants courts, BSGS)")
+    p.add_argument('--method', choices=('ph', 'bsgs', 'rho'), default='ph',
+                   help="ph = Pohlig-Hellman (défaut), bsgs, rho (ordre premier)")
+    p.add_argument('-j', '--jobs', type=int, default=1, help="Processus (rho)")
+    p.set_defaults(fonction=_cli_solve)
+    
+    p = commandes.add_parser('bench', help="Temps de cassage selon la taille du premier")
+    p.add_argument('--max-bits', type=int, default=BENCH_TAILLES[-1])
+    p.add_argument('--limit', type=float, default=BENCH_LIMITE_S, help="Secondes max par méthode")
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="Processus (rho)")
+    p.set_defaults(fonction=lambda args: benchmark_log_discret(
+        [b for b in range(BENCH_TAILLES[0], args.max_bits + 1, 4)], args.jobs, args.limit) and 0)
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        return args.fonction(args)
+    except Exception as e:
+        print(f"❌ ERREUR: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+═══════════════════════════════════════════════════════════════════════════
+    DIFFIE-HELLMAN EN PYTHON (grands entiers)
+    Module: Fondamentaux de la Sécurité et Cryptographie
+    ISGA Marrakech
+    
+    Auteur: Farah El Alem
+═══════════════════════════════════════════════════════════════════════════
+
+Pendant Python de diffie_hellman.html: les entiers Python n'ont pas de
+limite de taille (le modPow JavaScript déborde au-delà de 2^26).
+
+✅ Groupes MODP standard (RFC 3526) et FFDHE (RFC 7919)
+✅ Premiers recalculés depuis leur formule (π, e) et vérifiés (Miller-Rabin)
+✅ Précalcul à base fixe par fenêtres, en cache par (g, p)
+✅ Génération de paires de clés par lots (un ou plusieurs processus)
+
+Exemples:
+    python3 diffie_hellman.py demo
+    python3 diffie_hellman.py verify
+    python3 diffie_hellman.py bench --group ffdhe2048 --count 200
+"""
+
+import os
+import sys
+import time
+import secrets
+from functools import lru_cache
+from typing import Tuple, Optional, List
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Premiers « sûrs » p = 2q + 1 des RFC, définis par une formule:
+#   RFC 3526: p = 2^n - 2^(n-64) - 1 + 2^64 * (⌊2^(n-130) π⌋ + k)
+#   RFC 7919: p = 2^n - 2^(n-64) - 1 + 2^64 * (⌊2^(n-130) e⌋ + k)
+# (constante, taille en bits, k); le générateur est toujours g = 2.
+GROUPES_DH = {
+    'modp1536': ('pi', 1536, 741804),       # RFC 3526, groupe 5
+    'modp2048': ('pi', 2048, 124476),       # RFC 3526, groupe 14
+    'modp3072': ('pi', 3072, 1690314),      # RFC 3526, groupe 15
+    'modp4096': ('pi', 4096, 240904),       # RFC 3526, groupe 16
+    'modp6144': ('pi', 6144, 929484),       # RFC 3526, groupe 17
+    'modp8192': ('pi', 8192, 4743158),      # RFC 3526, groupe 18
+    'ffdhe2048': ('e', 2048, 560316),       # RFC 7919
+    'ffdhe3072': ('e', 3072, 2625351),
+    'ffdhe4096': ('e', 4096, 5736041),
+    'ffdhe6144': ('e', 6144, 15705020),
+    'ffdhe8192': ('e', 8192, 10965728),
+}
+GROUPE_DEFAUT = 'ffdhe2048'
+GENERATEUR = 2
+
+MILLER_RABIN_TOURS = 40                 # Probabilité d'erreur < 4^-40
+PETITS_PREMIERS = (3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97)
+
+# Précalcul à base fixe: fenêtre la plus large (≤ 8 bits) dont la table tient dans la limite
+PRECALCUL_FENETRE_MAX = 8
+PRECALCUL_MEMOIRE_MAX = 64 * 1024 * 1024
+PRECALCUL_TABLES_CACHE = 8
+
+DH_LOT_TAILLE = 64                      # Paires de clés par tâche (génération multi-processus)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           GROUPES ET VÉRIFICATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _arctan_inverse(x: int, echelle: int) -> int:
+    """arctan(1/x) * echelle en arithmétique entière (série de Taylor)"""
+    terme = echelle // x
+    total = terme
+    x2 = x * x
+    n = 1
+    while terme:
+        terme //= x2
+        n += 2
+        total += -(terme // n) if n % 4 == 3 else terme // n
+    return total
+
+
+@lru_cache(maxsize=None)
+def _constante_binaire(nom: str, bits: int) -> int:
+    """
+    ⌊2^bits × π⌋ ou ⌊2^bits × e⌋, calculé exactement en entiers
+    
+    π par la formule de Machin (π = 16 arctan 1/5 - 4 arctan 1/239),
+    e par la série Σ 1/k!; 64 bits de garde absorbent les arrondis.
+    """
+    garde = 64
+    echelle = 1 << (bits + garde)
+    if nom == 'pi':
+        valeur = 16 * _arctan_inverse(5, echelle) - 4 * _arctan_inverse(239, echelle)
+    elif nom == 'e':
+        valeur, terme, k = 0, echelle, 0
+        while terme:
+            valeur += terme
+            k += 1
+            terme //= k
+    else:
+        raise ValueError(f"Constante inconnue: {nom}")
+    return valeur >> garde
+
+
+def est_probablement_premier(n: int, tours: int = MILLER_RABIN_TOURS) -> bool:
+    """
+    Test de primalité de Miller-Rabin (témoins aléatoires)
+    
+    Args:
+        n: Entier à tester
+        tours: Nombre de témoins (erreur < 4^-tours pour un composé)
+    
+    Returns:
+        bool: False si n est composé (certain), True s'il est premier (très probable)
+    """
+    if n < 2:
+        return False
+    if n in (2,) + PETITS_PREMIERS:
+        return True
+    if n % 2 == 0 or any(n % p == 0 for p in PETITS_PREMIERS):
+        return False
+    
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    
+    for _ in range(tours):
+        x = pow(secrets.randbelow(n - 3) + 2, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def groupe_dh(nom: str = GROUPE_DEFAUT) -> dict:
+    """
+    Paramètres d'un groupe standard, recalculés depuis la formule de la RFC
+    
+    Args:
+        nom: 'modp1536' ... 'modp8192' (RFC 3526) ou 'ffdhe2048' ... 'ffdhe8192' (RFC 7919)
+    
+    Returns:
+        dict: nom, p, g, q = (p-1)/2 (ordre du sous-groupe engendré par g) et bits
+    """
+    if nom not in GROUPES_DH:
+        raise ValueError(f"Groupe inconnu: {nom} (groupes: {', '.join(GROUPES_DH)})")
+    
+    constante, n, k = GROUPES_DH[nom]
+    p = (1 << n) - (1 << (n - 64)) - 1 + ((_constante_binaire(constante, n - 130) + k) << 64)
+    return {'nom': nom, 'p': p, 'g': GENERATEUR, 'q': (p - 1) // 2, 'bits': n}
+
+
+def verifier_groupe(groupe: dict, tours: int = MILLER_RABIN_TOURS) -> bool:
+    """
+    Vérifie qu'un groupe est sûr: p et q = (p-1)/2 premiers, g d'ordre q
+    
+    q est testé par Miller-Rabin; une fois q premier, la primalité de p
+    est prouvée par une seule exponentiation (critère de Pocklington:
+    p - 1 = 2q avec q > √p, 3^(p-1) ≡ 1 mod p et pgcd(3² - 1, p) = 1).
+    
+    Avec un premier sûr, les seuls sous-groupes sont d'ordre 1, 2, q et 2q:
+    une clé publique dans [2, p-2] ne peut pas tomber dans un petit
+    sous-groupe (voir secret_partage()).
+    
+    Returns:
+        bool: True si le groupe est valide
+    """
+    p, g, q = groupe['p'], groupe['g'], groupe['q']
+    return (p == 2 * q + 1 and p > 9 and 1 < g < p - 1 and pow(g, q, p) == 1
+            and est_probablement_premier(q, tours) and pow(3, p - 1, p) == 1 and p % 2 == 1)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           PRÉCALCUL À BASE FIXE
+# ═══════════════════════════════════════════════════════════════════════════
+
+class TableBaseFixe:
+    """
+    Exponentiation à base fixe g^x mod p par fenêtres précalculées
+    
+    x est découpé en chiffres de w bits: x = Σ d_i 2^(w·i). La table contient
+    g^(d · 2^(w·i)) pour chaque position i et chaque chiffre d, donc
+    g^x = Π table[i][d_i]: une multiplication par fenêtre, aucune
+    élévation au carré (pow() en fait une par bit de l'exposant).
+    Pour un exposant de 2048 bits et w = 8: 256 multiplications au lieu
+    d'environ 2300.
+    """
+    
+    def __init__(self, g: int, p: int, bits: int, fenetre: Optional[int] = None):
+        """
+        Args:
+            g: Base (générateur)
+            p: Module
+            bits: Taille maximale des exposants
+            fenetre: Largeur w en bits (défaut: la plus large sous PRECALCUL_MEMOIRE_MAX)
+        """
+        octets_element = (p.bit_length() + 7) // 8
+        if fenetre is None:
+            fenetre = PRECALCUL_FENETRE_MAX
+            while fenetre > 1 and -(-bits // fenetre) * (1 << fenetre) * octets_element > PRECALCUL_MEMOIRE_MAX:
+                fenetre -= 1
+        
+        self.g, self.p, self.bits, self.fenetre = g, p, bits, fenetre
+        self._masque = (1 << fenetre) - 1
+        
+        self._table = []
+        base = g % p
+        for _ in range(-(-bits // fenetre)):
+            ligne = [1, base]
+            for _ in range(2, 1 << fenetre):
+                ligne.append(ligne[-1] * base % p)
+            self._table.append(ligne)
+            base = ligne[-1] * base % p     # g^(2^w · 2^(w·i)) pour la position suivante
+    
+    def puissance(self, x: int) -> int:
+        """g^x mod p (0 ≤ x < 2^bits)"""
+        if x < 0 or x.bit_length() > self.bits:
+            raise ValueError(f"Exposant hors de la table (0 ≤ x < 2^{self.bits})")
+        
+        p, masque, fenetre = self.p, self._masque, self.fenetre
+        resultat = 1
+        for ligne in self._table:
+            if not x:
+                break
+            chiffre = x & masque
+            if chiffre:
+                resultat = resultat * ligne[chiffre] % p
+            x >>= fenetre
+        return resultat
+
+
+@lru_cache(maxsize=PRECALCUL_TABLES_CACHE)
+def table_base_fixe(g: int, p: int, bits: int) -> TableBaseFixe:
+    """Table de précalcul pour (g, p), construite une fois par processus"""
+    return TableBaseFixe(g, p, bits)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           ÉCHANGE DE CLÉS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _bits_exposant(groupe: dict, bits_exposant: Optional[int]) -> int:
+    bits = groupe['q'].bit_length()
+    if bits_exposant is None:
+        return bits
+    if not 2 <= bits_exposant <= bits:
+        raise ValueError(f"Taille d'exposant invalide (2 à {bits} bits)")
+    return bits_exposant
+
+
+def generer_paire(groupe: Optional[dict] = None, bits_exposant: Optional[int] = None,
+                  precalcul: bool = False) -> Tuple[int, int]:
+    """
+    Génère une paire de clés Diffie-Hellman
+    
+    Args:
+        groupe: Groupe (défaut: groupe_dh())
+        bits_exposant: Taille de la clé privée (défaut: celle de q; la RFC 7919
+                       admet des exposants courts, au moins 2× le niveau de sécurité)
+        precalcul: Utiliser la table à base fixe (rentable à partir de
+                   quelques dizaines de clés sur le même groupe)
+    
+    Returns:
+        Tuple[int, int]: (clé privée a, clé publique A = g^a mod p)
+    """
+    groupe = groupe or groupe_dh()
+    bits = _bits_exposant(groupe, bits_exposant)
+    privee = secrets.randbelow(min(groupe['q'], 1 << bits) - 2) + 2
+    
+    if precalcul:
+        publique = table_base_fixe(groupe['g'], groupe['p'], bits).puissance(privee)
+    else:
+        publique = pow(groupe['g'], privee, groupe['p'])
+    return privee, publique
+
+
+def secret_partage(groupe: dict, privee: int, publique_pair: int) -> int:
+    """
+    Secret partagé s = B^a mod p
+    
+    La clé publique reçue est contrôlée: 1 et p-1 (sous-groupe d'ordre 1
+    ou 2) forceraient un secret prévisible.
+    
+    Args:
+        groupe: Groupe commun
+        privee: Notre clé privée a
+        publique_pair: Clé publique B de l'autre partie
+    
+    Returns:
+        int: Secret partagé
+    """
+    p = groupe['p']
+    if not 2 <= publique_pair <= p - 2:
+        raise ValueError("Clé publique invalide (hors de [2, p-2])")
+    return pow(publique_pair, privee, p)
+
+
+def secret_en_octets(groupe: dict, secret: int) -> bytes:
+    """Secret partagé en octets, sur la taille de p (entrée d'un KDF)"""
+    return secret.to_bytes((groupe['p'].bit_length() + 7) // 8, 'big')
+
+
+def _generer_lot(nom: str, bits_exposant: Optional[int], nombre: int) -> List[Tuple[int, int]]:
+    """Un lot de paires (exécuté dans un processus du pool)"""
+    groupe = groupe_dh(nom)
+    return [generer_paire(groupe, bits_exposant, precalcul=True) for _ in range(nombre)]
+
+
+def generer_paires(nombre: int, groupe: Optional[dict] = None, bits_exposant: Optional[int] = None,
+                   workers: int = 1) -> List[Tuple[int, int]]:
+    """
+    Génère de nombreuses paires de clés sur un même groupe
+    
+    La table à base fixe est construite une fois (par processus) puis
+    réutilisée pour chaque clé.
+    
+    Args:
+        nombre: Nombre de paires
+        groupe: Groupe (défaut: groupe_dh()); un groupe standard avec plusieurs processus
+        bits_exposant: Taille des clés privées (voir generer_paire())
+        workers: Nombre de processus (1 = dans le processus courant)
+    
+    Returns:
+        List[Tuple[int, int]]: Paires (clé privée, clé publique)
+    """
+    groupe = groupe or groupe_dh()
+    if workers <= 1 or nombre <= DH_LOT_TAILLE:
+        return [generer_paire(groupe, bits_exposant, precalcul=True) for _ in range(nombre)]
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if groupe_dh(groupe['nom']) != groupe:
+        raise ValueError("Plusieurs processus: seulement avec un groupe standard (groupe_dh())")
+    
+    lots = [min(DH_LOT_TAILLE, nombre - i) for i in range(0, nombre, DH_LOT_TAILLE)]
+    with ProcessPoolExecutor(max_workers=workers) as executeur:
+        resultats = executeur.map(_generer_lot, [groupe['nom']] * len(lots), [bits_exposant] * len(lots), lots)
+        return [paire for lot in resultats for paire in lot]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           DÉMONSTRATIONS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def demo_echange(nom: str = GROUPE_DEFAUT):
+    """L'exemple de la page HTML (p = 23), puis le même échange sur un groupe réel"""
+    print("\n" + "=" * 80)
+    print("🔑 ÉCHANGE DIFFIE-HELLMAN")
+    print("=" * 80)
+    
+    p, g, a, b = 23, 5, 6, 15
+    A, B = pow(g, a, p), pow(g, b, p)
+    print(f"\n📝 Exemple de la page HTML: p = {p}, g = {g}")
+    print(f"   Alice: a = {a}, A = {g}^{a} mod {p} = {A}")
+    print(f"   Bob:   b = {b}, B = {g}^{b} mod {p} = {B}")
+    print(f"   Secret: {B}^{a} mod {p} = {pow(B, a, p)}, {A}^{b} mod {p} = {pow(A, b, p)}")
+    
+    groupe = groupe_dh(nom)
+    a, A = generer_paire(groupe)
+    b, B = generer_paire(groupe)
+    s_alice, s_bob = secret_partage(groupe, a, B), secret_partage(groupe, b, A)
+    print(f"\n🔐 Groupe {nom} (p de {groupe['bits']} bits, g = {groupe['g']})")
+    print(f"   A = {hex(A)[:34]}...")
+    print(f"   B = {hex(B)[:34]}...")
+    print(f"   Secret identique: {'✅ OUI' if s_alice == s_bob else '❌ NON'} ({hex(s_alice)[:34]}...)")
+
+
+def benchmark_generation(nom: str = GROUPE_DEFAUT, nombre: int = 100, workers: int = 1) -> dict:
+    """
+    Compare pow() et la table à base fixe pour générer des clés
+    
+    Returns:
+        dict: secondes par clé (pow, table), coût de la table et accélération
+    """
+    groupe = groupe_dh(nom)
+    bits = groupe['q'].bit_length()
+    exposants = [secrets.randbelow(groupe['q'] - 2) + 2 for _ in range(nombre)]
+    
+    debut = time.perf_counter()
+    attendus = [pow(groupe['g'], x, groupe['p']) for x in exposants]
+    duree_pow = (time.perf_counter() - debut) / nombre
+    
+    table_base_fixe.cache_clear()
+    debut = time.perf_counter()
+    table = table_base_fixe(groupe['g'], groupe['p'], bits)
+    duree_table = time.perf_counter() - debut
+    
+    debut = time.perf_counter()
+    obtenus = [table.puissance(x) for x in exposants]
+    duree_fixe = (time.perf_counter() - debut) / nombre
+    if obtenus != attendus:
+        raise AssertionError("La table à base fixe donne un résultat différent de pow()")
+    
+    debut = time.perf_counter()
+    generer_paires(nombre, groupe, workers=workers)
+    duree_lot = time.perf_counter() - debut
+    
+    resultat = {
+        'groupe': nom,
+        'pow_ms': duree_pow * 1000,
+        'base_fixe_ms': duree_fixe * 1000,
+        'construction_table_s': duree_table,
+        'fenetre': table.fenetre,
+        'acceleration': duree_pow / duree_fixe,
+        'lot_cles_s': nombre / duree_lot,
+    }
+    
+    print(f"\n⏱️  {nom}: {nombre} clés")
+    print(f"   pow():           {resultat['pow_ms']:.2f} ms/clé")
+    print(f"   Base fixe (w={table.fenetre}): {resultat['base_fixe_ms']:.2f} ms/clé "
+          f"(×{resultat['acceleration']:.1f}, table: {duree_table:.2f} s)")
+    print(f"   Par lots ({workers} processus): {resultat['lot_cles_s']:.0f} clés/s")
+    return resultat
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           INTERFACE EN LIGNE DE COMMANDE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _cli_verify(args) -> int:
+    valides = True
+    for nom in args.groups or GROUPES_DH:
+        debut = time.perf_counter()
+        valide = verifier_groupe(groupe_dh(nom), args.rounds)
+        valides &= valide
+        print(f"   {'✅' if valide else '❌'} {nom}: {time.perf_counter() - debut:.2f} s")
+    return 0 if valides else 1
+
+
+def main(argv: List[str]) -> int:
+    """
+    Point d'entrée en ligne de commande
+    
+    Returns:
+        int: Code de sortie (0 = succès)
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="diffie_hellman.py", description="Diffie-Hellman en Python")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    
+    p = commandes.add_parser('demo', help="Échange de clés pas à pas")
+    p.add_argument('--group', default=GROUPE_DEFAUT, choices=GROUPES_DH)
+    p.set_defaults(fonction=lambda args: demo_echange(args.group) or 0)
+    
+    p = commandes.add_parser('verify', help="Vérifier les groupes (p et (p-1)/2 premiers)")
+    p.add_argument('groups', nargs='*', metavar='GROUPE', help="Groupes (défaut: tous)")
+    p.add_argument('--rounds', type=int, default=MILLER_RABIN_TOURS, help="Tours de Miller-Rabin sur q")
+    p.set_defaults(fonction=_cli_verify)
+    
+    p = commandes.add_parser('bench', help="pow() contre précalcul à base fixe")
+    p.add_argument('--group', default=GROUPE_DEFAUT, choices=GROUPES_DH)
+    p.add_argument('--count', type=int, default=100, help="Nombre de clés (défaut: 100)")
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="Processus pour la génération par lots")
+    p.set_defaults(fonction=lambda args: benchmark_generation(args.group, args.count, args.jobs) and 0)
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        return args.fonction(args)
+    except Exception as e:
+        print(f"❌ ERREUR: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -18,20 +18,33 @@
 ✅ Comparaison temps réel César vs AES-GCM
 ✅ Export/Import de clés
 ✅ Statistiques et benchmarks
+✅ Interface en ligne de commande (encrypt, decrypt, encrypt-file, keygen, bench)
+✅ Sessions chiffrées par échange de clés X25519 + HKDF
 """
 
+import io
 import os
 import sys
+import gc
 import json
 import time
+import zlib
+import array
 import base64
+import hmac
+import struct
+import hashlib
 import secrets
+import weakref
+import threading
 from pathlib import Path
-from typing import Tuple, Optional, Dict
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.exceptions import InvalidTag
+from functools import lru_cache
+from typing import Tuple, Optional, Dict, Iterable, List, Union
+from collections.abc import MutableMapping
+
+# Les modules lourds (cryptography, asyncio, sqlite3...) sont importés à la
+# première utilisation: l'import du module et la CLI démarrent vite, et
+# l'import ne crée aucun fichier ni dossier.
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -43,13 +56,136 @@ NONCE_SIZE = 12
 SALT_SIZE = 16
 PBKDF2_ITERATIONS = 600000
 
+# Identifiants d'algorithmes (enregistrés avec chaque message et fichier)
+ALGO_AES_GCM = 1
+ALGO_CHACHA20_POLY1305 = 2
+ALGORITHMES = {
+    ALGO_AES_GCM: 'aes-256-gcm',
+    ALGO_CHACHA20_POLY1305: 'chacha20-poly1305',
+}
+CHOIX_AEAD_FILE = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / ".cache")) / "tp4_cryptography" / "aead.json"
+
+# Calibration du KDF (par hôte)
+PARAMETRES_KDF_FILE = CHOIX_AEAD_FILE.parent / "kdf.json"
+KDF_LATENCE_CIBLE_MS = 250
+KDF_SCRYPT_LN_MIN = 17                      # N = 2^17, r = 8: 128 Mio (minimum OWASP)
+KDF_SCRYPT_MEMOIRE_MAX = 1024 * 1024 ** 2
+
+# En-tête des fichiers chiffrés (les fichiers V2.0 n'en ont pas)
+FICHIER_MAGIC = b"TP4F"
+FICHIER_VERSION = 3            # Chiffrement d'enveloppe (clé de données emballée)
+FICHIER_VERSION_DIRECTE = 2    # Chiffré directement sous la clé
+FICHIER_VERSION_COMPRESSE = 4  # Enveloppe + contenu compressé avant chiffrement
+FICHIER_ENTETE = struct.Struct(">4sBB")   # magic, version, algorithme
+FICHIER_VERSION_SEGMENTE = 5   # Enveloppe + segments authentifiés séparément (accès aléatoire)
+FICHIER_ENTETE_COMPRESSE = struct.Struct(">4sBBB")   # magic, version, algorithme, compression
+FICHIER_ENTETE_SEGMENTE = struct.Struct(">4sBBIQ7s")   # magic, version, algorithme, taille des segments,
+                                                       # taille du clair, préfixe des nonces
+SEGMENT_CLAIR_TAILLE = 64 * 1024
+SEGMENT_CLAIR_MAX = 16 * 1024 * 1024   # Taille lue depuis l'en-tête: bornée avant toute lecture
+SEGMENTS_CACHE_TAILLE = 8
+AUDIT_BLOC_TAILLE = 1024 * 1024
+TAG_SIZE = 16
+
+# Compression avant chiffrement (optionnelle)
+COMPRESSION_AUCUNE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+COMPRESSION_ZSTD = 3
+COMPRESSIONS = {
+    'zlib': COMPRESSION_ZLIB,
+    'lzma': COMPRESSION_LZMA,
+    'zstd': COMPRESSION_ZSTD
+}
+SONDE_ENTROPIE_TAILLE = 4096
+SONDE_ENTROPIE_SEUIL = 7.5   # bits/octet: au-delà, déjà compressé ou chiffré
+
+# Chiffrement d'enveloppe: clé de données (DEK) emballée par la clé maître (KEK)
+EMPREINTE_SIZE = 16
+EMPLACEMENT_CLE = struct.Struct(">16s40s")   # empreinte de la KEK, DEK emballée (RFC 3394)
+DEK_CACHE_TAILLE = 4096
+
+# Sessions X25519 (clé de session dérivée par HKDF, en cache par pair)
+SESSION_INFO = b"TP4-X25519-session-v1\x00"
+SESSION_TTL = 600.0
+SESSION_MESSAGES_MAX = 2 ** 32   # Nonces aléatoires: au-delà, risque de collision non négligeable
+SESSIONS_CACHE_TAILLE = 10000
+SESSION_FENETRE = 64             # Messages reçus dans le désordre tolérés (anti-rejeu)
+
+# Format binaire des lots de messages
+LOT_MAGIC = b"TP4L"
+LOT_VERSION = 3
+LOT_PREFIXE_SIZE = 7   # Préfixe aléatoire par lot
+LOT_COMPTEUR_MAX = 2 ** 32   # Compteur sur 4 octets (nonce = préfixe + compteur + drapeau de fin)
+LOT_ENTETE = struct.Struct(">4sBB7sQ")   # magic, version, algorithme, préfixe, nombre
+LOT_ENTETE_V2 = struct.Struct(">4sBB8sQ")  # version 2: préfixe de 8 octets, sans marque de fin
+LOT_ENTETE_V1 = struct.Struct(">4sB8sQ")  # version 1: AES-GCM implicite
+
+# Magasin de messages (segments binaires en ajout seul)
+SEGMENT_TAILLE_MAX = 64 * 1024 * 1024
+ENREG_ENTETE = struct.Struct(">IIBdH")   # longueur, crc32, type, timestamp, longueur du nom
+ENREG_MESSAGE = 1
+ENREG_SUPPRESSION = 2
+CHAMP_CHIFFRE = 1
+CHAMP_NONCE = 2
+CHAMP_AAD = 3
+CHAMP_CLE = 4
+CHAMP_ALGO = 5
+CHAMP_DEK = 6
+CHAMP_KEK = 7
+
 # Dossiers de travail
 SAVE_DIR = Path("encrypted_messages")
 KEYS_DIR = Path("keys")
+CATALOGUE_DB = Path("catalogue.db")
+TROUSSEAU_FILE = KEYS_DIR / "trousseau.bin"
+NONCES_DIR = KEYS_DIR / "nonces"
+
+# Allocation de nonces par compteur (un fichier d'état par clé)
+NONCES_MAGIC = b"TP4N"
+NONCES_ETAT = struct.Struct(">4s4sQ")   # magic, champ fixe, prochain compteur non réservé
+NONCE_COMPTEUR = struct.Struct(">4sQ")   # champ fixe, compteur
+NONCES_BLOC = 2 ** 20
+NONCES_COMPTEUR_MAX = 2 ** 64
+
+# Trousseau de clés (un seul fichier, entrées emballées par une clé maître)
+TROUSSEAU_MAGIC = b"TP4K"
+TROUSSEAU_VERSION = 2
+TROUSSEAU_ENTETE = struct.Struct(">4sB16sII32s")      # magic, version, salt, itérations, len(index), HMAC
+TROUSSEAU_ENTETE_V1 = struct.Struct(">4sB16sII16s")   # version 1: tag GCM (nonce nul) sur l'index
+TROUSSEAU_INFO_INDEX = b"TP4-trousseau-index-v2"      # Sous-clé HKDF du HMAC de l'index
+
+# Coffre de secrets (clé-valeur chiffré, un seul fichier en ajout seul)
+COFFRE_MAGIC = b"TP4V"
+COFFRE_VERSION = 1
+COFFRE_ENTETE = struct.Struct(">4sBB16s")   # magic, version, algorithme, identifiant du coffre
+COFFRE_ENREG = struct.Struct(">IIBH")       # longueur, crc32, type, longueur de l'identifiant
+COFFRE_CACHE_TAILLE = 1024
+
+# Rotation de clé du magasin (point de reprise dans le dossier du magasin)
+ROTATION_REPRISE_NOM = ".rotation.json"
+ROTATION_TAILLE_LOT = 256
+
+# Détection de réutilisation de nonces
+NONCES_SCAN_LIMITE_EXACTE = 5_000_000   # Au-delà: filtre de Bloom
+NONCES_SCAN_CAPACITE_BLOOM = 100_000_000
+NONCES_SCAN_FAUX_POSITIFS = 1e-2   # Un faux positif ne coûte qu'une entrée parmi les suspects
+
+
+_IMPORTS_PARESSEUX = {
+    'AESGCM': 'cryptography.hazmat.primitives.ciphers.aead',
+    'ChaCha20Poly1305': 'cryptography.hazmat.primitives.ciphers.aead',
+    'PBKDF2HMAC': 'cryptography.hazmat.primitives.kdf.pbkdf2',
+    'InvalidTag': 'cryptography.exceptions',
+}
 
-# Créer les dossiers
-SAVE_DIR.mkdir(exist_ok=True)
-KEYS_DIR.mkdir(exist_ok=True)
+
+def __getattr__(nom: str):
+    """tp4_cryptography.InvalidTag, .AESGCM... restent accessibles (importés à la demande)"""
+    if nom in _IMPORTS_PARESSEUX:
+        import importlib
+        return getattr(importlib.import_module(_IMPORTS_PARESSEUX[nom]), nom)
+    raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -62,7 +198,10 @@ def generer_cle_aleatoire() -> bytes:
 
 
 def deriver_cle_depuis_mot_de_passe(mot_de_passe: str, salt: Optional[bytes] = None) -> Tuple[bytes, bytes]:
-    """Dérive une clé depuis un mot de passe avec PBKDF2"""
+    """Dérive une clé depuis un mot de passe avec PBKDF2 (coût fixe; voir aussi deriver_cle())"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    
     if salt is None:
         salt = secrets.token_bytes(SALT_SIZE)
     
@@ -77,253 +216,3989 @@ def deriver_cle_depuis_mot_de_passe(mot_de_passe: str, salt: Optional[bytes] = N
     return cle, salt
 
 
-def chiffrer_aes_gcm(message: str, cle: bytes, donnees_additionnelles: Optional[str] = None) -> dict:
-    """Chiffre un message avec AES-256-GCM"""
-    if len(cle) != KEY_SIZE:
-        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
-    
-    nonce = secrets.token_bytes(NONCE_SIZE)
-    aesgcm = AESGCM(cle)
-    aad = donnees_additionnelles.encode('utf-8') if donnees_additionnelles else None
-    
-    message_bytes = message.encode('utf-8')
-    chiffre = aesgcm.encrypt(nonce, message_bytes, aad)
-    
-    return {
-        'chiffre': chiffre,
-        'nonce': nonce,
-        'aad': donnees_additionnelles
-    }
+def chiffrer_aes_gcm(message: str, cle: bytes, donnees_additionnelles: Optional[str] = None,
+                     nonces: Optional["AllocateurNonces"] = None) -> dict:
+    """Chiffre un message avec AES-256-GCM (nonce aléatoire, ou tiré de `nonces`)"""
+    return chiffrer_message(message, cle, donnees_additionnelles, ALGO_AES_GCM, nonces)
+
+
+def dechiffrer_aes_gcm(donnees_chiffrees: dict, cle: bytes) -> str:
+    """Déchiffre un message AES-256-GCM (ou de l'algorithme indiqué dans 'algo')"""
+    return dechiffrer_message(donnees_chiffrees, cle)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - AGILITÉ CRYPTOGRAPHIQUE
+# ═══════════════════════════════════════════════════════════════════════════
+
+_algorithme_prefere = None
+
+
+@lru_cache(maxsize=None)
+def _classes_aead() -> dict:
+    """Classes AEAD par identifiant (import de cryptography au premier appel)"""
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+    return {
+        ALGO_AES_GCM: AESGCM,
+        ALGO_CHACHA20_POLY1305: ChaCha20Poly1305,
+    }
+
+
+def _aead(algo: int, cle: bytes):
+    """Instancie l'AEAD correspondant à un identifiant d'algorithme"""
+    classes = _classes_aead()
+    if algo not in classes:
+        raise ValueError(f"Algorithme inconnu: {algo}")
+    return classes[algo](cle)
+
+
+def _signature_hote() -> str:
+    """Identifie l'hôte et la pile crypto (le choix est refait si l'un change)"""
+    import platform
+    import cryptography
+    from cryptography.hazmat.backends.openssl.backend import backend
+    return "|".join((platform.node(), platform.machine(), platform.processor(),
+                     cryptography.__version__, backend.openssl_version_text()))
+
+
+def _mesurer_aead(algo: int, taille: int = 16 * 1024, repetitions: int = 200) -> int:
+    """Médiane (ns) du chiffrement de `taille` octets"""
+    aead = _aead(algo, bytes(KEY_SIZE))
+    nonce = bytes(NONCE_SIZE)
+    donnees = bytes(taille)
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter_ns()
+        aead.encrypt(nonce, donnees, None)
+        durees.append(time.perf_counter_ns() - debut)
+    return sorted(durees)[repetitions // 2]
+
+
+def algorithme_prefere(forcer_mesure: bool = False) -> int:
+    """
+    AEAD le plus rapide sur cet hôte pour les nouvelles données
+    
+    Le micro-benchmark (quelques millisecondes) n'est lancé qu'une fois par
+    hôte: le résultat est mis en cache dans CHOIX_AEAD_FILE. Sur une machine
+    sans AES-NI (VM qui le masque), ChaCha20-Poly1305 l'emporte largement.
+    La variable d'environnement TP4_AEAD force un choix.
+    
+    Returns:
+        int: ALGO_AES_GCM ou ALGO_CHACHA20_POLY1305
+    """
+    global _algorithme_prefere
+    
+    force = os.environ.get('TP4_AEAD')
+    if force:
+        for algo, nom in ALGORITHMES.items():
+            if nom == force:
+                return algo
+        raise ValueError(f"TP4_AEAD inconnu: {force} (choix: {', '.join(ALGORITHMES.values())})")
+    
+    if _algorithme_prefere is not None and not forcer_mesure:
+        return _algorithme_prefere
+    
+    signature = _signature_hote()
+    
+    if not forcer_mesure:
+        try:
+            with open(CHOIX_AEAD_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('signature') == signature and cache.get('algo') in ALGORITHMES:
+                _algorithme_prefere = cache['algo']
+                return _algorithme_prefere
+        except (OSError, ValueError):
+            pass
+    
+    mesures = {algo: _mesurer_aead(algo) for algo in ALGORITHMES}
+    _algorithme_prefere = min(mesures, key=mesures.get)
+    
+    try:
+        CHOIX_AEAD_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(CHOIX_AEAD_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, 'algo': _algorithme_prefere,
+                       'mesures_ns': {ALGORITHMES[a]: m for a, m in mesures.items()}}, f, indent=2)
+    except OSError:
+        pass   # Cache facultatif (répertoire personnel en lecture seule...)
+    
+    return _algorithme_prefere
+
+
+def chiffrer_message(message: str, cle: bytes, donnees_additionnelles: Optional[str] = None,
+                     algo: Optional[int] = None, nonces: Optional["AllocateurNonces"] = None) -> dict:
+    """
+    Chiffre un message avec l'AEAD choisi (par défaut: le plus rapide sur l'hôte)
+    
+    Args:
+        message: Message à chiffrer
+        cle: Clé de 256 bits
+        donnees_additionnelles: AAD (optionnel)
+        algo: ALGO_AES_GCM, ALGO_CHACHA20_POLY1305 ou None (algorithme_prefere())
+        nonces: Allocateur de nonces de cette clé (défaut: nonce aléatoire)
+        
+    Returns:
+        dict: {'chiffre', 'nonce', 'aad', 'algo'}
+    """
+    if len(cle) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    
+    if algo is None:
+        algo = algorithme_prefere()
+    
+    if nonces is not None:
+        if nonces.empreinte != empreinte_cle(cle):
+            raise ValueError("L'allocateur de nonces appartient à une autre clé")
+        nonce = nonces.suivant()
+    else:
+        nonce = secrets.token_bytes(NONCE_SIZE)
+    aad = donnees_additionnelles.encode('utf-8') if donnees_additionnelles else None
+    chiffre = _aead(algo, cle).encrypt(nonce, message.encode('utf-8'), aad)
+    
+    return {
+        'chiffre': chiffre,
+        'nonce': nonce,
+        'aad': donnees_additionnelles,
+        'algo': algo
+    }
+
+
+def dechiffrer_message(donnees_chiffrees: dict, cle: bytes) -> str:
+    """
+    Déchiffre un message (sans champ 'algo': AES-256-GCM, comme en V2.0)
+    
+    Pour un message chiffré par enveloppe, `cle` est la clé maître.
+    """
+    from cryptography.exceptions import InvalidTag
+    
+    if len(cle) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    
+    chiffre = donnees_chiffrees['chiffre']
+    nonce = donnees_chiffrees['nonce']
+    aad_str = donnees_chiffrees.get('aad')
+    aad = aad_str.encode('utf-8') if aad_str else None
+    
+    if donnees_chiffrees.get('dek') is not None:
+        # Enveloppe: `cle` est la clé maître qui emballe la clé de données
+        cle = _dek_depuis_emplacement(EMPLACEMENT_CLE.pack(donnees_chiffrees['kek'], donnees_chiffrees['dek']), cle)
+    
+    aead = _aead(donnees_chiffrees.get('algo') or ALGO_AES_GCM, cle)
+    
+    try:
+        message_bytes = aead.decrypt(nonce, chiffre, aad)
+        return message_bytes.decode('utf-8')
+    except InvalidTag:
+        raise InvalidTag("ERREUR: Le message a été altéré ou la clé est incorrecte!")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - CALIBRATION DU KDF
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _encoder_descripteur_kdf(parametres: dict, salt: bytes) -> str:
+    """Paramètres + salt en une chaîne (format PHC): $pbkdf2-sha256$i=...$salt"""
+    salt_b64 = base64.b64encode(salt).decode('ascii').rstrip('=')
+    if parametres['kdf'] == 'scrypt':
+        return f"$scrypt$ln={parametres['ln']},r={parametres['r']},p={parametres['p']}${salt_b64}"
+    return f"$pbkdf2-sha256$i={parametres['iterations']}${salt_b64}"
+
+
+def _decoder_descripteur_kdf(descripteur: str) -> Tuple[dict, bytes]:
+    """Inverse de _encoder_descripteur_kdf()"""
+    try:
+        _, nom, valeurs, salt_b64 = descripteur.split('$')
+        valeurs = {k: int(v) for k, v in (e.split('=') for e in valeurs.split(','))}
+        salt = base64.b64decode(salt_b64 + '=' * (-len(salt_b64) % 4))
+    except ValueError:
+        raise ValueError(f"Descripteur de KDF invalide: {descripteur}")
+    
+    try:
+        if nom == 'scrypt':
+            return {'kdf': 'scrypt', 'ln': valeurs['ln'], 'r': valeurs['r'], 'p': valeurs['p']}, salt
+        if nom == 'pbkdf2-sha256':
+            return {'kdf': 'pbkdf2', 'iterations': valeurs['i']}, salt
+    except KeyError as e:
+        raise ValueError(f"Descripteur de KDF invalide (paramètre {e} manquant): {descripteur}")
+    raise ValueError(f"KDF inconnu: {nom}")
+
+
+def _deriver(mot_de_passe: str, parametres: dict, salt: bytes) -> bytes:
+    """Dérive une clé de KEY_SIZE octets avec les paramètres donnés"""
+    if parametres['kdf'] == 'scrypt':
+        from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+        kdf = Scrypt(salt=salt, length=KEY_SIZE, n=2 ** parametres['ln'], r=parametres['r'], p=parametres['p'])
+    else:
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=KEY_SIZE, salt=salt,
+                         iterations=parametres['iterations'])
+    return kdf.derive(mot_de_passe.encode('utf-8'))
+
+
+def calibrer_kdf(latence_ms: float = KDF_LATENCE_CIBLE_MS, kdf: str = 'pbkdf2',
+                 memoire_max: int = KDF_SCRYPT_MEMOIRE_MAX, enregistrer: bool = True) -> dict:
+    """
+    Choisit les paramètres du KDF pour une latence cible sur cet hôte
+    
+    Le coût est mesuré sur une dérivation réduite puis extrapolé (il est
+    linéaire en itérations pour PBKDF2, en N pour scrypt). Les paramètres
+    ne descendent jamais sous les minimums recommandés (OWASP): sur une
+    machine lente, la latence dépasse alors la cible.
+    
+    Args:
+        latence_ms: Durée visée d'une dérivation
+        kdf: 'pbkdf2' ou 'scrypt'
+        memoire_max: Mémoire maximale de scrypt (128 * r * N octets)
+        enregistrer: Mémoriser le résultat pour cet hôte (voir parametres_kdf())
+        
+    Returns:
+        dict: Paramètres choisis, avec 'latence_ms' estimée
+    """
+    import math
+    
+    salt = bytes(SALT_SIZE)
+    
+    def mesurer(parametres: dict) -> float:
+        durees = []
+        for _ in range(3):
+            debut = time.perf_counter()
+            _deriver("calibration", parametres, salt)
+            durees.append(time.perf_counter() - debut)
+        return min(durees) * 1000
+    
+    if kdf == 'scrypt':
+        r, p, ln_mesure = 8, 1, 14
+        ms_par_n = mesurer({'kdf': 'scrypt', 'ln': ln_mesure, 'r': r, 'p': p}) / 2 ** ln_mesure
+        ln = int(math.log2(max(1.0, latence_ms / ms_par_n)))
+        ln_max = int(math.log2(memoire_max // (128 * r)))
+        ln = max(KDF_SCRYPT_LN_MIN, min(ln, ln_max))
+        parametres = {'kdf': 'scrypt', 'ln': ln, 'r': r, 'p': p, 'latence_ms': ms_par_n * 2 ** ln}
+    elif kdf == 'pbkdf2':
+        iterations_mesure = 100_000
+        ms_par_iteration = mesurer({'kdf': 'pbkdf2', 'iterations': iterations_mesure}) / iterations_mesure
+        iterations = max(PBKDF2_ITERATIONS, int(latence_ms / ms_par_iteration) // 1000 * 1000)
+        parametres = {'kdf': 'pbkdf2', 'iterations': iterations, 'latence_ms': ms_par_iteration * iterations}
+    else:
+        raise ValueError(f"KDF inconnu: {kdf} (choix: pbkdf2, scrypt)")
+    
+    if enregistrer:
+        global _parametres_kdf
+        _parametres_kdf = parametres
+        try:
+            PARAMETRES_KDF_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(PARAMETRES_KDF_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'signature': _signature_hote(), 'parametres': parametres}, f, indent=2)
+        except OSError:
+            pass   # Cache facultatif
+    
+    return parametres
+
+
+_parametres_kdf = None
+
+
+def parametres_kdf() -> dict:
+    """
+    Paramètres du KDF pour les nouvelles dérivations: ceux de la dernière
+    calibration sur cet hôte, sinon PBKDF2 à PBKDF2_ITERATIONS
+    """
+    global _parametres_kdf
+    if _parametres_kdf is None:
+        _parametres_kdf = {'kdf': 'pbkdf2', 'iterations': PBKDF2_ITERATIONS}
+        try:
+            with open(PARAMETRES_KDF_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('signature') == _signature_hote():
+                _parametres_kdf = cache['parametres']
+        except (OSError, ValueError, KeyError):
+            pass
+    return _parametres_kdf
+
+
+def deriver_cle(mot_de_passe: str, descripteur: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    Dérive une clé depuis un mot de passe, paramètres et salt compris
+    
+    Sans descripteur: nouveau salt et paramètres de parametres_kdf().
+    Avec: re-dérivation à l'identique (le descripteur est conservé avec
+    les données, comme l'était le salt).
+    
+    Returns:
+        Tuple[bytes, str]: (clé, descripteur "$kdf$paramètres$salt")
+    """
+    if descripteur is None:
+        parametres, salt = parametres_kdf(), secrets.token_bytes(SALT_SIZE)
+        descripteur = _encoder_descripteur_kdf(parametres, salt)
+    else:
+        parametres, salt = _decoder_descripteur_kdf(descripteur)
+    return _deriver(mot_de_passe, parametres, salt), descripteur
+
+
+def _deriver_cle_lot(travail: Tuple[str, Optional[str]]) -> Tuple[bytes, str]:
+    return deriver_cle(*travail)
+
+
+def _memoire_disponible() -> Optional[int]:
+    """Mémoire disponible en octets (MemAvailable sous Linux, sinon la moitié de la RAM), ou None"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for ligne in f:
+                if ligne.startswith('MemAvailable:'):
+                    return int(ligne.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // 2
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _memoire_kdf(parametres: dict) -> int:
+    """Mémoire d'une dérivation: 128 · r · (N + p) octets pour scrypt, négligeable pour PBKDF2"""
+    if parametres['kdf'] == 'scrypt':
+        return 128 * parametres['r'] * (2 ** parametres['ln'] + parametres['p'])
+    return 0
+
+
+def deriver_cles_lot(mots_de_passe: Iterable[str], descripteurs: Optional[Iterable[Optional[str]]] = None,
+                     workers: Optional[int] = None) -> List[Tuple[bytes, str]]:
+    """
+    Dérive les clés de nombreux mots de passe sur un pool de processus
+    
+    Un KDF est volontairement coûteux et occupe un cœur entier: des
+    milliers de comptes se traitent en parallèle sur tous les cœurs.
+    
+    Args:
+        mots_de_passe: Mots de passe
+        descripteurs: Descripteurs existants (même ordre, un par mot de passe; None
+            dans la liste pour un nouveau salt), ou None pour de nouveaux salts
+        workers: Nombre de processus (défaut: nombre de cœurs), limité par la
+            mémoire disponible quand le KDF est scrypt
+        
+    Returns:
+        List[Tuple[bytes, str]]: (clé, descripteur), dans l'ordre des mots de passe
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import repeat
+    
+    mots_de_passe = list(mots_de_passe)
+    if descripteurs is None:
+        descripteurs = repeat(None)
+    else:
+        descripteurs = list(descripteurs)
+        if len(descripteurs) != len(mots_de_passe):
+            raise ValueError(f"{len(descripteurs)} descripteur(s) pour {len(mots_de_passe)} mot(s) de passe")
+    
+    # Les nouveaux descripteurs sont tirés ici: les processus n'ont pas à recalibrer
+    travaux = [
+        (m, d if d is not None else _encoder_descripteur_kdf(parametres_kdf(), secrets.token_bytes(SALT_SIZE)))
+        for m, d in zip(mots_de_passe, descripteurs)
+    ]
+    workers = workers or os.cpu_count() or 1
+    
+    # scrypt: chaque processus peut occuper jusqu'à KDF_SCRYPT_MEMOIRE_MAX
+    memoire = max((_memoire_kdf(_decoder_descripteur_kdf(d)[0]) for _, d in travaux), default=0)
+    disponible = _memoire_disponible()
+    if memoire and disponible is not None:
+        workers = max(1, min(workers, disponible // memoire))
+    
+    if workers == 1 or len(travaux) < 2:
+        return [_deriver_cle_lot(t) for t in travaux]
+    
+    with ProcessPoolExecutor(max_workers=workers) as executeur:
+        return list(executeur.map(_deriver_cle_lot, travaux, chunksize=max(1, len(travaux) // (workers * 4))))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - CHIFFREMENT D'ENVELOPPE
+# ═══════════════════════════════════════════════════════════════════════════
+
+class CacheLRU:
+    """
+    Cache borné (moins récemment utilisé évincé en premier), thread-safe
+    
+    Args:
+        taille_max: Nombre maximum d'entrées
+        a_l_eviction: Fonction appelée avec (clé, valeur) à chaque éviction
+    """
+    
+    def __init__(self, taille_max: int, a_l_eviction=None):
+        from collections import OrderedDict
+        
+        self.taille_max = taille_max
+        self.a_l_eviction = a_l_eviction
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+    
+    def get(self, cle, defaut=None):
+        with self._verrou:
+            try:
+                self._entrees.move_to_end(cle)
+                return self._entrees[cle]
+            except KeyError:
+                return defaut
+    
+    def put(self, cle, valeur):
+        evinces = []
+        with self._verrou:
+            if cle in self._entrees:
+                ancienne = self._entrees.pop(cle)
+                if ancienne is not valeur:
+                    evinces.append((cle, ancienne))
+            self._entrees[cle] = valeur
+            while len(self._entrees) > self.taille_max:
+                evinces.append(self._entrees.popitem(last=False))
+        if self.a_l_eviction is not None:
+            for entree in evinces:
+                self.a_l_eviction(*entree)
+    
+    def pop(self, cle, defaut=None):
+        with self._verrou:
+            valeur = self._entrees.pop(cle, defaut)
+        if valeur is not defaut and self.a_l_eviction is not None:
+            self.a_l_eviction(cle, valeur)
+        return valeur
+    
+    def vider(self):
+        with self._verrou:
+            entrees = list(self._entrees.items())
+            self._entrees.clear()
+        if self.a_l_eviction is not None:
+            for entree in entrees:
+                self.a_l_eviction(*entree)
+    
+    def __contains__(self, cle) -> bool:
+        return cle in self._entrees
+    
+    def __len__(self) -> int:
+        return len(self._entrees)
+
+
+_cache_dek = CacheLRU(DEK_CACHE_TAILLE)
+
+
+def empreinte_cle(cle: bytes) -> bytes:
+    """Identifiant public d'une clé maître (16 octets, ne révèle pas la clé)"""
+    return hashlib.sha256(b"TP4-KEK\x00" + cle).digest()[:EMPREINTE_SIZE]
+
+
+def emballer_cle(dek: bytes, kek: bytes) -> bytes:
+    """Emballe une clé de données sous une clé maître (AES Key Wrap, RFC 3394)"""
+    from cryptography.hazmat.primitives.keywrap import aes_key_wrap
+    return aes_key_wrap(kek, dek)
+
+
+def deballer_cle(emballee: bytes, kek: bytes) -> bytes:
+    """
+    Déballe une clé de données (résultat gardé dans un cache LRU borné)
+    
+    Raises:
+        InvalidTag: Mauvaise clé maître ou clé emballée altérée
+    """
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.keywrap import aes_key_unwrap, InvalidUnwrap
+    
+    cle_cache = (empreinte_cle(kek), emballee)
+    dek = _cache_dek.get(cle_cache)
+    if dek is None:
+        try:
+            dek = aes_key_unwrap(kek, emballee)
+        except InvalidUnwrap:
+            raise InvalidTag("ERREUR: La clé de données a été altérée ou la clé maître est incorrecte!")
+        _cache_dek.put(cle_cache, dek)
+    return dek
+
+
+def _nouvel_emplacement_cle(kek: bytes) -> Tuple[bytes, bytes]:
+    """Tire une clé de données et retourne (dek, emplacement de clé sérialisé)"""
+    if len(kek) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    dek = secrets.token_bytes(KEY_SIZE)
+    return dek, EMPLACEMENT_CLE.pack(empreinte_cle(kek), emballer_cle(dek, kek))
+
+
+def _dek_depuis_emplacement(emplacement: bytes, kek: bytes) -> bytes:
+    """Retrouve la clé de données d'un emplacement de clé"""
+    from cryptography.exceptions import InvalidTag
+    
+    empreinte, emballee = EMPLACEMENT_CLE.unpack(emplacement)
+    if empreinte != empreinte_cle(kek):
+        raise InvalidTag(f"ERREUR: Données emballées sous une autre clé maître (empreinte {empreinte.hex()})")
+    return deballer_cle(emballee, kek)
+
+
+def chiffrer_message_enveloppe(message: str, kek: bytes, donnees_additionnelles: Optional[str] = None,
+                               algo: Optional[int] = None) -> dict:
+    """
+    Chiffre un message sous une clé de données aléatoire, emballée par `kek`
+    
+    Changer de clé maître ne demande alors que de ré-emballer la clé de
+    données (quelques dizaines d'octets), pas de re-chiffrer le message.
+    
+    Returns:
+        dict: Comme chiffrer_message(), plus 'dek' (clé emballée) et 'kek' (empreinte)
+    """
+    dek, emplacement = _nouvel_emplacement_cle(kek)
+    donnees = chiffrer_message(message, dek, donnees_additionnelles, algo)
+    donnees['kek'], donnees['dek'] = EMPLACEMENT_CLE.unpack(emplacement)
+    return donnees
+
+
+def reemballer_message(donnees_chiffrees: dict, ancienne_kek: bytes, nouvelle_kek: bytes) -> dict:
+    """Ré-emballe la clé de données d'un message (le chiffré n'est pas touché)"""
+    if 'dek' not in donnees_chiffrees:
+        raise ValueError("Message chiffré directement sous la clé: re-chiffrement nécessaire")
+    
+    emplacement = EMPLACEMENT_CLE.pack(donnees_chiffrees['kek'], donnees_chiffrees['dek'])
+    dek = _dek_depuis_emplacement(emplacement, ancienne_kek)
+    
+    resultat = dict(donnees_chiffrees)
+    resultat['kek'] = empreinte_cle(nouvelle_kek)
+    resultat['dek'] = emballer_cle(dek, nouvelle_kek)
+    return resultat
+
+
+def reemballer_fichier(chemin: str, ancienne_kek: bytes, nouvelle_kek: bytes) -> bool:
+    """
+    Ré-emballe la clé de données d'un fichier chiffré, sur place
+    
+    Seul l'emplacement de clé (56 octets) est réécrit: le coût ne dépend
+    pas de la taille du fichier.
+    
+    Returns:
+        bool: True si le fichier a été modifié, False s'il l'était déjà
+    """
+    with open(chemin, 'r+b') as f:
+        entete = f.read(FICHIER_ENTETE_SEGMENTE.size + EMPLACEMENT_CLE.size)
+        analyse = _analyser_entete(entete)
+        
+        if analyse is None or analyse[0] == FICHIER_VERSION_DIRECTE:
+            raise ValueError(f"{chemin}: fichier chiffré directement sous la clé, re-chiffrement nécessaire")
+        
+        _, _, _, taille_entete, debut = analyse
+        emplacement = entete[taille_entete:debut]
+        if emplacement[:EMPREINTE_SIZE] == empreinte_cle(nouvelle_kek):
+            return False
+        
+        dek = _dek_depuis_emplacement(emplacement, ancienne_kek)
+        f.seek(taille_entete)
+        f.write(EMPLACEMENT_CLE.pack(empreinte_cle(nouvelle_kek), emballer_cle(dek, nouvelle_kek)))
+        f.flush()
+        os.fsync(f.fileno())
+    
+    return True
+
+
+def reemballer_fichiers(fichiers: Iterable[str], ancienne_kek: bytes, nouvelle_kek: bytes,
+                        workers: int = 8) -> Dict[str, object]:
+    """
+    Rotation de clé maître sur un ensemble de fichiers (O(nombre de fichiers))
+    
+    Returns:
+        Dict[str, object]: fichier -> True/False (modifié ou non), ou l'exception levée
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    def traiter(fichier):
+        try:
+            return reemballer_fichier(fichier, ancienne_kek, nouvelle_kek)
+        except Exception as e:
+            return e
+    
+    fichiers = list(fichiers)
+    with ThreadPoolExecutor(max_workers=workers) as executeur:
+        return dict(zip(fichiers, executeur.map(traiter, fichiers)))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - NONCES PAR COMPTEUR
+# ═══════════════════════════════════════════════════════════════════════════
+
+class _VerrouFichier:
+    """Verrou exclusif entre processus (fcntl; simple verrou de thread ailleurs)"""
+    
+    def __init__(self, chemin: Path):
+        self.chemin = chemin
+        self._fichier = None
+    
+    def __enter__(self):
+        self._fichier = open(self.chemin, 'a+b')
+        try:
+            import fcntl
+            fcntl.flock(self._fichier.fileno(), fcntl.LOCK_EX)
+        except ImportError:
+            pass
+        return self
+    
+    def __exit__(self, *exc):
+        self._fichier.close()   # Libère le verrou
+        self._fichier = None
+
+
+class AllocateurNonces:
+    """
+    Nonces déterministes pour une clé: champ fixe (4 octets) + compteur (8 octets)
+    
+    Un nonce aléatoire de 96 bits n'est sûr que jusqu'à environ 2^32
+    messages par clé (paradoxe des anniversaires); un compteur ne se répète
+    jamais (NIST SP 800-38D, construction déterministe).
+    
+    Les compteurs sont réservés par blocs: le fichier d'état mémorise le
+    premier compteur non réservé (high-water mark), écrit et synchronisé
+    sur disque AVANT de distribuer le bloc. Après un crash, les compteurs
+    restants du bloc sont perdus, jamais réutilisés. Chaque thread reçoit
+    son propre bloc: suivant() ne prend aucun verrou, sauf pour réserver
+    un nouveau bloc (verrou de fichier partagé entre processus).
+    
+    Le champ fixe est tiré au hasard à la création du fichier d'état: un
+    fichier d'état par clé et par machine.
+    
+    Args:
+        cle: Clé concernée (seule son empreinte est enregistrée)
+        dossier: Dossier des fichiers d'état
+        taille_bloc: Nombre de compteurs réservés à la fois
+    """
+    
+    def __init__(self, cle: bytes, dossier: Path = NONCES_DIR, taille_bloc: int = NONCES_BLOC):
+        self.empreinte = empreinte_cle(cle)
+        self.taille_bloc = taille_bloc
+        self.chemin = Path(dossier) / f"{self.empreinte.hex()}.bin"
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+        _allocateurs_actifs.add(self)
+        
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        with self._verrou, _VerrouFichier(self.chemin.with_suffix('.lock')):
+            self.champ_fixe, _ = self._lire_etat()
+    
+    def _lire_etat(self) -> Tuple[bytes, int]:
+        """Retourne (champ fixe, prochain compteur non réservé), en créant l'état au besoin"""
+        try:
+            with open(self.chemin, 'rb') as f:
+                magic, champ_fixe, prochain = NONCES_ETAT.unpack(f.read(NONCES_ETAT.size))
+        except FileNotFoundError:
+            champ_fixe, prochain = secrets.token_bytes(4), 0
+            self._ecrire_etat(champ_fixe, prochain)
+            return champ_fixe, prochain
+        
+        if magic != NONCES_MAGIC:
+            raise ValueError(f"{self.chemin}: fichier d'état de nonces invalide")
+        return champ_fixe, prochain
+    
+    def _ecrire_etat(self, champ_fixe: bytes, prochain: int):
+        """Remplace le fichier d'état de façon atomique et durable"""
+        temporaire = self.chemin.with_suffix('.tmp')
+        with open(temporaire, 'wb') as f:
+            f.write(NONCES_ETAT.pack(NONCES_MAGIC, champ_fixe, prochain))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaire, self.chemin)
+        
+        if hasattr(os, 'O_DIRECTORY'):
+            dossier = os.open(self.chemin.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dossier)
+            finally:
+                os.close(dossier)
+    
+    def reserver(self, nombre: int) -> Tuple[int, int]:
+        """
+        Réserve `nombre` compteurs consécutifs
+        
+        Returns:
+            Tuple[int, int]: Intervalle [début, fin[ réservé
+        """
+        with self._verrou, _VerrouFichier(self.chemin.with_suffix('.lock')):
+            champ_fixe, debut = self._lire_etat()
+            fin = debut + nombre
+            if fin > NONCES_COMPTEUR_MAX:
+                raise OverflowError("Compteur de nonces épuisé: changer de clé")
+            self._ecrire_etat(champ_fixe, fin)
+        return debut, fin
+    
+    def suivant(self) -> bytes:
+        """Retourne un nonce jamais utilisé avec cette clé (12 octets)"""
+        try:
+            return NONCE_COMPTEUR.pack(self.champ_fixe, next(self._local.compteurs))
+        except (AttributeError, StopIteration):
+            debut, fin = self.reserver(self.taille_bloc)
+            self._local.compteurs = iter(range(debut, fin))
+            return NONCE_COMPTEUR.pack(self.champ_fixe, next(self._local.compteurs))
+    
+    def _apres_fork(self):
+        # Un processus fils ne doit pas reprendre les blocs de son parent
+        self._local = threading.local()
+        self._verrou = threading.Lock()
+
+
+_allocateurs_actifs = weakref.WeakSet()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: [a._apres_fork() for a in list(_allocateurs_actifs)])
+
+_allocateurs = {}
+_allocateurs_verrou = threading.Lock()
+
+
+def allocateur_nonces(cle: bytes) -> AllocateurNonces:
+    """Retourne l'allocateur de nonces d'une clé (un seul par clé et par processus)"""
+    empreinte = empreinte_cle(cle)
+    with _allocateurs_verrou:
+        allocateur = _allocateurs.get(empreinte)
+        if allocateur is None:
+            allocateur = _allocateurs[empreinte] = AllocateurNonces(cle)
+        return allocateur
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - SESSIONS X25519
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _cle_session(dh_ephemere: bytes, dh_statique: bytes, ephemere: bytes,
+                 expediteur: bytes, destinataire: bytes) -> bytes:
+    """
+    Clé de session AEAD: HKDF-SHA256 sur les deux secrets X25519
+    
+    Les trois clés publiques entrent dans `info`: la clé est liée à cette
+    session, à cet expéditeur et à ce destinataire.
+    """
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    
+    return HKDF(algorithm=hashes.SHA256(), length=KEY_SIZE, salt=None,
+                info=SESSION_INFO + ephemere + expediteur + destinataire).derive(dh_ephemere + dh_statique)
+
+
+def _aad_session(sequence: int, donnees_additionnelles: Optional[str]) -> bytes:
+    """AAD d'un message de session: numéro de séquence (8 octets) + AAD de l'appelant"""
+    aad = donnees_additionnelles.encode('utf-8') if donnees_additionnelles else b""
+    return struct.pack(">Q", sequence) + aad
+
+
+def _verifier_sequence(session: list, sequence: int):
+    """Refuse un numéro de séquence déjà reçu ou sorti de la fenêtre anti-rejeu"""
+    ecart = session[2] - sequence
+    if not 1 <= sequence <= SESSION_MESSAGES_MAX or ecart >= SESSION_FENETRE:
+        raise ValueError(f"Numéro de séquence hors fenêtre: {sequence}")
+    if ecart >= 0 and session[3] >> ecart & 1:
+        raise ValueError(f"Message rejoué (séquence {sequence})")
+
+
+def _marquer_sequence(session: list, sequence: int):
+    """Note `sequence` comme reçu: la fenêtre glisse si c'est le plus grand numéro vu"""
+    if sequence > session[2]:
+        session[3] = ((session[3] << (sequence - session[2])) | 1) & ((1 << SESSION_FENETRE) - 1)
+        session[2] = sequence
+    else:
+        session[3] |= 1 << (session[2] - sequence)
+
+
+class SessionsX25519:
+    """
+    Messagerie chiffrée par échange de clés X25519, avec cache de sessions
+    
+    Chaque partie a une identité X25519 (clé privée statique). Pour écrire
+    à un pair, l'expéditeur tire une clé éphémère et dérive par HKDF une
+    clé de session à partir de deux échanges: éphémère × pair (secret
+    frais) et identité × pair (seul le vrai expéditeur peut le calculer).
+    La clé de session chiffre ensuite les messages (AEAD au choix).
+    
+    Les sessions sont gardées en cache par pair pendant `ttl` secondes:
+    les messages suivants ne refont aucune opération à clé publique, ni à
+    l'envoi ni à la réception (le destinataire met la session en cache
+    sous la clé éphémère reçue). Passé le délai, ou après
+    SESSION_MESSAGES_MAX messages, une nouvelle session est ouverte.
+    
+    Chaque message porte un numéro de séquence (1, 2, ...) authentifié dans
+    l'AAD. Le destinataire refuse un numéro déjà vu, ou antérieur à sa
+    fenêtre de SESSION_FENETRE messages (désordre toléré dans la fenêtre),
+    ainsi que tout message d'une session expirée chez lui: un message
+    capturé ne peut pas être rejoué. Limite: l'état anti-rejeu vit dans le
+    cache; une session évincée (taille_max atteinte), oubliée ou perdue au
+    redémarrage repart d'une fenêtre vide. Les deux parties doivent
+    utiliser le même `ttl`. Les méthodes sont thread-safe.
+    
+    Args:
+        identite: Clé privée X25519 (défaut: nouvelle identité)
+        ttl: Durée de vie d'une session en secondes
+        taille_max: Nombre maximum de sessions en cache (envoi et réception)
+    """
+    
+    def __init__(self, identite=None, ttl: float = SESSION_TTL, taille_max: int = SESSIONS_CACHE_TAILLE):
+        from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+        
+        self.identite = identite or X25519PrivateKey.generate()
+        self.publique = self.identite.public_key().public_bytes_raw()
+        self.ttl = ttl
+        self._envoi = CacheLRU(taille_max)       # pair → [clé éphémère, clé de session, expiration, messages]
+        self._reception = CacheLRU(taille_max)   # (expéditeur, clé éphémère) → [clé de session, expiration, séquence max, fenêtre]
+        self._verrou = threading.Lock()          # Compteurs de séquence et fenêtres anti-rejeu
+        self.echanges = 0                        # Opérations X25519 effectuées (statistique)
+    
+    def _session_envoi(self, pair: bytes) -> Tuple[bytes, bytes, int]:
+        """Session vers `pair` (ouverte si absente, expirée ou épuisée); retourne (clé éphémère, clé, séquence)"""
+        from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+        
+        with self._verrou:
+            session = self._envoi.get(pair)
+            maintenant = time.monotonic()
+            if session is None or session[2] <= maintenant or session[3] >= SESSION_MESSAGES_MAX:
+                cle_pair = X25519PublicKey.from_public_bytes(pair)
+                ephemere = X25519PrivateKey.generate()
+                publique_ephemere = ephemere.public_key().public_bytes_raw()
+                cle = _cle_session(ephemere.exchange(cle_pair), self.identite.exchange(cle_pair),
+                                   publique_ephemere, self.publique, pair)
+                self.echanges += 2
+                session = [publique_ephemere, cle, maintenant + self.ttl, 0]
+                self._envoi.put(pair, session)
+            session[3] += 1
+            return session[0], session[1], session[3]
+    
+    def chiffrer(self, message: str, pair: bytes, donnees_additionnelles: Optional[str] = None) -> dict:
+        """
+        Chiffre un message pour le pair de clé publique `pair` (32 octets)
+        
+        Returns:
+            dict: {'chiffre', 'nonce', 'aad', 'algo', 'sequence', 'ephemere', 'expediteur'}
+        """
+        publique_ephemere, cle, sequence = self._session_envoi(pair)
+        algo = algorithme_prefere()
+        nonce = secrets.token_bytes(NONCE_SIZE)
+        chiffre = _aead(algo, cle).encrypt(nonce, message.encode('utf-8'),
+                                           _aad_session(sequence, donnees_additionnelles))
+        return {
+            'chiffre': chiffre,
+            'nonce': nonce,
+            'aad': donnees_additionnelles,
+            'algo': algo,
+            'sequence': sequence,
+            'ephemere': publique_ephemere,
+            'expediteur': self.publique
+        }
+    
+    def dechiffrer(self, donnees_chiffrees: dict) -> str:
+        """
+        Déchiffre un message reçu (clé de session en cache ou recalculée)
+        
+        Un expéditeur usurpé donne une autre clé de session, un numéro de
+        séquence modifié un autre AAD: InvalidTag. Un message rejoué, ou
+        reçu sur une session expirée: ValueError.
+        """
+        from cryptography.exceptions import InvalidTag
+        from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PublicKey
+        
+        ephemere, expediteur = donnees_chiffrees['ephemere'], donnees_chiffrees['expediteur']
+        sequence = donnees_chiffrees['sequence']
+        entree = (expediteur, ephemere)
+        maintenant = time.monotonic()
+        with self._verrou:
+            session = self._reception.get(entree)
+            if session is not None:
+                if session[1] <= maintenant:
+                    raise ValueError("Session expirée: message refusé")
+                _verifier_sequence(session, sequence)
+        
+        if session is None:
+            cle = _cle_session(self.identite.exchange(X25519PublicKey.from_public_bytes(ephemere)),
+                               self.identite.exchange(X25519PublicKey.from_public_bytes(expediteur)),
+                               ephemere, expediteur, self.publique)
+        else:
+            cle = session[0]
+        
+        aead = _aead(donnees_chiffrees.get('algo') or ALGO_AES_GCM, cle)
+        try:
+            message_bytes = aead.decrypt(donnees_chiffrees['nonce'], donnees_chiffrees['chiffre'],
+                                         _aad_session(sequence, donnees_chiffrees.get('aad')))
+        except InvalidTag:
+            raise InvalidTag("ERREUR: Le message a été altéré ou la clé est incorrecte!")
+        
+        # Séquence marquée après authentification seulement: un faux message
+        # n'avance pas la fenêtre et n'évince aucune session du cache
+        with self._verrou:
+            if session is None:
+                self.echanges += 2
+                session = self._reception.get(entree)
+                if session is None:
+                    session = [cle, maintenant + self.ttl, 0, 0]
+                    self._reception.put(entree, session)
+            _verifier_sequence(session, sequence)   # Même message déchiffré en parallèle
+            _marquer_sequence(session, sequence)
+        return message_bytes.decode('utf-8')
+    
+    def oublier(self, pair: Optional[bytes] = None):
+        """Ferme les sessions ouvertes vers `pair` (ou toutes)"""
+        if pair is None:
+            self._envoi.vider()
+            self._reception.vider()
+        else:
+            self._envoi.pop(pair)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - CHIFFREMENT PAR LOT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _nonce_lot(prefixe: bytes, index: int, fin: bool = False) -> bytes:
+    """Nonce d'un message du lot: préfixe (7) + compteur (4) + drapeau de fin (1)"""
+    if len(prefixe) == 8:   # Versions 1 et 2: préfixe (8) + compteur (4)
+        return prefixe + index.to_bytes(4, 'big')
+    return prefixe + struct.pack(">IB", index, fin)
+
+
+def _offsets_en_octets(offsets: array.array) -> bytes:
+    """Sérialise la table des offsets en little-endian quel que soit l'hôte"""
+    if sys.byteorder != 'little':
+        offsets = array.array('Q', offsets)
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def chiffrer_lot_aes_gcm(messages: Iterable[str], cle: bytes,
+                         donnees_additionnelles: Optional[str] = None,
+                         algo: Optional[int] = None) -> bytes:
+    """
+    Chiffre une séquence de messages sous une même clé (AEAD au choix)
+    
+    Les nonces ne sont pas tirés un par un: un préfixe aléatoire de 7 octets
+    est tiré une seule fois pour le lot, puis complété par un compteur de
+    4 octets et un drapeau de fin. L'unicité des nonces est donc garantie à
+    l'intérieur du lot, et l'échange de deux messages est détecté (le nonce
+    dépend de l'index). Le lot se termine par une marque de fin (message
+    vide chiffré avec le drapeau de fin, à l'index `nombre`): un lot tronqué,
+    ou dont le nombre de messages a été modifié, est refusé.
+    
+    Format du paquet:
+        en-tête (magic, version, algorithme, préfixe, nombre de messages)
+        table des offsets (nombre + 1 entiers de 8 octets, little-endian)
+        chiffrés concaténés (chiffré + tag de 16 octets), puis marque de fin (16 octets)
+    
+    Args:
+        messages: Messages à chiffrer (itérable, éventuellement un générateur)
+        cle: Clé AES-256
+        donnees_additionnelles: AAD commun à tout le lot (optionnel)
+        algo: Identifiant d'AEAD (défaut: algorithme_prefere())
+        
+    Returns:
+        bytes: Paquet binaire contenant tout le lot
+    """
+    if len(cle) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    
+    if algo is None:
+        algo = algorithme_prefere()
+    
+    prefixe = secrets.token_bytes(LOT_PREFIXE_SIZE)
+    aad = donnees_additionnelles.encode('utf-8') if donnees_additionnelles else None
+    encrypt = _aead(algo, cle).encrypt
+    
+    corps = bytearray()
+    offsets = array.array('Q', [0])
+    
+    for index, message in enumerate(messages):
+        if index >= LOT_COMPTEUR_MAX - 1:
+            raise ValueError(f"Un lot est limité à {LOT_COMPTEUR_MAX - 1} messages")
+        corps += encrypt(_nonce_lot(prefixe, index), message.encode('utf-8'), aad)
+        offsets.append(len(corps))
+    
+    nombre = len(offsets) - 1
+    corps += encrypt(_nonce_lot(prefixe, nombre, fin=True), b"", aad)
+    entete = LOT_ENTETE.pack(LOT_MAGIC, LOT_VERSION, algo, prefixe, nombre)
+    
+    return b"".join((entete, _offsets_en_octets(offsets), corps))
+
+
+def _lire_entete_lot(paquet, accepter_anciennes_versions: bool = False
+                     ) -> Tuple[int, bytes, int, memoryview, memoryview, Optional[memoryview]]:
+    """
+    Valide l'en-tête d'un paquet et retourne (algo, préfixe, nombre, offsets, corps, marque de fin)
+    
+    Les versions 1 et 2 n'ont pas de marque de fin: un paquet v3 dont
+    l'en-tête est réécrit en v2 avec un nombre de messages plus petit se
+    déchiffrerait sans erreur (le nonce v3 d'index 0 est aussi un nonce v2
+    valide). Elles ne sont donc lues que sur demande explicite.
+    """
+    vue = memoryview(paquet)
+    
+    if len(vue) < LOT_ENTETE_V1.size or bytes(vue[:4]) != LOT_MAGIC:
+        raise ValueError("Ce n'est pas un paquet de messages TP4")
+    
+    version = vue[4]
+    if version < LOT_VERSION and not accepter_anciennes_versions:
+        raise ValueError(f"Paquet de version {version}, sans marque de fin (troncature indétectable): "
+                         f"accepter_anciennes_versions=True pour le lire quand même")
+    if version == 1:
+        _, _, prefixe, nombre = LOT_ENTETE_V1.unpack_from(vue)
+        algo, debut_table = ALGO_AES_GCM, LOT_ENTETE_V1.size
+    elif version == 2 and len(vue) >= LOT_ENTETE_V2.size:
+        _, _, algo, prefixe, nombre = LOT_ENTETE_V2.unpack_from(vue)
+        debut_table = LOT_ENTETE_V2.size
+    elif version == LOT_VERSION and len(vue) >= LOT_ENTETE.size:
+        _, _, algo, prefixe, nombre = LOT_ENTETE.unpack_from(vue)
+        debut_table = LOT_ENTETE.size
+    else:
+        raise ValueError(f"Version de paquet non supportée: {version}")
+    
+    fin_table = debut_table + (nombre + 1) * 8
+    
+    if len(vue) < fin_table:
+        raise ValueError("Table des offsets tronquée")
+    
+    offsets = vue[debut_table:fin_table]
+    if sys.byteorder == 'little':
+        offsets = offsets.cast('Q')
+    else:
+        offsets = memoryview(array.array('Q', struct.unpack(f"<{nombre + 1}Q", offsets)))
+    
+    corps, fin = vue[fin_table:], None
+    if version == LOT_VERSION:
+        corps, fin = corps[:-TAG_SIZE], corps[-TAG_SIZE:]
+    if offsets[nombre] != len(corps) or (fin is not None and len(fin) != TAG_SIZE):
+        raise ValueError("Paquet tronqué ou corrompu")
+    
+    return algo, prefixe, nombre, offsets, corps, fin
+
+
+def _verifier_fin_lot(aead, prefixe: bytes, nombre: int, fin: Optional[memoryview], aad: Optional[bytes]):
+    """Authentifie la marque de fin: le nombre de messages n'a pas été modifié"""
+    from cryptography.exceptions import InvalidTag
+    
+    if fin is None:
+        return   # Versions 1 et 2: pas de marque de fin
+    try:
+        aead.decrypt(_nonce_lot(prefixe, nombre, fin=True), fin, aad)
+    except InvalidTag:
+        raise InvalidTag("ERREUR: Lot tronqué ou altéré (marque de fin invalide)!")
+
+
+def extraire_message_lot(paquet: bytes, cle: bytes, index: int,
+                         donnees_additionnelles: Optional[str] = None,
+                         accepter_anciennes_versions: bool = False) -> str:
+    """
+    Déchiffre un seul message du lot grâce à la table des offsets
+    
+    Args:
+        paquet: Paquet retourné par chiffrer_lot_aes_gcm()
+        cle: Clé AES-256
+        index: Position du message dans le lot
+        donnees_additionnelles: AAD commun utilisé au chiffrement
+        accepter_anciennes_versions: Lire aussi les paquets v1 et v2 (sans marque de fin)
+        
+    Returns:
+        str: Le message déchiffré
+    """
+    from cryptography.exceptions import InvalidTag
+    
+    if len(cle) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    
+    algo, prefixe, nombre, offsets, corps, fin = _lire_entete_lot(paquet, accepter_anciennes_versions)
+    
+    if not 0 <= index < nombre:
+        raise IndexError(f"Index hors du lot (0-{nombre - 1})")
+    
+    aad = donnees_additionnelles.encode('utf-8') if donnees_additionnelles else None
+    aead = _aead(algo, cle)
+    _verifier_fin_lot(aead, prefixe, nombre, fin, aad)
+    chiffre = corps[offsets[index]:offsets[index + 1]]
+    
+    try:
+        return aead.decrypt(_nonce_lot(prefixe, index), chiffre, aad).decode('utf-8')
+    except InvalidTag:
+        raise InvalidTag(f"ERREUR: Le message #{index} a été altéré ou la clé est incorrecte!")
+
+
+def dechiffrer_lot_aes_gcm(paquet: bytes, cle: bytes,
+                           donnees_additionnelles: Optional[str] = None,
+                           accepter_anciennes_versions: bool = False) -> List[str]:
+    """
+    Déchiffre tous les messages d'un paquet
+    
+    Args:
+        paquet: Paquet retourné par chiffrer_lot_aes_gcm()
+        cle: Clé AES-256
+        donnees_additionnelles: AAD commun utilisé au chiffrement
+        accepter_anciennes_versions: Lire aussi les paquets v1 et v2 (sans marque de fin)
+        
+    Returns:
+        List[str]: Les messages, dans l'ordre du lot
+    """
+    from cryptography.exceptions import InvalidTag
+    
+    if len(cle) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    
+    algo, prefixe, nombre, offsets, corps, fin = _lire_entete_lot(paquet, accepter_anciennes_versions)
+    aad = donnees_additionnelles.encode('utf-8') if donnees_additionnelles else None
+    aead = _aead(algo, cle)
+    _verifier_fin_lot(aead, prefixe, nombre, fin, aad)
+    decrypt = aead.decrypt
+    
+    messages = []
+    for index in range(nombre):
+        chiffre = corps[offsets[index]:offsets[index + 1]]
+        try:
+            messages.append(decrypt(_nonce_lot(prefixe, index), chiffre, aad).decode('utf-8'))
+        except InvalidTag:
+            raise InvalidTag(f"ERREUR: Le message #{index} a été altéré ou la clé est incorrecte!")
+    
+    return messages
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.0 - FICHIERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _module_zstd():
+    """Module zstd disponible (Python 3.14+ ou paquet zstandard), ou None"""
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def entropie_octets(donnees: bytes) -> float:
+    """Entropie de Shannon en bits par octet (0 = constant, 8 = aléatoire)"""
+    import math
+    from collections import Counter
+    
+    if not donnees:
+        return 0.0
+    total = len(donnees)
+    return -sum(n / total * math.log2(n / total) for n in Counter(donnees).values())
+
+
+def _choisir_compression(contenu: bytes, compression: Optional[str]) -> int:
+    """
+    Traduit l'option de compression en identifiant, après sondage du début
+    du contenu: des données déjà compressées (ou chiffrées) ne gagneraient
+    rien et coûteraient du temps CPU.
+    """
+    if not compression:
+        return COMPRESSION_AUCUNE
+    if compression == 'auto':
+        compression = 'zstd' if _module_zstd() is not None else 'zlib'
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compression inconnue: {compression} (choix: auto, {', '.join(COMPRESSIONS)})")
+    if compression == 'zstd' and _module_zstd() is None:
+        raise ValueError("zstd indisponible (Python 3.14+ ou paquet zstandard requis)")
+    
+    if entropie_octets(contenu[:SONDE_ENTROPIE_TAILLE]) > SONDE_ENTROPIE_SEUIL:
+        return COMPRESSION_AUCUNE
+    return COMPRESSIONS[compression]
+
+
+def _compresser(contenu: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(contenu, 6)
+    if compression == COMPRESSION_LZMA:
+        import lzma
+        return lzma.compress(contenu, preset=6)
+    return _module_zstd().compress(contenu)
+
+
+def _decompresser(contenu: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(contenu)
+    if compression == COMPRESSION_LZMA:
+        import lzma
+        return lzma.decompress(contenu)
+    zstd = _module_zstd()
+    if zstd is None:
+        raise ValueError("Fichier compressé avec zstd: Python 3.14+ ou paquet zstandard requis")
+    return zstd.decompress(contenu)
+
+
+def _chiffrer_contenu(contenu: bytes, cle: bytes, algo: Optional[int] = None,
+                      compression: Optional[str] = None) -> bytes:
+    """
+    Chiffre le contenu d'un fichier par enveloppe
+    
+    Format: en-tête (magic, version, algorithme[, compression])
+            + emplacement de clé (empreinte de la clé maître, clé de données emballée)
+            + nonce (12 octets) + chiffré sous la clé de données.
+    L'en-tête est authentifié (AAD); l'emplacement de clé ne l'est pas pour
+    pouvoir être ré-emballé sur place (il est protégé par l'emballage).
+    
+    Avec `compression` ('auto', 'zlib', 'lzma' ou 'zstd'), le contenu est
+    compressé avant chiffrement si la sonde d'entropie le juge utile. La
+    taille du chiffré dépend alors du contenu: à éviter lorsqu'un attaquant
+    peut injecter des données à côté d'un secret (attaques CRIME/BREACH).
+    """
+    if algo is None:
+        algo = algorithme_prefere()
+    
+    methode = _choisir_compression(contenu, compression)
+    if methode != COMPRESSION_AUCUNE:
+        compresse = _compresser(contenu, methode)
+        if len(compresse) < len(contenu):
+            contenu = compresse
+        else:
+            methode = COMPRESSION_AUCUNE
+    
+    if methode == COMPRESSION_AUCUNE:
+        entete = FICHIER_ENTETE.pack(FICHIER_MAGIC, FICHIER_VERSION, algo)
+    else:
+        entete = FICHIER_ENTETE_COMPRESSE.pack(FICHIER_MAGIC, FICHIER_VERSION_COMPRESSE, algo, methode)
+    
+    dek, emplacement = _nouvel_emplacement_cle(cle)
+    nonce = secrets.token_bytes(NONCE_SIZE)
+    return entete + emplacement + nonce + _aead(algo, dek).encrypt(nonce, contenu, entete)
+
+
+def _analyser_entete(donnees: bytes) -> Optional[Tuple[int, int, int, int, int]]:
+    """
+    Analyse l'en-tête d'un fichier chiffré
+    
+    Returns:
+        (version, algo, compression, taille de l'en-tête, position du nonce),
+        ou None pour un fichier V2.0 sans en-tête
+    """
+    if donnees[:4] != FICHIER_MAGIC or len(donnees) < FICHIER_ENTETE.size:
+        return None
+    
+    _, version, algo = FICHIER_ENTETE.unpack_from(donnees)
+    if algo not in ALGORITHMES:
+        return None
+    if version == FICHIER_VERSION_DIRECTE:
+        return version, algo, COMPRESSION_AUCUNE, FICHIER_ENTETE.size, FICHIER_ENTETE.size
+    if version == FICHIER_VERSION:
+        return version, algo, COMPRESSION_AUCUNE, FICHIER_ENTETE.size, FICHIER_ENTETE.size + EMPLACEMENT_CLE.size
+    if version == FICHIER_VERSION_SEGMENTE and len(donnees) >= FICHIER_ENTETE_SEGMENTE.size:
+        taille = FICHIER_ENTETE_SEGMENTE.size
+        return version, algo, COMPRESSION_AUCUNE, taille, taille + EMPLACEMENT_CLE.size
+    if version == FICHIER_VERSION_COMPRESSE and len(donnees) >= FICHIER_ENTETE_COMPRESSE.size:
+        compression = donnees[FICHIER_ENTETE.size]
+        if compression in COMPRESSIONS.values():
+            taille = FICHIER_ENTETE_COMPRESSE.size
+            return version, algo, compression, taille, taille + EMPLACEMENT_CLE.size
+    return None
+
+
+def _dechiffrer_contenu(donnees: bytes, cle: bytes) -> bytes:
+    """Déchiffre le contenu produit par _chiffrer_contenu() (ou un fichier V2.0/V2.1 antérieur)"""
+    from cryptography.exceptions import InvalidTag
+    
+    try:
+        analyse = _analyser_entete(donnees)
+        if analyse is not None and analyse[0] == FICHIER_VERSION_SEGMENTE:
+            with LecteurChiffre(io.BytesIO(donnees), cle, taille_cache=1) as lecteur:
+                if len(donnees) != lecteur.taille_chiffre:
+                    raise InvalidTag("Taille incohérente")
+                return lecteur.read()
+        
+        if analyse is not None:
+            version, algo, compression, taille_entete, debut = analyse
+            entete = donnees[:taille_entete]
+            cle_donnees = cle
+            if version != FICHIER_VERSION_DIRECTE:
+                cle_donnees = _dek_depuis_emplacement(donnees[taille_entete:debut], cle)
+            try:
+                contenu = _aead(algo, cle_donnees).decrypt(donnees[debut:debut + NONCE_SIZE],
+                                                           donnees[debut + NONCE_SIZE:], entete)
+            except InvalidTag:
+                contenu = None   # Peut-être un fichier V2.0 dont le nonce commence par "TP4F"
+            if contenu is not None:
+                return contenu if compression == COMPRESSION_AUCUNE else _decompresser(contenu, compression)
+        
+        # Format V2.0: nonce + chiffré AES-GCM, sans en-tête
+        return _aead(ALGO_AES_GCM, cle).decrypt(donnees[:NONCE_SIZE], donnees[NONCE_SIZE:], None)
+    except InvalidTag:
+        raise InvalidTag("ERREUR: Le fichier a été altéré ou la clé est incorrecte!")
+
+
+def _nom_fichier_dechiffre(fichier_chiffre: str) -> str:
+    """Nom par défaut du fichier déchiffré"""
+    if fichier_chiffre.endswith('.encrypted'):
+        return fichier_chiffre[:-10]  # Enlever '.encrypted'
+    return f"{fichier_chiffre}.decrypted"
+
+
+def _lire_fichier(chemin: str) -> bytes:
+    with open(chemin, 'rb') as f:
+        return f.read()
+
+
+def _ecrire_fichier(chemin: str, contenu: bytes):
+    with open(chemin, 'wb') as f:
+        f.write(contenu)
+
+
+def chiffrer_fichier(fichier_entree: str, cle: bytes, fichier_sortie: Optional[str] = None,
+                     compression: Optional[str] = None) -> str:
+    """
+    Chiffre un fichier avec l'AEAD choisi par algorithme_prefere() (le plus
+    rapide sur l'hôte), noté dans l'en-tête
+    
+    Args:
+        fichier_entree: Chemin du fichier à chiffrer
+        cle: Clé AES-256
+        fichier_sortie: Chemin du fichier chiffré (optionnel)
+        compression: Compresser avant chiffrement ('auto', 'zlib', 'lzma', 'zstd'; défaut: non)
+        
+    Returns:
+        str: Chemin du fichier chiffré créé
+    """
+    # Nom du fichier de sortie
+    if fichier_sortie is None:
+        fichier_sortie = f"{fichier_entree}.encrypted"
+    
+    # Lire, chiffrer, écrire: en-tête + emplacement de clé + nonce (12 octets) + chiffré
+    _ecrire_fichier(fichier_sortie, _chiffrer_contenu(_lire_fichier(fichier_entree), cle, compression=compression))
+    
+    return fichier_sortie
+
+
+def dechiffrer_fichier(fichier_chiffre: str, cle: bytes, fichier_sortie: Optional[str] = None) -> str:
+    """
+    Déchiffre un fichier (AEAD lu dans l'en-tête; fichier simple ou segmenté)
+    
+    Args:
+        fichier_chiffre: Chemin du fichier chiffré
+        cle: Clé AES-256
+        fichier_sortie: Chemin du fichier déchiffré (optionnel)
+        
+    Returns:
+        str: Chemin du fichier déchiffré créé
+    """
+    # Nom du fichier de sortie
+    if fichier_sortie is None:
+        fichier_sortie = _nom_fichier_dechiffre(fichier_chiffre)
+    
+    if est_fichier_segmente(fichier_chiffre):
+        # Segment par segment, en mémoire constante; rien n'est publié avant la fin
+        import shutil
+        
+        temporaire = f"{fichier_sortie}.tmp"
+        try:
+            with LecteurChiffre(fichier_chiffre, cle, taille_cache=1) as lecteur, open(temporaire, 'wb') as sortie:
+                if os.path.getsize(fichier_chiffre) != lecteur.taille_chiffre:
+                    raise ValueError(f"{fichier_chiffre}: taille incohérente (fichier tronqué ou prolongé)")
+                shutil.copyfileobj(lecteur, sortie, lecteur.taille_segment)
+            os.replace(temporaire, fichier_sortie)
+        finally:
+            if os.path.exists(temporaire):
+                os.unlink(temporaire)
+        return fichier_sortie
+    
+    _ecrire_fichier(fichier_sortie, _dechiffrer_contenu(_lire_fichier(fichier_chiffre), cle))
+    
+    return fichier_sortie
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - FICHIERS SEGMENTÉS (ACCÈS ALÉATOIRE)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _nonce_segment(prefixe: bytes, index: int, dernier: bool) -> bytes:
+    """Nonce d'un segment: préfixe (7) + index (4) + drapeau dernier segment (1)"""
+    return prefixe + struct.pack(">IB", index, dernier)
+
+
+def _nombre_segments(taille: int, taille_segment: int) -> int:
+    """Nombre de segments (la taille des segments vient de l'en-tête: elle est validée ici)"""
+    if not 0 < taille_segment <= SEGMENT_CLAIR_MAX:
+        raise ValueError(f"Taille de segment invalide: {taille_segment} (1 à {SEGMENT_CLAIR_MAX} octets)")
+    return max(1, -(-taille // taille_segment))   # Un fichier vide a un segment vide
+
+
+def est_fichier_segmente(chemin: str) -> bool:
+    """Indique si un fichier a été produit par chiffrer_fichier_segmente()"""
+    with open(chemin, 'rb') as f:
+        analyse = _analyser_entete(f.read(FICHIER_ENTETE_SEGMENTE.size))
+    return analyse is not None and analyse[0] == FICHIER_VERSION_SEGMENTE
+
+
+def chiffrer_fichier_segmente(fichier_entree: str, cle: bytes, fichier_sortie: Optional[str] = None,
+                              taille_segment: int = SEGMENT_CLAIR_TAILLE, algo: Optional[int] = None) -> str:
+    """
+    Chiffre un fichier en segments authentifiés séparément (lecture aléatoire)
+    
+    Chaque segment de `taille_segment` octets est chiffré avec son propre
+    nonce (préfixe aléatoire + index + drapeau "dernier segment", schéma
+    STREAM): un segment ne peut être ni déplacé, ni supprimé, ni ajouté.
+    La position d'un segment se calcule depuis son index, ce qui permet de
+    n'en déchiffrer qu'une partie (voir LecteurChiffre). Le fichier est lu
+    et écrit segment par segment, en mémoire constante.
+    
+    Format: en-tête (magic, version, algorithme, taille des segments,
+            taille du clair, préfixe des nonces) + emplacement de clé
+            + segments (chiffré + tag de 16 octets).
+    
+    Args:
+        fichier_entree: Chemin du fichier à chiffrer
+        cle: Clé AES-256 (clé maître de l'enveloppe)
+        fichier_sortie: Chemin du fichier chiffré (défaut: <entrée>.encrypted)
+        taille_segment: Taille du clair par segment
+        algo: Algorithme AEAD (défaut: algorithme_prefere())
+        
+    Returns:
+        str: Chemin du fichier chiffré créé
+    """
+    if fichier_sortie is None:
+        fichier_sortie = f"{fichier_entree}.encrypted"
+    if algo is None:
+        algo = algorithme_prefere()
+    
+    with open(fichier_entree, 'rb') as entree:
+        taille = os.fstat(entree.fileno()).st_size
+        nombre = _nombre_segments(taille, taille_segment)
+        if nombre > LOT_COMPTEUR_MAX:
+            raise ValueError(f"Trop de segments ({nombre}): augmenter taille_segment")
+        
+        prefixe = secrets.token_bytes(7)
+        entete = FICHIER_ENTETE_SEGMENTE.pack(FICHIER_MAGIC, FICHIER_VERSION_SEGMENTE, algo,
+                                              taille_segment, taille, prefixe)
+        dek, emplacement = _nouvel_emplacement_cle(cle)
+        aead = _aead(algo, dek)
+        tampon = memoryview(bytearray(taille_segment))
+        
+        with open(fichier_sortie, 'wb') as sortie:
+            sortie.write(entete + emplacement)
+            
+            for index in range(nombre):
+                vue = tampon[:min(taille_segment, taille - index * taille_segment)]
+                lus = 0
+                while lus < len(vue):
+                    n = entree.readinto(vue[lus:])
+                    if not n:
+                        raise ValueError(f"{fichier_entree}: fichier modifié pendant le chiffrement")
+                    lus += n
+                sortie.write(aead.encrypt(_nonce_segment(prefixe, index, index == nombre - 1), vue, entete))
+        
+        if entree.read(1):
+            raise ValueError(f"{fichier_entree}: fichier modifié pendant le chiffrement")
+    
+    return fichier_sortie
+
+
+class LecteurChiffre(io.RawIOBase):
+    """
+    Lecture aléatoire d'un fichier chiffré par chiffrer_fichier_segmente()
+    
+    Interface fichier standard (seek/tell/read/readinto): seuls les segments
+    couvrant la plage demandée sont lus, authentifiés et déchiffrés. Les
+    derniers segments déchiffrés sont gardés dans un petit cache LRU.
+    
+    Exemple:
+        with LecteurChiffre("archive.bin.encrypted", cle) as f:
+            f.seek(10 * 1024 ** 3)
+            bloc = f.read(4096)
+    
+    Args:
+        fichier: Chemin ou fichier binaire ouvert (seekable)
+        cle: Clé maître
+        taille_cache: Nombre de segments déchiffrés gardés en mémoire
+    """
+    
+    def __init__(self, fichier, cle: bytes, taille_cache: int = SEGMENTS_CACHE_TAILLE):
+        super().__init__()
+        self._proprietaire = isinstance(fichier, (str, os.PathLike))
+        self._fichier = open(fichier, 'rb') if self._proprietaire else fichier
+        
+        try:
+            self._fichier.seek(0)
+            entete = self._fichier.read(FICHIER_ENTETE_SEGMENTE.size + EMPLACEMENT_CLE.size)
+            analyse = _analyser_entete(entete)
+            if analyse is None or analyse[0] != FICHIER_VERSION_SEGMENTE \
+                    or len(entete) < FICHIER_ENTETE_SEGMENTE.size + EMPLACEMENT_CLE.size:
+                raise ValueError("Fichier non segmenté: utiliser chiffrer_fichier_segmente()")
+            
+            _, _, algo, self.taille_segment, self.taille, self._prefixe = FICHIER_ENTETE_SEGMENTE.unpack_from(entete)
+            self._nombre = _nombre_segments(self.taille, self.taille_segment)
+            if self._nombre > LOT_COMPTEUR_MAX:
+                raise ValueError(f"En-tête invalide: {self._nombre} segments")
+            self._entete = entete[:FICHIER_ENTETE_SEGMENTE.size]
+            self._aead = _aead(algo, _dek_depuis_emplacement(entete[FICHIER_ENTETE_SEGMENTE.size:], cle))
+        except Exception:
+            if self._proprietaire:
+                self._fichier.close()
+            raise
+        
+        self._debut = len(entete)
+        self.taille_chiffre = self._debut + self._nombre * TAG_SIZE + self.taille
+        self._cache = CacheLRU(taille_cache)
+        self._position = 0
+    
+    def _segment(self, index: int) -> bytes:
+        """Retourne le clair d'un segment (authentifié)"""
+        from cryptography.exceptions import InvalidTag
+        
+        segment = self._cache.get(index)
+        if segment is None:
+            longueur = min(self.taille_segment, self.taille - index * self.taille_segment)
+            self._fichier.seek(self._debut + index * (self.taille_segment + TAG_SIZE))
+            chiffre = self._fichier.read(longueur + TAG_SIZE)
+            try:
+                segment = self._aead.decrypt(_nonce_segment(self._prefixe, index, index == self._nombre - 1),
+                                             chiffre, self._entete)
+            except InvalidTag:
+                raise InvalidTag(f"ERREUR: Le segment {index} a été altéré ou la clé est incorrecte!")
+            self._cache.put(index, segment)
+        return segment
+    
+    def verifier(self):
+        """Authentifie tous les segments sans rien garder en mémoire"""
+        for index in range(self._nombre):
+            if index not in self._cache:
+                self._segment(index)
+                self._cache.pop(index)
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def seek(self, position: int, depuis: int = io.SEEK_SET) -> int:
+        if depuis == io.SEEK_CUR:
+            position += self._position
+        elif depuis == io.SEEK_END:
+            position += self.taille
+        if position < 0:
+            raise ValueError(f"Position négative: {position}")
+        self._position = position
+        return position
+    
+    def readinto(self, tampon) -> int:
+        vue = memoryview(tampon).cast('B')
+        lus = 0
+        
+        while lus < len(vue) and self._position < self.taille:
+            index, decalage = divmod(self._position, self.taille_segment)
+            segment = self._segment(index)
+            n = min(len(vue) - lus, len(segment) - decalage)
+            vue[lus:lus + n] = segment[decalage:decalage + n]
+            lus += n
+            self._position += n
+        
+        return lus
+    
+    def close(self):
+        if not self.closed:
+            self._cache.vider()
+            if self._proprietaire:
+                self._fichier.close()
+        super().close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - PIPELINE ASYNCIO
+# ═══════════════════════════════════════════════════════════════════════════
+
+async def _traiter_fichier_async(fichier: str, cle: bytes, dechiffrer: bool,
+                                 semaphore: "asyncio.Semaphore", executeur_io, executeur_crypto,
+                                 compression: Optional[str] = None) -> str:
+    """Lecture, (dé)chiffrement et écriture d'un fichier, chaque étape dans un exécuteur"""
+    import asyncio
+    
+    loop = asyncio.get_running_loop()
+    
+    async with semaphore:
+        contenu = await loop.run_in_executor(executeur_io, _lire_fichier, fichier)
+        
+        if dechiffrer:
+            resultat = await loop.run_in_executor(executeur_crypto, _dechiffrer_contenu, contenu, cle)
+            sortie = _nom_fichier_dechiffre(fichier)
+        else:
+            resultat = await loop.run_in_executor(executeur_crypto, _chiffrer_contenu, contenu, cle,
+                                                  None, compression)
+            sortie = f"{fichier}.encrypted"
+        del contenu
+        
+        await loop.run_in_executor(executeur_io, _ecrire_fichier, sortie, resultat)
+        return sortie
+
+
+def lancer_pipeline_fichiers(fichiers: Iterable[str], cle: bytes, dechiffrer: bool = False,
+                             concurrence: int = 8, executeur_io=None, executeur_crypto=None,
+                             compression: Optional[str] = None) -> Dict[str, "asyncio.Task"]:
+    """
+    Lance le (dé)chiffrement concurrent de plusieurs fichiers
+    
+    Doit être appelée depuis une boucle asyncio en cours. Au plus
+    `concurrence` fichiers sont en mémoire en même temps; pendant qu'un
+    fichier est chiffré, d'autres sont lus ou écrits, ce qui recouvre les
+    attentes disque/réseau.
+    
+    Args:
+        fichiers: Chemins des fichiers à traiter
+        cle: Clé AES-256
+        dechiffrer: True pour déchiffrer au lieu de chiffrer
+        concurrence: Nombre maximum de fichiers en cours de traitement
+        executeur_io: Exécuteur des lectures/écritures (défaut: celui de la boucle)
+        executeur_crypto: Exécuteur du chiffrement (défaut: celui de la boucle)
+        compression: Compresser avant chiffrement (voir chiffrer_fichier())
+        
+    Returns:
+        Dict[str, asyncio.Task]: Une tâche par fichier (résultat = fichier produit)
+    """
+    import asyncio
+    
+    if len(cle) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    
+    semaphore = asyncio.Semaphore(concurrence)
+    return {
+        fichier: asyncio.ensure_future(
+            _traiter_fichier_async(fichier, cle, dechiffrer, semaphore, executeur_io, executeur_crypto, compression)
+        )
+        for fichier in fichiers
+    }
+
+
+async def traiter_fichiers_async(fichiers: Iterable[str], cle: bytes, dechiffrer: bool = False,
+                                 concurrence: int = 8, compression: Optional[str] = None) -> Dict[str, object]:
+    """
+    Traite tous les fichiers et attend la fin du pipeline
+    
+    Returns:
+        Dict[str, object]: fichier -> fichier produit, ou l'exception levée
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    
+    with ThreadPoolExecutor(max_workers=concurrence) as executeur_io, \
+            ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executeur_crypto:
+        taches = lancer_pipeline_fichiers(fichiers, cle, dechiffrer, concurrence, executeur_io, executeur_crypto,
+                                          compression)
+        resultats = await asyncio.gather(*taches.values(), return_exceptions=True)
+    
+    return dict(zip(taches.keys(), resultats))
+
+
+def traiter_fichiers(fichiers: Iterable[str], cle: bytes, dechiffrer: bool = False,
+                     concurrence: int = 8, compression: Optional[str] = None) -> Dict[str, object]:
+    """Version synchrone de traiter_fichiers_async() (pour les scripts)"""
+    import asyncio
+    return asyncio.run(traiter_fichiers_async(fichiers, cle, dechiffrer, concurrence, compression))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - CHIFFREMENT DE RÉPERTOIRE
+# ═══════════════════════════════════════════════════════════════════════════
+
+MANIFESTE_NOM = ".manifeste.jsonl"
+
+
+def _parcourir_arborescence(racine: str):
+    """Génère (chemin, stat) pour chaque fichier de l'arborescence, sans tout lister en mémoire"""
+    a_visiter = [racine]
+    while a_visiter:
+        dossier = a_visiter.pop()
+        with os.scandir(dossier) as entrees:
+            for entree in entrees:
+                if entree.is_dir(follow_symlinks=False):
+                    a_visiter.append(entree.path)
+                elif entree.is_file(follow_symlinks=False):
+                    yield entree.path, entree.stat(follow_symlinks=False)
+
+
+def _charger_manifeste(chemin: Path) -> Dict[str, Tuple[int, int]]:
+    """Lit le manifeste (une ligne JSON par fichier terminé; la dernière ligne l'emporte)"""
+    termines = {}
+    if chemin.exists():
+        with open(chemin, 'r', encoding='utf-8') as f:
+            for ligne in f:
+                try:
+                    entree = json.loads(ligne)
+                except ValueError:
+                    continue   # Dernière ligne tronquée par une interruption
+                termines[entree['chemin']] = (entree['taille'], entree['mtime'])
+    return termines
+
+
+def chiffrer_repertoire(racine: str, cle: bytes, destination: Optional[str] = None,
+                        workers: Optional[int] = None, afficher: bool = True,
+                        compression: Optional[str] = None) -> dict:
+    """
+    Chiffre récursivement un répertoire, avec reprise après interruption
+    
+    L'arborescence est recréée sous `destination` (fichiers suffixés par
+    .encrypted). Chaque fichier terminé est ajouté au manifeste
+    destination/.manifeste.jsonl avec sa taille et sa date de modification:
+    une nouvelle exécution ignore les fichiers inchangés et ne refait que
+    les fichiers nouveaux, modifiés ou non terminés.
+    
+    Args:
+        racine: Répertoire à chiffrer
+        cle: Clé AES-256
+        destination: Répertoire de sortie (défaut: <racine>.encrypted)
+        workers: Nombre de threads (défaut: nombre de cœurs)
+        afficher: Afficher la progression et le débit
+        compression: Compresser avant chiffrement (voir chiffrer_fichier())
+        
+    Returns:
+        dict: Statistiques (fichiers, ignores, echecs, octets, duree, debit_mo_s, fichiers_s)
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    
+    if len(cle) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    
+    racine = os.path.abspath(racine)
+    destination = Path(os.path.abspath(destination or f"{racine}.encrypted"))
+    destination.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    
+    chemin_manifeste = destination / MANIFESTE_NOM
+    termines = _charger_manifeste(chemin_manifeste)
+    
+    stats = {'fichiers': 0, 'ignores': 0, 'echecs': [], 'octets': 0}
+    debut = time.perf_counter()
+    prochain_affichage = 1000
+    
+    def traiter(source: str, relatif: str):
+        sortie = destination / f"{relatif}.encrypted"
+        sortie.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = f"{sortie}.tmp"
+        chiffrer_fichier(source, cle, temporaire, compression)
+        os.replace(temporaire, sortie)   # Jamais de fichier chiffré à moitié écrit
+    
+    with open(chemin_manifeste, 'a', encoding='utf-8') as manifeste, \
+            ThreadPoolExecutor(max_workers=workers) as executeur:
+        en_cours = {}
+        
+        def recolter(bloquant: bool):
+            faits, _ = wait(en_cours, timeout=None if bloquant else 0, return_when=FIRST_COMPLETED)
+            for future in faits:
+                relatif, taille, mtime = en_cours.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    stats['echecs'].append((relatif, str(e)))
+                    continue
+                manifeste.write(json.dumps({'chemin': relatif, 'taille': taille, 'mtime': mtime}) + "\n")
+                stats['fichiers'] += 1
+                stats['octets'] += taille
+            manifeste.flush()
+        
+        for source, info in _parcourir_arborescence(racine):
+            relatif = os.path.relpath(source, racine)
+            if source.startswith(str(destination) + os.sep):
+                continue
+            
+            if termines.get(relatif) == (info.st_size, info.st_mtime_ns) \
+                    and (destination / f"{relatif}.encrypted").exists():
+                stats['ignores'] += 1
+                continue
+            
+            # File d'attente bornée: des millions de fichiers sans des millions de futures
+            while len(en_cours) >= workers * 4:
+                recolter(bloquant=True)
+            
+            future = executeur.submit(traiter, source, relatif)
+            en_cours[future] = (relatif, info.st_size, info.st_mtime_ns)
+            
+            recolter(bloquant=False)
+            
+            if afficher and stats['fichiers'] >= prochain_affichage:
+                prochain_affichage += 1000
+                duree = time.perf_counter() - debut
+                print(f"   ⚙️  {stats['fichiers']} fichiers, {stats['octets'] / duree / 1e6:.1f} Mo/s")
+        
+        while en_cours:
+            recolter(bloquant=True)
+    
+    duree = time.perf_counter() - debut
+    stats['duree'] = duree
+    stats['debit_mo_s'] = stats['octets'] / duree / 1e6 if duree > 0 else 0.0
+    stats['fichiers_s'] = stats['fichiers'] / duree if duree > 0 else 0.0
+    
+    if afficher:
+        print(f"\n✅ {stats['fichiers']} fichier(s) chiffré(s), {stats['ignores']} inchangé(s) ignoré(s)")
+        print(f"   ⏱️  {duree:.2f} s - {stats['debit_mo_s']:.1f} Mo/s - {stats['fichiers_s']:.0f} fichiers/s")
+        for relatif, erreur in stats['echecs']:
+            print(f"   ❌ {relatif}: {erreur}")
+    
+    return stats
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - AUDIT D'INTÉGRITÉ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _verifier_aead(f, algo: int, cle: bytes, nonce: bytes, aad: Optional[bytes], debut: int, fin: int) -> bool:
+    """
+    Vérifie le tag du chiffré f[debut:fin] sans conserver le clair
+    
+    AES-GCM est vérifié en flux, par blocs d'AUDIT_BLOC_TAILLE octets;
+    ChaCha20-Poly1305 n'a pas d'interface en flux: le chiffré est lu en entier.
+    """
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    
+    if fin - debut < TAG_SIZE or len(nonce) != NONCE_SIZE:
+        return False
+    
+    if algo != ALGO_AES_GCM:
+        f.seek(debut)
+        try:
+            _aead(algo, cle).decrypt(nonce, f.read(fin - debut), aad)
+            return True
+        except InvalidTag:
+            return False
+    
+    f.seek(fin - TAG_SIZE)
+    dechiffreur = Cipher(algorithms.AES(cle), modes.GCM(nonce, f.read(TAG_SIZE))).decryptor()
+    if aad:
+        dechiffreur.authenticate_additional_data(aad)
+    
+    entree = memoryview(bytearray(AUDIT_BLOC_TAILLE))
+    sortie = bytearray(AUDIT_BLOC_TAILLE + 15)
+    f.seek(debut)
+    restant = fin - TAG_SIZE - debut
+    
+    while restant > 0:
+        n = f.readinto(entree[:min(restant, AUDIT_BLOC_TAILLE)])
+        if not n:
+            return False
+        dechiffreur.update_into(entree[:n], sortie)
+        restant -= n
+    
+    try:
+        dechiffreur.finalize()
+        return True
+    except InvalidTag:
+        return False
+
+
+def verifier_fichier(chemin: str, cle: bytes):
+    """
+    Vérifie l'intégrité d'un fichier chiffré sans écrire le clair
+    
+    Tous les formats sont acceptés (V2.0, en-tête v2 à v5).
+    
+    Raises:
+        InvalidTag: Fichier altéré ou clé incorrecte
+    """
+    from cryptography.exceptions import InvalidTag
+    
+    with open(chemin, 'rb') as f:
+        taille = os.fstat(f.fileno()).st_size
+        entete = f.read(FICHIER_ENTETE_SEGMENTE.size + EMPLACEMENT_CLE.size)
+        analyse = _analyser_entete(entete)
+        
+        try:
+            if analyse is not None and analyse[0] == FICHIER_VERSION_SEGMENTE:
+                with LecteurChiffre(f, cle, taille_cache=1) as lecteur:
+                    if taille != lecteur.taille_chiffre:
+                        raise InvalidTag("Taille incohérente")
+                    lecteur.verifier()
+                return
+            
+            if analyse is not None:
+                version, algo, _, taille_entete, debut = analyse
+                cle_donnees = cle
+                if version != FICHIER_VERSION_DIRECTE:
+                    cle_donnees = _dek_depuis_emplacement(entete[taille_entete:debut], cle)
+                if _verifier_aead(f, algo, cle_donnees, entete[debut:debut + NONCE_SIZE], entete[:taille_entete],
+                                  debut + NONCE_SIZE, taille):
+                    return
+            
+            # Format V2.0: nonce + chiffré AES-GCM, sans en-tête
+            if _verifier_aead(f, ALGO_AES_GCM, cle, entete[:NONCE_SIZE], None, NONCE_SIZE, taille):
+                return
+        except (InvalidTag, ValueError):
+            pass
+    
+    raise InvalidTag("ERREUR: Le fichier a été altéré ou la clé est incorrecte!")
+
+
+def auditer_repertoire(racine: str, cle: bytes, motif: str = "*.encrypted",
+                       workers: Optional[int] = None, afficher: bool = True) -> dict:
+    """
+    Vérifie les tags de tous les fichiers chiffrés d'une arborescence
+    
+    Rien n'est écrit sur disque. Les fichiers sont vérifiés en parallèle,
+    avec un nombre borné de fichiers en cours et des blocs de taille fixe:
+    la mémoire ne dépend ni du nombre ni de la taille des fichiers (sauf
+    ChaCha20-Poly1305, vérifié fichier par fichier en entier).
+    
+    Args:
+        racine: Répertoire (ou fichier) à auditer
+        cle: Clé AES-256
+        motif: Motif des noms de fichiers à vérifier (fnmatch)
+        workers: Nombre de threads (défaut: nombre de cœurs)
+        afficher: Afficher la progression et le résumé
+        
+    Returns:
+        dict: Statistiques (fichiers, octets, echecs, duree, debit_mo_s)
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    from fnmatch import fnmatch
+    
+    racine = os.path.abspath(racine)
+    workers = workers or os.cpu_count() or 1
+    
+    if os.path.isfile(racine):
+        fichiers = ((racine, os.stat(racine)),)
+        racine = os.path.dirname(racine)
+    else:
+        fichiers = _parcourir_arborescence(racine)
+    
+    stats = {'fichiers': 0, 'octets': 0, 'echecs': []}
+    debut = time.perf_counter()
+    prochain_affichage = 1000
+    
+    with ThreadPoolExecutor(max_workers=workers) as executeur:
+        en_cours = {}
+        
+        def recolter(bloquant: bool):
+            faits, _ = wait(en_cours, timeout=None if bloquant else 0, return_when=FIRST_COMPLETED)
+            for future in faits:
+                relatif, taille = en_cours.pop(future)
+                stats['fichiers'] += 1
+                stats['octets'] += taille
+                try:
+                    future.result()
+                except Exception as e:
+                    stats['echecs'].append((relatif, str(e)))
+        
+        for chemin, info in fichiers:
+            if not fnmatch(os.path.basename(chemin), motif):
+                continue
+            
+            while len(en_cours) >= workers * 2:
+                recolter(bloquant=True)
+            
+            en_cours[executeur.submit(verifier_fichier, chemin, cle)] = (os.path.relpath(chemin, racine), info.st_size)
+            recolter(bloquant=False)
+            
+            if afficher and stats['fichiers'] >= prochain_affichage:
+                prochain_affichage += 1000
+                duree = time.perf_counter() - debut
+                print(f"   ⚙️  {stats['fichiers']} fichiers, {stats['octets'] / duree / 1e6:.1f} Mo/s")
+        
+        while en_cours:
+            recolter(bloquant=True)
+    
+    duree = time.perf_counter() - debut
+    stats['duree'] = duree
+    stats['debit_mo_s'] = stats['octets'] / duree / 1e6 if duree > 0 else 0.0
+    
+    if afficher:
+        symbole = "✅" if not stats['echecs'] else "❌"
+        print(f"\n{symbole} {stats['fichiers']} fichier(s) vérifié(s), {len(stats['echecs'])} en échec")
+        print(f"   ⏱️  {duree:.2f} s - {stats['debit_mo_s']:.1f} Mo/s")
+        for relatif, erreur in sorted(stats['echecs']):
+            print(f"   ❌ {relatif}: {erreur}")
+    
+    return stats
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - CATALOGUE DE MÉTADONNÉES
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Catalogue:
+    """
+    Catalogue SQLite des métadonnées (nom, date, taille) des messages et des clés
+    
+    Il est mis à jour à chaque sauvegarde: les listes n'ont plus besoin de
+    parcourir les dossiers ni de lire les chiffrés. Les colonnes de tri sont
+    indexées, ce qui permet pagination, tri et filtrage en quelques
+    millisecondes même avec des millions d'entrées.
+    """
+    
+    TRIS = {'date': 'timestamp', 'nom': 'nom', 'taille': 'taille'}
+    GENERATION = 'messages_generation'   # Fin du journal du magasin lors de la dernière mise à jour
+    
+    def __init__(self, chemin: Path = CATALOGUE_DB):
+        self.chemin = Path(chemin)
+        self._verrou = threading.Lock()
+        self._connexion = None
+    
+    def _ouvrir(self, creer: bool = True):
+        """
+        Connexion SQLite, ouverte au premier besoin (appelé sous le verrou)
+        
+        Une lecture (creer=False) ne crée pas la base: None si elle n'existe pas encore.
+        """
+        if self._connexion is None:
+            if not creer and not self.chemin.exists():
+                return None
+            import sqlite3
+            
+            self._connexion = sqlite3.connect(str(self.chemin), check_same_thread=False)
+            self._connexion.executescript("""
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+                CREATE TABLE IF NOT EXISTS messages (
+                    nom TEXT PRIMARY KEY,
+                    timestamp REAL NOT NULL,
+                    taille INTEGER NOT NULL,
+                    segment INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS messages_timestamp ON messages(timestamp);
+                CREATE INDEX IF NOT EXISTS messages_taille ON messages(taille);
+                CREATE TABLE IF NOT EXISTS cles (
+                    nom TEXT PRIMARY KEY,
+                    timestamp REAL NOT NULL,
+                    taille INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS cles_timestamp ON cles(timestamp);
+                CREATE INDEX IF NOT EXISTS cles_taille ON cles(taille);
+                CREATE TABLE IF NOT EXISTS meta (
+                    cle TEXT PRIMARY KEY,
+                    valeur TEXT
+                );
+            """)
+        return self._connexion
+    
+    def _executer(self, requete: str, parametres=(), generation: Optional[str] = None):
+        with self._verrou, self._ouvrir() as connexion:
+            connexion.execute(requete, parametres)
+            if generation is not None:
+                connexion.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (self.GENERATION, generation))
+    
+    def enregistrer_message(self, nom: str, timestamp: float, taille: int, segment: int,
+                            generation: Optional[str] = None):
+        self._executer("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)",
+                       (nom, timestamp, taille, segment), generation)
+    
+    def supprimer_message(self, nom: str, generation: Optional[str] = None):
+        self._executer("DELETE FROM messages WHERE nom = ?", (nom,), generation)
+    
+    def enregistrer_cle(self, nom: str, timestamp: float, taille: int):
+        self._executer("INSERT OR REPLACE INTO cles VALUES (?, ?, ?)", (nom, timestamp, taille))
+    
+    def remplacer_messages(self, lignes: Iterable[Tuple[str, float, int, int]], generation: Optional[str] = None):
+        """Remplace tout le contenu de la table messages (resynchronisation, compaction)"""
+        with self._verrou, self._ouvrir() as connexion:
+            connexion.execute("DELETE FROM messages")
+            connexion.executemany("INSERT INTO messages VALUES (?, ?, ?, ?)", lignes)
+            if generation is not None:
+                connexion.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (self.GENERATION, generation))
+    
+    def deplacer_messages(self, segments: Iterable[Tuple[int, str]], generation: Optional[str] = None):
+        """Met à jour le segment de chaque message après une compaction"""
+        with self._verrou, self._ouvrir() as connexion:
+            connexion.executemany("UPDATE messages SET segment = ? WHERE nom = ?", segments)
+            if generation is not None:
+                connexion.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (self.GENERATION, generation))
+    
+    def compter(self, table: str, prefixe: Optional[str] = None) -> int:
+        """Nombre d'entrées d'une table ('messages' ou 'cles')"""
+        where, parametres = self._filtres(prefixe, None, None)
+        with self._verrou:
+            connexion = self._ouvrir(creer=False)
+            if connexion is None:
+                return 0
+            return connexion.execute(f"SELECT COUNT(*) FROM {table}{where}", parametres).fetchone()[0]
+    
+    @staticmethod
+    def _filtres(prefixe: Optional[str], depuis: Optional[float], jusqu_a: Optional[float]):
+        conditions = []
+        parametres = []
+        if prefixe:
+            # Intervalle sur la clé primaire: utilise l'index (contrairement à LIKE)
+            conditions.append("nom >= ? AND nom < ?")
+            parametres += [prefixe, prefixe + "\U0010ffff"]
+        if depuis is not None:
+            conditions.append("timestamp >= ?")
+            parametres.append(depuis)
+        if jusqu_a is not None:
+            conditions.append("timestamp < ?")
+            parametres.append(jusqu_a)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, parametres
+    
+    def lister(self, table: str, limite: Optional[int] = None, decalage: int = 0,
+               tri: str = 'date', decroissant: bool = False, prefixe: Optional[str] = None,
+               depuis: Optional[float] = None, jusqu_a: Optional[float] = None) -> List[tuple]:
+        """
+        Liste paginée, triée et filtrée
+        
+        Args:
+            table: 'messages' ou 'cles'
+            limite: Nombre maximum de lignes (None = toutes)
+            decalage: Nombre de lignes à sauter (pagination)
+            tri: 'date', 'nom' ou 'taille'
+            decroissant: Ordre décroissant
+            prefixe: Ne garder que les noms commençant par ce préfixe
+            depuis, jusqu_a: Intervalle de dates (timestamps)
+            
+        Returns:
+            List[tuple]: Lignes de la table
+        """
+        if tri not in self.TRIS:
+            raise ValueError(f"Tri inconnu: {tri} (choix: {', '.join(self.TRIS)})")
+        
+        where, parametres = self._filtres(prefixe, depuis, jusqu_a)
+        sens = "DESC" if decroissant else "ASC"
+        requete = f"SELECT * FROM {table}{where} ORDER BY {self.TRIS[tri]} {sens}, nom {sens} LIMIT ? OFFSET ?"
+        parametres += [limite if limite is not None else -1, decalage]
+        
+        with self._verrou:
+            connexion = self._ouvrir(creer=False)
+            if connexion is None:
+                return []
+            return connexion.execute(requete, parametres).fetchall()
+    
+    def meta(self, cle: str) -> Optional[str]:
+        with self._verrou:
+            connexion = self._ouvrir(creer=False)
+            if connexion is None:
+                return None
+            ligne = connexion.execute("SELECT valeur FROM meta WHERE cle = ?", (cle,)).fetchone()
+        return ligne[0] if ligne else None
+    
+    def definir_meta(self, cle: str, valeur: str):
+        self._executer("INSERT OR REPLACE INTO meta VALUES (?, ?)", (cle, valeur))
+    
+    def fermer(self):
+        with self._verrou:
+            if self._connexion is not None:
+                self._connexion.close()
+                self._connexion = None
+
+
+_catalogue = None
+
+
+def catalogue_metadonnees() -> Catalogue:
+    """Retourne le catalogue par défaut (ouvert au premier appel)"""
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = Catalogue(CATALOGUE_DB)
+        if _catalogue.meta('cles_importees') is None and KEYS_DIR.exists():
+            _importer_cles_fichiers(_catalogue)
+    return _catalogue
+
+
+def _importer_cles_fichiers(catalogue: Catalogue):
+    """Référence une seule fois dans le catalogue les clés .key existantes"""
+    for f in KEYS_DIR.glob("*.key"):
+        try:
+            with open(f, 'r') as file:
+                data = json.load(file)
+            catalogue.enregistrer_cle(data['nom'], data['timestamp'], data['taille'])
+        except (OSError, ValueError, KeyError):
+            pass
+    catalogue.definir_meta('cles_importees', '1')
+
+
+def _formater_date(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.0 - SAUVEGARDE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _encoder_champs(champs: Dict[int, bytes]) -> bytes:
+    """Encode des champs binaires en TLV (tag 1 octet, longueur 4 octets, valeur)"""
+    morceaux = []
+    for tag, valeur in champs.items():
+        morceaux.append(struct.pack(">BI", tag, len(valeur)))
+        morceaux.append(valeur)
+    return b"".join(morceaux)
+
+
+def _decoder_champs(vue: memoryview) -> Dict[int, bytes]:
+    """Décode les champs TLV produits par _encoder_champs()"""
+    champs = {}
+    position = 0
+    while position < len(vue):
+        tag, longueur = struct.unpack_from(">BI", vue, position)
+        position += 5
+        champs[tag] = bytes(vue[position:position + longueur])
+        position += longueur
+    return champs
+
+
+class MagasinMessages:
+    """
+    Magasin de messages chiffrés structuré en journal (log-structured)
+    
+    Chaque sauvegarde ajoute un enregistrement binaire préfixé par sa longueur
+    à la fin du segment actif (aucun base64, aucun fichier par message).
+    Un index en mémoire associe chaque nom à (segment, position, longueur):
+    le chargement est un seek + une lecture. Les anciennes versions et les
+    messages supprimés sont éliminés par compacter().
+    
+    Enregistrement:
+        longueur (4) | crc32 (4) | type (1) | timestamp (8) | len(nom) (2) | nom | champs TLV
+    """
+    
+    def __init__(self, dossier: Path = SAVE_DIR, taille_segment: int = SEGMENT_TAILLE_MAX,
+                 catalogue: Optional[Catalogue] = None):
+        self.dossier = Path(dossier)
+        self.taille_segment = taille_segment
+        self.catalogue = catalogue
+        self.index = {}          # nom -> (segment, position, longueur, timestamp)
+        self._lecteurs = {}      # segment -> fichier ouvert en lecture
+        self._verrou = threading.RLock()
+        self._ecriture = None
+        
+        self._segments = sorted(self._numero(f) for f in self.dossier.glob("segment_*.log"))
+        
+        for segment in self._segments:
+            self._indexer_segment(segment, dernier=segment == self._segments[-1])
+        
+        self._actif = self._segments[-1] if self._segments else 1
+        if not self._segments:
+            self._segments.append(self._actif)
+        
+        # Sans magasin ni catalogue sur disque, rien à resynchroniser (et rien à créer)
+        if self.catalogue is not None and (self.index or self.catalogue.chemin.exists()) \
+                and self.catalogue.meta(Catalogue.GENERATION) != self._generation():
+            self._resynchroniser_catalogue()
+    
+    def _generation(self, segment: Optional[int] = None, fin: Optional[int] = None) -> str:
+        """
+        Génération du journal: segment actif et position de fin
+        
+        Le journal ne fait que grandir (ou changer de segments à la
+        compaction): toute écriture que le catalogue n'a pas vue, ou un
+        catalogue restauré depuis une sauvegarde, change la génération.
+        """
+        if segment is None:
+            segment = self._actif
+            chemin = self._chemin(segment)
+            fin = chemin.stat().st_size if chemin.exists() else 0
+        return f"{segment}:{fin}"
+    
+    def _resynchroniser_catalogue(self):
+        """Reconstruit la table des messages du catalogue depuis l'index (sans lire les enregistrements)"""
+        lignes = [(nom, timestamp, longueur, segment)
+                  for nom, (segment, _, longueur, timestamp) in self.index.items()]
+        self.catalogue.remplacer_messages(lignes, self._generation())
+    
+    @staticmethod
+    def _numero(fichier: Path) -> int:
+        return int(fichier.stem.split('_')[1])
+    
+    def _chemin(self, segment: int) -> Path:
+        return self.dossier / f"segment_{segment:06d}.log"
+    
+    @staticmethod
+    def _enregistrement(vue: memoryview, position: int) -> Optional[Tuple[int, float, str, int]]:
+        """
+        Décode l'en-tête de l'enregistrement situé à `position`
+        
+        Returns:
+            Optional[Tuple]: (type, timestamp, nom, longueur totale), ou None
+                si l'enregistrement est incomplet ou si son CRC est faux
+        """
+        if position + ENREG_ENTETE.size > len(vue):
+            return None
+        longueur, crc, type_enreg, timestamp, taille_nom = ENREG_ENTETE.unpack_from(vue, position)
+        debut_nom, fin = position + ENREG_ENTETE.size, position + 8 + longueur
+        if fin > len(vue) or debut_nom + taille_nom > fin or zlib.crc32(vue[position + 8:fin]) != crc:
+            return None
+        try:
+            nom = bytes(vue[debut_nom:debut_nom + taille_nom]).decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+        return type_enreg, timestamp, nom, fin - position
+    
+    def _indexer_segment(self, segment: int, dernier: bool = False):
+        """
+        Reconstruit l'index depuis un segment (CRC vérifié pour chaque enregistrement)
+        
+        Seule une fin d'écriture interrompue est tronquée: dans le dernier
+        segment, et si aucun enregistrement valide ne suit. Toute autre
+        corruption lève une ValueError sans rien modifier sur disque.
+        """
+        chemin = self._chemin(segment)
+        with open(chemin, 'rb') as f:
+            vue = memoryview(f.read())
+        position = 0
+        
+        while position < len(vue):
+            enreg = self._enregistrement(vue, position)
+            if enreg is None:
+                break
+            type_enreg, timestamp, nom, total = enreg
+            if type_enreg == ENREG_SUPPRESSION:
+                self.index.pop(nom, None)
+            else:
+                self.index[nom] = (segment, position, total, timestamp)
+            position += total
+        
+        if position < len(vue):
+            suite = next((p for p in range(position + 1, len(vue) - ENREG_ENTETE.size + 1)
+                          if self._enregistrement(vue, p) is not None), None)
+            if not dernier or suite is not None:
+                raise ValueError(f"Segment {chemin} corrompu à la position {position} "
+                                 f"(enregistrements valides au-delà): aucune modification effectuée")
+            # Écriture interrompue: tronquer la fin pour repartir sur une base saine
+            with open(chemin, 'r+b') as f:
+                f.truncate(position)
+    
+    def _ajouter(self, type_enreg: int, nom: str, timestamp: float, champs: Dict[int, bytes]) -> Tuple[int, int, int]:
+        """Ajoute un enregistrement au segment actif et retourne (segment, position, longueur)"""
+        nom_octets = nom.encode('utf-8')
+        corps = struct.pack(">BdH", type_enreg, timestamp, len(nom_octets)) + nom_octets + _encoder_champs(champs)
+        enreg = struct.pack(">II", len(corps), zlib.crc32(corps)) + corps
+        
+        with self._verrou:
+            if self._ecriture is None:
+                self.dossier.mkdir(parents=True, exist_ok=True)   # Créé à la première écriture seulement
+                self._ecriture = open(self._chemin(self._actif), 'ab')
+            
+            position = self._ecriture.tell()
+            if position > 0 and position + len(enreg) > self.taille_segment:
+                self._rotation()
+                position = 0
+            
+            self._ecriture.write(enreg)
+            self._ecriture.flush()
+            return self._actif, position, len(enreg)
+    
+    def _rotation(self):
+        """Ferme le segment actif et en ouvre un nouveau"""
+        self._ecriture.close()
+        self._actif += 1
+        self._segments.append(self._actif)
+        self._ecriture = open(self._chemin(self._actif), 'ab')
+    
+    def _lire(self, segment: int, position: int, longueur: int) -> memoryview:
+        """Lit un enregistrement complet et vérifie son CRC"""
+        with self._verrou:
+            lecteur = self._lecteurs.get(segment)
+            if lecteur is None:
+                lecteur = self._lecteurs[segment] = open(self._chemin(segment), 'rb')
+            lecteur.seek(position)
+            enreg = memoryview(lecteur.read(longueur))
+        
+        if len(enreg) != longueur or zlib.crc32(enreg[8:]) != struct.unpack_from(">I", enreg, 4)[0]:
+            raise ValueError(f"Enregistrement corrompu (segment {segment}, position {position})")
+        return enreg
+    
+    def sauvegarder(self, nom: str, donnees_chiffrees: dict, cle: Optional[bytes] = None,
+                    timestamp: Optional[float] = None) -> str:
+        """Ajoute (ou remplace) un message chiffré"""
+        champs = {
+            CHAMP_CHIFFRE: donnees_chiffrees['chiffre'],
+            CHAMP_NONCE: donnees_chiffrees['nonce'],
+        }
+        if donnees_chiffrees.get('aad'):
+            champs[CHAMP_AAD] = donnees_chiffrees['aad'].encode('utf-8')
+        if cle is not None:
+            champs[CHAMP_CLE] = cle
+        champs[CHAMP_ALGO] = bytes([donnees_chiffrees.get('algo') or ALGO_AES_GCM])
+        if donnees_chiffrees.get('dek') is not None:
+            champs[CHAMP_DEK] = donnees_chiffrees['dek']
+            champs[CHAMP_KEK] = donnees_chiffrees['kek']
+        
+        if timestamp is None:
+            timestamp = time.time()
+        segment, position, longueur = self._ajouter(ENREG_MESSAGE, nom, timestamp, champs)
+        self.index[nom] = (segment, position, longueur, timestamp)
+        
+        if self.catalogue is not None:
+            self.catalogue.enregistrer_message(nom, timestamp, longueur, segment,
+                                               self._generation(segment, position + longueur))
+        return nom
+    
+    def charger(self, nom: str) -> Tuple[dict, Optional[bytes]]:
+        """Charge un message: un seek + une lecture, sans décodage base64"""
+        if nom not in self.index:
+            raise KeyError(f"Message introuvable: {nom}")
+        
+        segment, position, longueur, _ = self.index[nom]
+        enreg = self._lire(segment, position, longueur)
+        taille_nom = struct.unpack_from(">H", enreg, ENREG_ENTETE.size - 2)[0]
+        champs = _decoder_champs(enreg[ENREG_ENTETE.size + taille_nom:])
+        
+        aad = champs.get(CHAMP_AAD)
+        algo = champs.get(CHAMP_ALGO)
+        donnees_chiffrees = {
+            'chiffre': champs[CHAMP_CHIFFRE],
+            'nonce': champs[CHAMP_NONCE],
+            'aad': aad.decode('utf-8') if aad else None,
+            'algo': algo[0] if algo else ALGO_AES_GCM
+        }
+        if CHAMP_DEK in champs:
+            donnees_chiffrees['dek'] = champs[CHAMP_DEK]
+            donnees_chiffrees['kek'] = champs[CHAMP_KEK]
+        
+        return donnees_chiffrees, champs.get(CHAMP_CLE)
+    
+    def reemballer(self, ancienne_kek: bytes, nouvelle_kek: bytes) -> int:
+        """
+        Rotation de clé maître: ré-emballe la clé de données des messages
+        chiffrés par enveloppe sous `ancienne_kek`
+        
+        Chaque message est réécrit en fin de journal avec le même chiffré
+        (aucun déchiffrement du contenu). Une clé enregistrée avec le
+        message et égale à `ancienne_kek` est remplacée par `nouvelle_kek`:
+        l'ancienne clé ne reste pas sur disque.
+        
+        Returns:
+            int: Nombre de messages ré-emballés
+        """
+        empreinte = empreinte_cle(ancienne_kek)
+        nombre = 0
+        
+        for nom, (_, _, _, timestamp) in list(self.index.items()):
+            donnees, cle = self.charger(nom)
+            if donnees.get('kek') != empreinte:
+                continue
+            if cle == ancienne_kek:
+                cle = nouvelle_kek
+            self.sauvegarder(nom, reemballer_message(donnees, ancienne_kek, nouvelle_kek), cle, timestamp)
+            nombre += 1
+        
+        return nombre
+    
+    def supprimer(self, nom: str):
+        """Supprime un message (enregistrement de suppression)"""
+        if nom not in self.index:
+            raise KeyError(f"Message introuvable: {nom}")
+        segment, position, longueur = self._ajouter(ENREG_SUPPRESSION, nom, time.time(), {})
+        del self.index[nom]
+        
+        if self.catalogue is not None:
+            self.catalogue.supprimer_message(nom, self._generation(segment, position + longueur))
+    
+    def compacter(self) -> int:
+        """
+        Réécrit uniquement les enregistrements vivants dans de nouveaux segments
+        
+        Les enregistrements sont recopiés tels quels (pas de ré-encodage).
+        En cas d'interruption, les anciens segments précèdent les nouveaux:
+        la relecture aboutit au même index.
+        
+        Returns:
+            int: Nombre d'octets récupérés
+        """
+        with self._verrou:
+            if not self.index and not self.dossier.exists():
+                return 0
+            anciens = list(self._segments)
+            taille_avant = sum(self._chemin(s).stat().st_size for s in anciens if self._chemin(s).exists())
+            
+            if self._ecriture is not None:
+                self._ecriture.close()
+            self._actif = anciens[-1] + 1
+            self._segments = [self._actif]
+            self._ecriture = open(self._chemin(self._actif), 'ab')
+            
+            nouvel_index = {}
+            for nom, (segment, position, longueur, timestamp) in sorted(self.index.items(), key=lambda e: e[1][:2]):
+                enreg = self._lire(segment, position, longueur)
+                position_ecriture = self._ecriture.tell()
+                if position_ecriture > 0 and position_ecriture + longueur > self.taille_segment:
+                    self._rotation()
+                    position_ecriture = 0
+                self._ecriture.write(enreg)
+                nouvel_index[nom] = (self._actif, position_ecriture, longueur, timestamp)
+            
+            self._ecriture.flush()
+            os.fsync(self._ecriture.fileno())
+            self.index = nouvel_index
+            
+            if self.catalogue is not None:
+                self.catalogue.deplacer_messages(((e[0], n) for n, e in nouvel_index.items()),
+                                                 self._generation(self._actif, self._ecriture.tell()))
+            
+            for segment in anciens:
+                lecteur = self._lecteurs.pop(segment, None)
+                if lecteur is not None:
+                    lecteur.close()
+                self._chemin(segment).unlink(missing_ok=True)
+            
+            taille_apres = sum(self._chemin(s).stat().st_size for s in self._segments)
+            return taille_avant - taille_apres
+    
+    def fermer(self):
+        """Ferme les fichiers ouverts"""
+        with self._verrou:
+            if self._ecriture is not None:
+                self._ecriture.close()
+                self._ecriture = None
+            for lecteur in self._lecteurs.values():
+                lecteur.close()
+            self._lecteurs.clear()
+    
+    def parcourir(self):
+        """
+        Parcourt TOUS les enregistrements de message, y compris les versions
+        remplacées encore présentes sur disque
+        
+        Yields:
+            (segment, position, nom, champs TLV non décodés)
+        """
+        for segment in list(self._segments):
+            chemin = self._chemin(segment)
+            if not chemin.exists():
+                continue
+            with open(chemin, 'rb') as f:
+                vue = memoryview(f.read())
+            
+            position = 0
+            while position < len(vue):
+                enreg = self._enregistrement(vue, position)
+                if enreg is None:
+                    break
+                type_enreg, _, nom, total = enreg
+                if type_enreg == ENREG_MESSAGE:
+                    debut_champs = position + ENREG_ENTETE.size + len(nom.encode('utf-8'))
+                    yield segment, position, nom, vue[debut_champs:position + total]
+                position += total
+    
+    def __contains__(self, nom: str) -> bool:
+        return nom in self.index
+    
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+_magasin = None
+
+
+def magasin_messages() -> MagasinMessages:
+    """Retourne le magasin de messages par défaut (ouvert au premier appel)"""
+    global _magasin
+    if _magasin is None:
+        _magasin = MagasinMessages(SAVE_DIR, catalogue=catalogue_metadonnees())
+    return _magasin
+
+
+def sauvegarder_message_chiffre(nom: str, donnees_chiffrees: dict, cle: bytes) -> str:
+    """
+    Sauvegarde un message chiffré dans le magasin binaire
+    
+    Args:
+        nom: Nom du message (identifiant dans le magasin)
+        donnees_chiffrees: Dict retourné par chiffrer_aes_gcm()
+        cle: Clé utilisée (sauvegardée avec le message)
+        
+    Returns:
+        str: Nom sous lequel le message a été enregistré
+    """
+    return magasin_messages().sauvegarder(nom, donnees_chiffrees, cle)
+
+
+def charger_message_chiffre(nom: str) -> Tuple[dict, bytes]:
+    """
+    Charge un message chiffré depuis le magasin
+    
+    Les anciens fichiers JSON (V2.0) restent lisibles: il suffit de passer
+    leur chemin au lieu d'un nom.
+    
+    Args:
+        nom: Nom du message (ou chemin d'un ancien fichier .json)
+        
+    Returns:
+        Tuple[dict, bytes]: (donnees_chiffrees, cle)
+    """
+    magasin = magasin_messages()
+    
+    if str(nom) not in magasin and str(nom).endswith('.json') and os.path.exists(nom):
+        return _charger_message_json(nom)
+    
+    return magasin.charger(str(nom))
+
+
+def _charger_message_json(fichier: str) -> Tuple[dict, bytes]:
+    """Lit un message au format JSON de la V2.0"""
+    with open(fichier, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    donnees_chiffrees = {
+        'chiffre': base64.b64decode(data['chiffre']),
+        'nonce': base64.b64decode(data['nonce']),
+        'aad': data.get('aad')
+    }
+    
+    return donnees_chiffrees, base64.b64decode(data['cle'])
+
+
+def migrer_messages_json() -> int:
+    """Importe les anciens fichiers JSON de SAVE_DIR dans le magasin binaire"""
+    magasin = magasin_messages()
+    nombre = 0
+    
+    for f in SAVE_DIR.glob("*.json"):
+        with open(f, 'r', encoding='utf-8') as file:
+            nom = json.load(file)['nom']
+        donnees, cle = _charger_message_json(f)
+        magasin.sauvegarder(nom, donnees, cle)
+        f.unlink()
+        nombre += 1
+    
+    return nombre
+
+
+def lister_messages_sauvegardes(limite: Optional[int] = None, decalage: int = 0,
+                                tri: str = 'date', decroissant: bool = False,
+                                prefixe: Optional[str] = None) -> list:
+    """
+    Liste les messages chiffrés sauvegardés (depuis le catalogue)
+    
+    Args:
+        limite: Nombre maximum de messages (None = tous)
+        decalage: Nombre de messages à sauter (pagination)
+        tri: 'date', 'nom' ou 'taille'
+        decroissant: Ordre décroissant
+        prefixe: Filtre sur le début du nom
+        
+    Returns:
+        list: Dicts {'fichier', 'nom', 'date', 'taille'}
+    """
+    magasin = magasin_messages()
+    lignes = magasin.catalogue.lister('messages', limite, decalage, tri, decroissant, prefixe)
+    
+    return [
+        {
+            'fichier': magasin._chemin(segment).name,
+            'nom': nom,
+            'date': _formater_date(timestamp),
+            'taille': taille
+        }
+        for nom, timestamp, taille, segment in lignes
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - ROTATION DES CLÉS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def dechiffrer_avec_cles(donnees_chiffrees: dict, cles: Iterable[bytes]) -> str:
+    """
+    Déchiffre un message avec la première clé valide parmi `cles`
+    
+    Pendant une rotation, l'ancienne et la nouvelle clé sont toutes deux
+    acceptées: cles = [nouvelle_cle, ancienne_cle].
+    
+    Raises:
+        InvalidTag: Aucune clé ne convient
+    """
+    from cryptography.exceptions import InvalidTag
+    
+    cles = list(cles)
+    if donnees_chiffrees.get('kek') is not None:
+        # Enveloppe: l'empreinte désigne directement la bonne clé maître
+        par_empreinte = {empreinte_cle(c): c for c in cles}
+        cle = par_empreinte.get(donnees_chiffrees['kek'])
+        if cle is None:
+            raise InvalidTag("ERREUR: Aucune des clés fournies n'emballe ce message!")
+        return dechiffrer_message(donnees_chiffrees, cle)
+    
+    for cle in cles:
+        try:
+            return dechiffrer_message(donnees_chiffrees, cle)
+        except InvalidTag:
+            continue
+    raise InvalidTag("ERREUR: Le message a été altéré ou aucune des clés n'est correcte!")
+
+
+def _reencrypter_donnees(donnees_chiffrees: dict, ancienne_cle: bytes, nouvelle_cle: bytes) -> dict:
+    """
+    Re-chiffre un message sous `nouvelle_cle` (même algorithme, même AAD)
+    
+    Un message chiffré par enveloppe reçoit une nouvelle clé de données:
+    si la clé maître est compromise, ses clés de données le sont aussi.
+    """
+    from cryptography.exceptions import InvalidTag
+    
+    algo = donnees_chiffrees.get('algo') or ALGO_AES_GCM
+    aad = donnees_chiffrees['aad'].encode('utf-8') if donnees_chiffrees.get('aad') else None
+    enveloppe = donnees_chiffrees.get('dek') is not None
+    
+    cle = ancienne_cle
+    if enveloppe:
+        cle = _dek_depuis_emplacement(EMPLACEMENT_CLE.pack(donnees_chiffrees['kek'], donnees_chiffrees['dek']),
+                                      ancienne_cle)
+    try:
+        clair = _aead(algo, cle).decrypt(donnees_chiffrees['nonce'], donnees_chiffrees['chiffre'], aad)
+    except InvalidTag:
+        raise InvalidTag("ERREUR: Le message a été altéré ou la clé est incorrecte!")
+    
+    resultat = {'aad': donnees_chiffrees.get('aad'), 'algo': algo, 'nonce': secrets.token_bytes(NONCE_SIZE)}
+    cle = nouvelle_cle
+    if enveloppe:
+        cle, emplacement = _nouvel_emplacement_cle(nouvelle_cle)
+        resultat['kek'], resultat['dek'] = EMPLACEMENT_CLE.unpack(emplacement)
+    resultat['chiffre'] = _aead(algo, cle).encrypt(resultat['nonce'], clair, aad)
+    return resultat
+
+
+def _ecrire_reprise(chemin: Path, etat: dict):
+    """Écrit le point de reprise de façon atomique"""
+    temporaire = chemin.with_suffix('.tmp')
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(etat, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporaire, chemin)
+
+
+def reencrypter_magasin(ancienne_cle: bytes, nouvelle_cle: bytes, magasin: Optional[MagasinMessages] = None,
+                        workers: Optional[int] = None, taille_lot: int = ROTATION_TAILLE_LOT,
+                        compacter: bool = True, afficher: bool = True) -> dict:
+    """
+    Re-chiffre sous `nouvelle_cle` tous les messages du magasin chiffrés
+    sous `ancienne_cle` (clé compromise)
+    
+    Les messages sont traités par lots, dans l'ordre des noms, sur un pool
+    de threads. Chaque message re-chiffré est un nouvel enregistrement du
+    journal: la mise à jour est atomique par message (une écriture
+    interrompue est tronquée à la réouverture, l'ancienne version reste).
+    Après chaque lot, un point de reprise est écrit: une exécution
+    interrompue reprend au lot suivant. Les messages en échec y sont notés
+    et retentés à la reprise: tant qu'il en reste, le point de reprise est
+    gardé et le magasin n'est pas compacté. Pendant la migration, les deux
+    clés restent valides (voir dechiffrer_avec_cles()).
+    
+    Args:
+        ancienne_cle: Clé compromise
+        nouvelle_cle: Clé de remplacement
+        magasin: Magasin à traiter (défaut: magasin_messages())
+        workers: Nombre de threads (défaut: nombre de cœurs)
+        taille_lot: Nombre de messages entre deux points de reprise
+        compacter: Compacter à la fin pour effacer les anciens chiffrés
+        afficher: Afficher la progression
+        
+    Returns:
+        dict: Statistiques (reencryptes, ignores, modifies, echecs, duree)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from cryptography.exceptions import InvalidTag
+    
+    if len(nouvelle_cle) != KEY_SIZE:
+        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+    
+    magasin = magasin or magasin_messages()
+    empreinte_ancienne = empreinte_cle(ancienne_cle)
+    empreinte_nouvelle = empreinte_cle(nouvelle_cle)
+    
+    chemin_reprise = magasin.dossier / ROTATION_REPRISE_NOM
+    apres, a_reprendre = None, set()
+    if chemin_reprise.exists():
+        with open(chemin_reprise, 'r', encoding='utf-8') as f:
+            etat = json.load(f)
+        if (etat['ancienne'], etat['nouvelle']) == (empreinte_ancienne.hex(), empreinte_nouvelle.hex()):
+            apres = etat['apres']
+            a_reprendre = set(etat.get('echecs', []))   # Échecs d'une exécution précédente: retentés
+    
+    noms = sorted(n for n in magasin.index if apres is None or n > apres or n in a_reprendre)
+    stats = {'reencryptes': 0, 'ignores': 0, 'modifies': 0, 'echecs': [], 'repris_apres': apres}
+    debut = time.perf_counter()
+    
+    def traiter(nom: str):
+        entree = magasin.index.get(nom)
+        if entree is None:
+            return nom, None, None, None
+        
+        donnees, cle = magasin.charger(nom)
+        concerne = (donnees['kek'] == empreinte_ancienne) if donnees.get('kek') is not None \
+            else (cle is None or cle == ancienne_cle)
+        if not concerne:
+            return nom, entree, None, None
+        
+        try:
+            nouvelles = _reencrypter_donnees(donnees, ancienne_cle, nouvelle_cle)
+        except InvalidTag:
+            if cle is None and donnees.get('kek') is None:
+                return nom, entree, None, None   # Chiffré sous une autre clé non enregistrée
+            raise
+        return nom, entree, nouvelles, (nouvelle_cle if cle is not None else None)
+    
+    def proteger(nom: str):
+        try:
+            return traiter(nom)
+        except Exception as e:
+            return nom, e, None, None
+    
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executeur:
+        for i in range(0, len(noms), taille_lot):
+            lot = noms[i:i + taille_lot]
+            
+            for nom, entree, nouvelles, cle in executeur.map(proteger, lot):
+                if isinstance(entree, Exception):
+                    stats['echecs'].append((nom, str(entree)))
+                    continue
+                if nouvelles is None:
+                    stats['ignores'] += 1
+                    continue
+                
+                with magasin._verrou:
+                    if magasin.index.get(nom) != entree:
+                        stats['modifies'] += 1   # Réécrit ou supprimé entre-temps
+                        continue
+                    magasin.sauvegarder(nom, nouvelles, cle, entree[3])
+                stats['reencryptes'] += 1
+            
+            with magasin._verrou:
+                if magasin._ecriture is not None:
+                    os.fsync(magasin._ecriture.fileno())
+            # Noms triés: les échecs à retenter pas encore traités sont ceux après ce lot
+            apres = lot[-1] if apres is None else max(apres, lot[-1])
+            _ecrire_reprise(chemin_reprise, {
+                'ancienne': empreinte_ancienne.hex(),
+                'nouvelle': empreinte_nouvelle.hex(),
+                'apres': apres,
+                'echecs': sorted({nom for nom, _ in stats['echecs']} | {n for n in a_reprendre if n > lot[-1]})
+            })
+            
+            if afficher:
+                print(f"   ⚙️  {i + len(lot)}/{len(noms)} messages traités")
+    
+    if compacter and not stats['echecs']:
+        magasin.compacter()   # Les anciennes versions (ancienne clé) quittent le disque
+    if not stats['echecs']:
+        chemin_reprise.unlink(missing_ok=True)
+    
+    stats['duree'] = time.perf_counter() - debut
+    
+    if afficher:
+        print(f"\n✅ {stats['reencryptes']} message(s) re-chiffré(s), {stats['ignores']} ignoré(s)"
+              f" (autre clé), {stats['modifies']} modifié(s) pendant la rotation")
+        print(f"   ⏱️  {stats['duree']:.2f} s")
+        for nom, erreur in stats['echecs']:
+            print(f"   ❌ {nom}: {erreur}")
+    
+    return stats
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - DÉTECTION DE RÉUTILISATION DE NONCES
+# ═══════════════════════════════════════════════════════════════════════════
+
+CLE_INCONNUE = b"?" * 16   # Clé non enregistrée: tous ces chiffrés sont comparés entre eux
+
+
+class FiltreBloom:
+    """
+    Filtre de Bloom (ensemble approximatif: faux positifs possibles, jamais
+    de faux négatifs)
+    
+    Args:
+        capacite: Nombre d'éléments prévus
+        taux_faux_positifs: Probabilité de faux positif visée à pleine capacité
+    """
+    
+    def __init__(self, capacite: int, taux_faux_positifs: float = NONCES_SCAN_FAUX_POSITIFS):
+        import math
+        
+        self.taille_bits = max(64, int(-capacite * math.log(taux_faux_positifs) / math.log(2) ** 2))
+        self.nombre_hachages = max(1, round(self.taille_bits / capacite * math.log(2)))
+        self._bits = bytearray((self.taille_bits + 7) // 8)
+    
+    def ajouter(self, empreinte: int) -> bool:
+        """Ajoute un élément (empreinte de 64 bits); retourne True s'il était (peut-être) déjà présent"""
+        # Double hachage (Kirsch-Mitzenmacher) sur les deux moitiés de l'empreinte
+        bits, m = self._bits, self.taille_bits
+        position, pas = empreinte & 0xFFFFFFFF, (empreinte >> 32) | 1
+        present = True
+        for _ in range(self.nombre_hachages):
+            position %= m
+            masque = 1 << (position & 7)
+            if not bits[position >> 3] & masque:
+                present = False
+                bits[position >> 3] |= masque
+            position += pas
+        return present
+
+
+def _occurrences_nonces(magasin: Optional[MagasinMessages], fichiers: List[str]):
+    """
+    Génère (empreinte 64 bits de (clé, nonce), localisation) pour chaque
+    chiffré du magasin et chaque en-tête de fichier
+    
+    Identité de la clé: clé enregistrée, clé de données emballée
+    (enveloppe), ou CLE_INCONNUE. Boucle critique (100M d'enregistrements):
+    les champs TLV sont lus sur place, sans copier les chiffrés.
+    """
+    blake2b = hashlib.blake2b
+    tlv = struct.Struct(">BI").unpack_from
+    
+    if magasin is not None:
+        for segment, position, _, vue in magasin.parcourir():
+            nonce = cle = dek = None
+            i, fin = 0, len(vue)
+            while i < fin:
+                tag, longueur = tlv(vue, i)
+                i += 5
+                if tag == CHAMP_NONCE:
+                    nonce = vue[i:i + longueur]
+                elif tag == CHAMP_DEK:
+                    dek = vue[i:i + longueur]
+                elif tag == CHAMP_CLE:
+                    cle = vue[i:i + longueur]
+                i += longueur
+            
+            h = blake2b(digest_size=8)
+            if dek is not None:
+                h.update(b"D")
+                h.update(dek)
+            elif cle is not None:
+                h.update(b"K")
+                h.update(cle)
+            else:
+                h.update(CLE_INCONNUE)
+            h.update(nonce)
+            yield int.from_bytes(h.digest(), 'big'), ('magasin', segment, position)
+    
+    for chemin in fichiers:
+        id_cle, nonce = _identite_fichier(chemin)
+        yield int.from_bytes(blake2b(id_cle + nonce, digest_size=8).digest(), 'big'), ('fichier', chemin)
+
+
+def _identite_fichier(chemin: str) -> Tuple[bytes, bytes]:
+    """Retourne (identité de la clé, nonce) d'un fichier chiffré d'après son en-tête"""
+    with open(chemin, 'rb') as f:
+        entete = f.read(FICHIER_ENTETE_SEGMENTE.size + EMPLACEMENT_CLE.size + NONCE_SIZE)
+    
+    analyse = _analyser_entete(entete)
+    if analyse is None or analyse[0] == FICHIER_VERSION_DIRECTE:
+        debut = analyse[4] if analyse is not None else 0
+        return CLE_INCONNUE, entete[debut:debut + NONCE_SIZE]
+    
+    version, _, _, taille_entete, debut = analyse
+    id_cle = b"D" + hashlib.blake2b(entete[taille_entete + EMPREINTE_SIZE:debut], digest_size=15).digest()
+    if version == FICHIER_VERSION_SEGMENTE:
+        return id_cle, entete[FICHIER_ENTETE_SEGMENTE.size - 7:FICHIER_ENTETE_SEGMENTE.size]
+    return id_cle, entete[debut:debut + NONCE_SIZE]
+
+
+def _relire_occurrence(magasin: Optional[MagasinMessages], localisation) -> Tuple[bytes, bytes, bytes]:
+    """Relit une occurrence suspecte: (identité de la clé, nonce, empreinte du chiffré)"""
+    if localisation[0] == 'fichier':
+        id_cle, nonce = _identite_fichier(localisation[1])
+        hachage = hashlib.blake2b(digest_size=16)
+        with open(localisation[1], 'rb') as f:
+            for bloc in iter(lambda: f.read(AUDIT_BLOC_TAILLE), b""):
+                hachage.update(bloc)
+        return id_cle, nonce, hachage.digest()
+    
+    _, segment, position = localisation
+    with open(magasin._chemin(segment), 'rb') as f:
+        f.seek(position)
+        longueur = struct.unpack(">I", f.read(4))[0]
+    enreg = magasin._lire(segment, position, 8 + longueur)
+    taille_nom = struct.unpack_from(">H", enreg, ENREG_ENTETE.size - 2)[0]
+    champs = _decoder_champs(enreg[ENREG_ENTETE.size + taille_nom:])
+    
+    if CHAMP_DEK in champs:
+        id_cle = b"D" + hashlib.blake2b(champs[CHAMP_DEK], digest_size=15).digest()
+    elif CHAMP_CLE in champs:
+        id_cle = b"K" + hashlib.blake2b(champs[CHAMP_CLE], digest_size=15).digest()
+    else:
+        id_cle = CLE_INCONNUE
+    return id_cle, champs[CHAMP_NONCE], hashlib.blake2b(champs[CHAMP_CHIFFRE], digest_size=16).digest()
+
+
+def detecter_reutilisation_nonces(magasin: Optional[MagasinMessages] = None, chemins: Iterable[str] = (),
+                                  motif: str = "*.encrypted", limite_exacte: int = NONCES_SCAN_LIMITE_EXACTE,
+                                  capacite_bloom: int = NONCES_SCAN_CAPACITE_BLOOM,
+                                  afficher: bool = True) -> dict:
+    """
+    Recherche les couples (clé, nonce) utilisés plusieurs fois dans le
+    magasin (versions remplacées comprises) et dans des fichiers chiffrés
+    
+    Passe 1: chaque couple est réduit à une empreinte de 64 bits, gardée
+    dans un ensemble exact tant qu'il reste sous `limite_exacte` éléments,
+    puis dans un filtre de Bloom (mémoire fixe). Les empreintes vues deux
+    fois deviennent suspectes. Passe 2 (seulement s'il y a des suspects):
+    les occurrences suspectes sont relues et comparées octet par octet,
+    ce qui élimine faux positifs et collisions d'empreintes. Deux copies
+    d'un même chiffré ne sont pas une réutilisation (signalées à part).
+    
+    Args:
+        magasin: Magasin de messages (défaut: magasin_messages())
+        chemins: Fichiers ou répertoires de fichiers chiffrés à inclure
+        motif: Motif des fichiers recherchés dans les répertoires (fnmatch)
+        limite_exacte: Nombre d'empreintes gardées exactement en mémoire
+        capacite_bloom: Nombre d'éléments prévus pour le filtre de Bloom
+        afficher: Afficher le résumé
+        
+    Returns:
+        dict: {'occurrences', 'methode', 'suspects', 'reutilisations', 'copies', 'duree'}
+              reutilisations: liste de {'cle', 'nonce', 'occurrences', 'cle_inconnue'}
+    """
+    from fnmatch import fnmatch
+    
+    magasin = magasin or magasin_messages()
+    fichiers = []
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            fichiers.extend(c for c, _ in _parcourir_arborescence(chemin) if fnmatch(os.path.basename(c), motif))
+        else:
+            fichiers.append(chemin)
+    
+    debut = time.perf_counter()
+    vus = set()
+    bloom = None
+    suspects = set()
+    nombre = 0
+    
+    # Passe 1: empreintes vues au moins deux fois
+    for empreinte, _ in _occurrences_nonces(magasin, fichiers):
+        nombre += 1
+        if bloom is None:
+            if empreinte in vus:
+                suspects.add(empreinte)
+                continue
+            vus.add(empreinte)
+            if len(vus) > limite_exacte:
+                bloom = FiltreBloom(max(capacite_bloom, 2 * limite_exacte))
+                for e in vus:
+                    bloom.ajouter(e)
+                vus = None
+        elif bloom.ajouter(empreinte):
+            suspects.add(empreinte)
+    
+    # Passe 2: confirmation exacte des suspects
+    groupes = {}
+    if suspects:
+        for empreinte, localisation in _occurrences_nonces(magasin, fichiers):
+            if empreinte in suspects:
+                groupes.setdefault(empreinte, []).append(localisation)
+    
+    reutilisations = []
+    copies = 0
+    for localisations in groupes.values():
+        if len(localisations) < 2:
+            continue   # Faux positif du filtre de Bloom
+        par_couple = {}
+        for localisation in localisations:
+            id_cle, nonce, chiffre = _relire_occurrence(magasin, localisation)
+            par_couple.setdefault((id_cle, bytes(nonce)), {}).setdefault(chiffre, []).append(localisation)
+        
+        for (id_cle, nonce), par_chiffre in par_couple.items():
+            copies += sum(len(l) - 1 for l in par_chiffre.values())
+            if len(par_chiffre) > 1:
+                reutilisations.append({
+                    'cle': id_cle.hex(),
+                    'nonce': nonce.hex(),
+                    'occurrences': [l for liste in par_chiffre.values() for l in liste],
+                    'cle_inconnue': id_cle == CLE_INCONNUE
+                })
+    
+    resultat = {
+        'occurrences': nombre,
+        'methode': 'bloom' if bloom is not None else 'exacte',
+        'suspects': len(suspects),
+        'reutilisations': reutilisations,
+        'copies': copies,
+        'duree': time.perf_counter() - debut
+    }
+    
+    if afficher:
+        symbole = "✅" if not reutilisations else "🚨"
+        print(f"\n{symbole} {nombre} chiffré(s) analysé(s) en {resultat['duree']:.2f} s "
+              f"(méthode {resultat['methode']}, {len(suspects)} suspect(s))")
+        print(f"   {len(reutilisations)} réutilisation(s) de nonce, {copies} copie(s) identique(s)")
+        for r in reutilisations:
+            avertissement = " (clé inconnue: réutilisation seulement si c'est la même clé)" if r['cle_inconnue'] else ""
+            print(f"   🚨 nonce {r['nonce']}{avertissement}:")
+            for localisation in r['occurrences']:
+                print(f"      - {' '.join(str(x) for x in localisation)}")
+    
+    return resultat
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.0 - GESTION CLÉS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Trousseau:
+    """
+    Trousseau de clés dans un seul fichier
+    
+    Format:
+        en-tête fixe (magic, version, salt, itérations PBKDF2, taille de l'index, HMAC)
+        index JSON {nom: [position, longueur, taille en bits, timestamp]}
+        entrées: nonce + clé emballée en AES-256-GCM sous la clé maître (AAD = nom)
+    
+    À l'ouverture, seuls l'en-tête et l'index sont lus; le HMAC-SHA256
+    (sous-clé HKDF de la clé maître) couvre l'en-tête et l'index, et vérifie
+    la clé maître en une opération. Une clé n'est lue et déballée que
+    lorsqu'elle est demandée, puis gardée en mémoire. Un trousseau de
+    version 1 reste lisible et passe en version 2 à la prochaine écriture.
+    """
+    
+    def __init__(self, chemin: Path = TROUSSEAU_FILE, mot_de_passe: Optional[str] = None,
+                 cle_maitre: Optional[bytes] = None):
+        from cryptography.exceptions import InvalidTag
+        
+        if (mot_de_passe is None) == (cle_maitre is None):
+            raise ValueError("Fournir soit un mot de passe, soit une clé maître")
+        
+        self.chemin = Path(chemin)
+        self.index = {}
+        self._cache = {}
+        self._verrou = threading.RLock()
+        self._lecteur = None
+        
+        if self.chemin.exists():
+            with open(self.chemin, 'rb') as f:
+                debut = f.read(5)
+                if len(debut) < 5 or debut[:4] != TROUSSEAU_MAGIC:
+                    raise ValueError("Ce n'est pas un trousseau TP4")
+                format_entete = {1: TROUSSEAU_ENTETE_V1, TROUSSEAU_VERSION: TROUSSEAU_ENTETE}.get(debut[4])
+                if format_entete is None:
+                    raise ValueError(f"Version de trousseau non supportée: {debut[4]}")
+                entete = debut + f.read(format_entete.size - 5)
+                if len(entete) < format_entete.size:
+                    raise ValueError("En-tête de trousseau tronqué")
+                _, version, salt, iterations, taille_index, tag = format_entete.unpack(entete)
+                index_octets = f.read(taille_index)
+            
+            self.salt, self.iterations = salt, iterations
+            cle = self._cle_maitre(mot_de_passe, cle_maitre)
+            self._maitre = _aead(ALGO_AES_GCM, cle)
+            self._cle_index = self._deriver_cle_index(cle)
+            
+            if version == 1:
+                try:
+                    self._maitre.decrypt(bytes(NONCE_SIZE), tag, index_octets)
+                    valide = True
+                except InvalidTag:
+                    valide = False
+            else:
+                valide = hmac.compare_digest(tag, self._mac_index(entete[:-len(tag)], index_octets))
+            if not valide:
+                raise InvalidTag("ERREUR: Mot de passe maître incorrect ou trousseau altéré!")
+            
+            self.index = json.loads(index_octets)
+            self._debut_entrees = format_entete.size + taille_index
+        else:
+            self.salt = secrets.token_bytes(SALT_SIZE)
+            parametres = parametres_kdf()
+            iterations = parametres['iterations'] if parametres['kdf'] == 'pbkdf2' else PBKDF2_ITERATIONS
+            self.iterations = iterations if mot_de_passe is not None else 0
+            cle = self._cle_maitre(mot_de_passe, cle_maitre)
+            self._maitre = _aead(ALGO_AES_GCM, cle)
+            self._cle_index = self._deriver_cle_index(cle)
+            self._debut_entrees = 0
+    
+    @staticmethod
+    def _deriver_cle_index(cle_maitre: bytes) -> bytes:
+        """Sous-clé du HMAC de l'index (HKDF-SHA256, distincte de la clé d'emballage)"""
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+        
+        return HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                    info=TROUSSEAU_INFO_INDEX).derive(cle_maitre)
+    
+    def _mac_index(self, entete_sans_tag: bytes, index_octets: bytes) -> bytes:
+        """HMAC-SHA256 de l'en-tête (magic, version, salt, itérations, len(index)) et de l'index"""
+        return hmac.new(self._cle_index, entete_sans_tag + index_octets, hashlib.sha256).digest()
+    
+    def _cle_maitre(self, mot_de_passe: Optional[str], cle_maitre: Optional[bytes]) -> bytes:
+        if cle_maitre is not None:
+            if len(cle_maitre) != KEY_SIZE:
+                raise ValueError(f"La clé maître doit faire {KEY_SIZE} octets")
+            return cle_maitre
+        if self.iterations == 0:
+            raise ValueError("Ce trousseau est protégé par une clé maître, pas par un mot de passe")
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=KEY_SIZE, salt=self.salt, iterations=self.iterations)
+        return kdf.derive(mot_de_passe.encode('utf-8'))
+    
+    def _lire_entree(self, position: int, longueur: int) -> bytes:
+        if self._lecteur is None:
+            self._lecteur = open(self.chemin, 'rb')
+        self._lecteur.seek(self._debut_entrees + position)
+        return self._lecteur.read(longueur)
+    
+    def charger(self, nom: str) -> bytes:
+        """Retourne une clé (déballée au premier accès seulement)"""
+        from cryptography.exceptions import InvalidTag
+        
+        with self._verrou:
+            cle = self._cache.get(nom)
+            if cle is not None:
+                return cle
+            if nom not in self.index:
+                raise KeyError(f"Clé introuvable: {nom}")
+            
+            position, longueur, _, _ = self.index[nom]
+            entree = self._lire_entree(position, longueur)
+            try:
+                cle = self._maitre.decrypt(entree[:NONCE_SIZE], entree[NONCE_SIZE:], nom.encode('utf-8'))
+            except InvalidTag:
+                raise InvalidTag(f"ERREUR: L'entrée '{nom}' du trousseau a été altérée!")
+            
+            self._cache[nom] = cle
+            return cle
+    
+    def ajouter(self, cles: Dict[str, bytes]):
+        """Ajoute (ou remplace) des clés et réécrit le fichier de façon atomique"""
+        with self._verrou:
+            entrees = {}
+            for nom, (position, longueur, taille, timestamp) in self.index.items():
+                if nom not in cles:
+                    entrees[nom] = (self._lire_entree(position, longueur), taille, timestamp)
+            
+            for nom, cle in cles.items():
+                nonce = secrets.token_bytes(NONCE_SIZE)
+                emballee = nonce + self._maitre.encrypt(nonce, cle, nom.encode('utf-8'))
+                entrees[nom] = (emballee, len(cle) * 8, time.time())
+            
+            self._ecrire(entrees)
+            self._cache.update(cles)
+    
+    def supprimer(self, nom: str):
+        """Retire une clé du trousseau"""
+        with self._verrou:
+            if nom not in self.index:
+                raise KeyError(f"Clé introuvable: {nom}")
+            entrees = {
+                n: (self._lire_entree(p, l), t, ts)
+                for n, (p, l, t, ts) in self.index.items() if n != nom
+            }
+            self._ecrire(entrees)
+            self._cache.pop(nom, None)
+    
+    def _ecrire(self, entrees: Dict[str, Tuple[bytes, int, float]]):
+        index = {}
+        position = 0
+        for nom, (emballee, taille, timestamp) in entrees.items():
+            index[nom] = [position, len(emballee), taille, timestamp]
+            position += len(emballee)
+        
+        index_octets = json.dumps(index, separators=(',', ':')).encode('utf-8')
+        entete = TROUSSEAU_ENTETE.pack(TROUSSEAU_MAGIC, TROUSSEAU_VERSION, self.salt,
+                                       self.iterations, len(index_octets), b"")[:-32]
+        entete += self._mac_index(entete, index_octets)
+        
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = self.chemin.with_suffix('.tmp')
+        with open(temporaire, 'wb') as f:
+            f.write(entete)
+            f.write(index_octets)
+            for emballee, _, _ in entrees.values():
+                f.write(emballee)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        if self._lecteur is not None:
+            self._lecteur.close()
+            self._lecteur = None
+        os.replace(temporaire, self.chemin)
+        
+        self.index = index
+        self._debut_entrees = TROUSSEAU_ENTETE.size + len(index_octets)
+    
+    def __contains__(self, nom: str) -> bool:
+        return nom in self.index
+    
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+_trousseau = None
+
+
+def trousseau_cles() -> Trousseau:
+    """
+    Retourne le trousseau par défaut
+    
+    Le mot de passe maître est lu dans la variable d'environnement
+    TP4_MOT_DE_PASSE_MAITRE, sinon demandé au clavier.
+    """
+    global _trousseau
+    if _trousseau is None:
+        mot_de_passe = os.environ.get('TP4_MOT_DE_PASSE_MAITRE')
+        if mot_de_passe is None:
+            import getpass
+            mot_de_passe = getpass.getpass("🔐 Mot de passe maître du trousseau: ")
+        _trousseau = Trousseau(TROUSSEAU_FILE, mot_de_passe=mot_de_passe)
+    return _trousseau
+
+
+def sauvegarder_cle(nom: str, cle: bytes) -> str:
+    """Sauvegarde une clé dans le trousseau (emballée sous la clé maître)"""
+    trousseau = trousseau_cles()
+    trousseau.ajouter({nom: cle})
+    
+    catalogue_metadonnees().enregistrer_cle(nom, trousseau.index[nom][3], len(cle) * 8)
+    
+    return f"{trousseau.chemin}:{nom}"
+
+
+def charger_cle(nom: str) -> bytes:
+    """Charge une clé depuis le trousseau (ou depuis un ancien fichier .key)"""
+    fichier = KEYS_DIR / f"{nom}.key"
+    
+    if fichier.exists() and not (TROUSSEAU_FILE.exists() and nom in trousseau_cles()):
+        with open(fichier, 'r') as f:
+            data = json.load(f)
+        return base64.b64decode(data['cle'])
+    
+    return trousseau_cles().charger(nom)
+
+
+def migrer_cles_fichiers() -> int:
+    """Importe les anciens fichiers .key dans le trousseau puis les supprime"""
+    fichiers = list(KEYS_DIR.glob("*.key"))
+    cles = {}
+    
+    for f in fichiers:
+        with open(f, 'r') as file:
+            data = json.load(file)
+        cles[data['nom']] = base64.b64decode(data['cle'])
+    
+    if cles:
+        trousseau_cles().ajouter(cles)
+        for f in fichiers:
+            f.unlink()
+    
+    return len(cles)
+
+
+def lister_cles(limite: Optional[int] = None, decalage: int = 0,
+                tri: str = 'date', decroissant: bool = False,
+                prefixe: Optional[str] = None) -> list:
+    """Liste les clés sauvegardées (depuis le catalogue, mêmes options que les messages)"""
+    lignes = catalogue_metadonnees().lister('cles', limite, decalage, tri, decroissant, prefixe)
+    
+    return [
+        {
+            'fichier': TROUSSEAU_FILE.name,
+            'nom': nom,
+            'taille': taille,
+            'date': _formater_date(timestamp)
+        }
+        for nom, timestamp, taille in lignes
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - COFFRE DE SECRETS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _effacer(_, valeur: bytearray):
+    """Écrase un secret en clair avant de le libérer"""
+    valeur[:] = bytes(len(valeur))
+
+
+class CoffreSecrets(MutableMapping):
+    """
+    Dictionnaire de petits secrets chiffrés au repos, dans un seul fichier
+    
+    coffre["api/token"] = b"..." chiffre et ajoute un enregistrement à la
+    fin du fichier; coffre["api/token"] relit et déchiffre. L'identifiant
+    (avec celui du coffre) sert d'AAD: un chiffré ne peut pas être déplacé
+    sous un autre identifiant ni dans un autre coffre.
+    
+    Les valeurs récemment lues ou écrites sont gardées en clair dans un
+    cache LRU borné (bytearray): une lecture fréquente ne coûte aucun
+    déchiffrement. Une valeur évincée, remplacée ou supprimée est écrasée
+    par des zéros. Les valeurs retournées sont des copies (bytes) dont
+    l'appelant gère la durée de vie.
+    
+    Format:
+        en-tête (magic, version, algorithme, identifiant du coffre)
+        enregistrements: longueur (4) | crc32 (4) | type (1) | len(id) (2) | id | nonce | chiffré
+    
+    Args:
+        chemin: Fichier du coffre (créé au besoin)
+        cle: Clé AES-256
+        taille_cache: Nombre de valeurs en clair gardées en mémoire
+        synchrone: fsync après chaque écriture
+    """
+    
+    def __init__(self, chemin: Union[str, Path], cle: bytes, taille_cache: int = COFFRE_CACHE_TAILLE,
+                 synchrone: bool = False):
+        if len(cle) != KEY_SIZE:
+            raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
+        
+        self.chemin = Path(chemin)
+        self.synchrone = synchrone
+        self.index = {}   # identifiant -> (position, longueur)
+        self._cache = CacheLRU(taille_cache, a_l_eviction=_effacer)
+        self._verrou = threading.RLock()
+        
+        if not self.chemin.exists() or self.chemin.stat().st_size == 0:
+            self.chemin.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.chemin, 'wb') as f:
+                f.write(COFFRE_ENTETE.pack(COFFRE_MAGIC, COFFRE_VERSION, algorithme_prefere(), secrets.token_bytes(16)))
+                f.flush()
+                os.fsync(f.fileno())
+        
+        self._fichier = open(self.chemin, 'r+b')
+        magic, version, algo, self.identifiant = COFFRE_ENTETE.unpack(self._fichier.read(COFFRE_ENTETE.size))
+        if magic != COFFRE_MAGIC or version != COFFRE_VERSION:
+            self._fichier.close()
+            raise ValueError(f"{self.chemin}: coffre TP4 invalide ou version non supportée")
+        
+        self._aead = _aead(algo, cle)
+        try:
+            self._indexer()
+        except ValueError:
+            self._fichier.close()
+            raise
+    
+    @staticmethod
+    def _enregistrement(vue: memoryview, position: int) -> Optional[Tuple[int, str, int]]:
+        """
+        Décode l'en-tête de l'enregistrement situé à `position`
+        
+        Returns:
+            Optional[Tuple]: (type, identifiant, longueur totale), ou None
+                si l'enregistrement est incomplet ou si son CRC est faux
+        """
+        if position + COFFRE_ENREG.size > len(vue):
+            return None
+        longueur, crc, type_enreg, taille_id = COFFRE_ENREG.unpack_from(vue, position)
+        debut_id, fin = position + COFFRE_ENREG.size, position + 8 + longueur
+        if fin > len(vue) or debut_id + taille_id > fin or zlib.crc32(vue[position + 8:fin]) != crc:
+            return None
+        try:
+            identifiant = bytes(vue[debut_id:debut_id + taille_id]).decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+        return type_enreg, identifiant, fin - position
+    
+    def _indexer(self):
+        """
+        Reconstruit l'index (CRC vérifié pour chaque enregistrement)
+        
+        Seule une fin d'écriture interrompue est tronquée, si aucun
+        enregistrement valide ne la suit. Toute autre corruption lève une
+        ValueError sans rien modifier sur disque.
+        """
+        f = self._fichier
+        f.seek(0)
+        vue = memoryview(f.read())
+        position = COFFRE_ENTETE.size
+        
+        while position < len(vue):
+            enreg = self._enregistrement(vue, position)
+            if enreg is None:
+                break
+            type_enreg, identifiant, total = enreg
+            if type_enreg == ENREG_SUPPRESSION:
+                self.index.pop(identifiant, None)
+            else:
+                self.index[identifiant] = (position, total)
+            position += total
+        
+        if position < len(vue):
+            suite = next((p for p in range(position + 1, len(vue) - COFFRE_ENREG.size + 1)
+                          if self._enregistrement(vue, p) is not None), None)
+            if suite is not None:
+                raise ValueError(f"Coffre {self.chemin} corrompu à la position {position} "
+                                 f"(enregistrements valides au-delà): aucune modification effectuée")
+            # Écriture interrompue: tronquer la fin pour repartir sur une base saine
+            f.truncate(position)
+    
+    def _aad(self, identifiant: bytes) -> bytes:
+        return self.identifiant + identifiant
+    
+    def _ajouter(self, type_enreg: int, identifiant: bytes, charge: bytes) -> Tuple[int, int]:
+        corps = struct.pack(">BH", type_enreg, len(identifiant)) + identifiant + charge
+        enreg = struct.pack(">II", len(corps), zlib.crc32(corps)) + corps
+        
+        f = self._fichier
+        position = f.seek(0, io.SEEK_END)
+        f.write(enreg)
+        f.flush()
+        if self.synchrone:
+            os.fsync(f.fileno())
+        return position, len(enreg)
+    
+    def __getitem__(self, identifiant: str) -> bytes:
+        from cryptography.exceptions import InvalidTag
+        
+        with self._verrou:
+            valeur = self._cache.get(identifiant)
+            if valeur is not None:
+                return bytes(valeur)
+            
+            position, longueur = self.index[identifiant]
+            self._fichier.seek(position)
+            enreg = memoryview(self._fichier.read(longueur))
+            if len(enreg) != longueur or zlib.crc32(enreg[8:]) != struct.unpack_from(">I", enreg, 4)[0]:
+                raise ValueError(f"Enregistrement corrompu: {identifiant}")
+            
+            id_octets = identifiant.encode('utf-8')
+            debut = COFFRE_ENREG.size + len(id_octets)
+            nonce, chiffre = enreg[debut:debut + NONCE_SIZE], enreg[debut + NONCE_SIZE:]
+            
+            # Déchiffrement directement dans le tampon qui sera effacé à l'éviction
+            valeur = bytearray(len(chiffre) - TAG_SIZE)
+            try:
+                self._aead.decrypt_into(nonce, chiffre, self._aad(id_octets), valeur)
+            except InvalidTag:
+                raise InvalidTag(f"ERREUR: Le secret '{identifiant}' a été altéré ou la clé est incorrecte!")
+            
+            self._cache.put(identifiant, valeur)
+            return bytes(valeur)
+    
+    def __setitem__(self, identifiant: str, valeur: Union[bytes, str]):
+        if isinstance(valeur, str):
+            valeur = valeur.encode('utf-8')
+        
+        id_octets = identifiant.encode('utf-8')
+        nonce = secrets.token_bytes(NONCE_SIZE)
+        chiffre = self._aead.encrypt(nonce, valeur, self._aad(id_octets))
+        
+        with self._verrou:
+            self.index[identifiant] = self._ajouter(ENREG_MESSAGE, id_octets, nonce + chiffre)
+            self._cache.pop(identifiant)
+            self._cache.put(identifiant, bytearray(valeur))
+    
+    def __delitem__(self, identifiant: str):
+        with self._verrou:
+            if identifiant not in self.index:
+                raise KeyError(identifiant)
+            self._ajouter(ENREG_SUPPRESSION, identifiant.encode('utf-8'), b"")
+            del self.index[identifiant]
+            self._cache.pop(identifiant)
+    
+    def __iter__(self):
+        return iter(list(self.index))
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def __contains__(self, identifiant) -> bool:
+        return identifiant in self.index
+    
+    def compacter(self) -> int:
+        """
+        Réécrit le fichier avec les seules valeurs vivantes (copiées telles
+        quelles, sans re-chiffrement), puis le remplace de façon atomique
+        
+        Returns:
+            int: Nombre d'octets récupérés
+        """
+        with self._verrou:
+            taille_avant = os.fstat(self._fichier.fileno()).st_size
+            temporaire = self.chemin.with_suffix('.tmp')
+            nouvel_index = {}
+            
+            with open(temporaire, 'wb') as sortie:
+                self._fichier.seek(0)
+                sortie.write(self._fichier.read(COFFRE_ENTETE.size))
+                for identifiant, (position, longueur) in sorted(self.index.items(), key=lambda e: e[1]):
+                    self._fichier.seek(position)
+                    nouvel_index[identifiant] = (sortie.tell(), longueur)
+                    sortie.write(self._fichier.read(longueur))
+                sortie.flush()
+                os.fsync(sortie.fileno())
+            
+            self._fichier.close()
+            os.replace(temporaire, self.chemin)
+            self._fichier = open(self.chemin, 'r+b')
+            self.index = nouvel_index
+            return taille_avant - os.fstat(self._fichier.fileno()).st_size
+    
+    def vider_cache(self):
+        """Écrase et oublie toutes les valeurs en clair"""
+        self._cache.vider()
+    
+    def fermer(self):
+        with self._verrou:
+            self._cache.vider()
+            if not self._fichier.closed:
+                self._fichier.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                    NOUVELLES FONCTIONS V2.1 - COÛT D'UNE ATTAQUE PAR DICTIONNAIRE
+# ═══════════════════════════════════════════════════════════════════════════
+
+_cible_attaque = None
+
 
+def _cible_depuis_fichier(chemin: str) -> tuple:
+    """Prépare la vérification d'un candidat contre un fichier chiffré"""
+    donnees = _lire_fichier(chemin)
+    analyse = _analyser_entete(donnees)
+    if analyse is not None and analyse[0] != FICHIER_VERSION_DIRECTE:
+        # Enveloppe: l'empreinte de la clé maître suffit, sans rien déchiffrer
+        _, _, _, taille_entete, _ = analyse
+        return ('empreinte', donnees[taille_entete:taille_entete + EMPREINTE_SIZE])
+    return ('fichier', donnees)
 
-def dechiffrer_aes_gcm(donnees_chiffrees: dict, cle: bytes) -> str:
-    """Déchiffre un message AES-256-GCM"""
-    if len(cle) != KEY_SIZE:
-        raise ValueError(f"La clé doit faire {KEY_SIZE} octets")
-    
-    chiffre = donnees_chiffrees['chiffre']
-    nonce = donnees_chiffrees['nonce']
-    aad_str = donnees_chiffrees.get('aad')
-    aad = aad_str.encode('utf-8') if aad_str else None
-    
-    aesgcm = AESGCM(cle)
+
+def _init_attaque(cible: tuple, descripteur: str):
+    global _cible_attaque
+    parametres, salt = _decoder_descripteur_kdf(descripteur)
+    _cible_attaque = (cible, parametres, salt)
+
+
+def _candidat_valide(cle: bytes) -> bool:
+    from cryptography.exceptions import InvalidTag
     
+    (nature, valeur), _, _ = _cible_attaque
+    if nature == 'empreinte':
+        return empreinte_cle(cle) == valeur
     try:
-        message_bytes = aesgcm.decrypt(nonce, chiffre, aad)
-        return message_bytes.decode('utf-8')
+        if nature == 'message':
+            dechiffrer_message(valeur, cle)
+        else:
+            _dechiffrer_contenu(valeur, cle)
+        return True
     except InvalidTag:
-        raise InvalidTag("ERREUR: Le message a été altéré ou la clé est incorrecte!")
+        return False
 
 
-# ═══════════════════════════════════════════════════════════════════════════
-#                    NOUVELLES FONCTIONS V2.0 - FICHIERS
-# ═══════════════════════════════════════════════════════════════════════════
+def _essayer_mots(mots: List[str]) -> Tuple[Optional[str], int, float]:
+    """Essaie un paquet de mots dans un processus: (mot trouvé, essais, temps passé)"""
+    _, parametres, salt = _cible_attaque
+    debut = time.perf_counter()
+    for i, mot in enumerate(mots):
+        if _candidat_valide(_deriver(mot, parametres, salt)):
+            return mot, i + 1, time.perf_counter() - debut
+    return None, len(mots), time.perf_counter() - debut
+
+
+def _formater_duree(secondes: float) -> str:
+    """Durée lisible (de la seconde à l'âge de l'univers)"""
+    for unite, duree in (("ans", 365.25 * 86400), ("jours", 86400), ("h", 3600), ("min", 60)):
+        if secondes >= duree:
+            valeur = secondes / duree
+            return f"{valeur:.3g} {unite}" if valeur < 1e6 else f"{valeur:.2e} {unite}"
+    return f"{secondes:.2f} s"
+
 
-def chiffrer_fichier(fichier_entree: str, cle: bytes, fichier_sortie: Optional[str] = None) -> str:
+def projection_cassage(essais_s: float, entropies: Iterable[float] = (20, 30, 40, 50, 60, 80)) -> List[dict]:
     """
-    Chiffre un fichier avec AES-256-GCM
-    
-    Args:
-        fichier_entree: Chemin du fichier à chiffrer
-        cle: Clé AES-256
-        fichier_sortie: Chemin du fichier chiffré (optionnel)
-        
-    Returns:
-        str: Chemin du fichier chiffré créé
+    Temps moyen pour trouver un mot de passe de H bits d'entropie
+    (2^(H-1) essais en moyenne) au débit mesuré
     """
-    # Lire le fichier
-    with open(fichier_entree, 'rb') as f:
-        contenu = f.read()
-    
-    # Générer nonce
-    nonce = secrets.token_bytes(NONCE_SIZE)
-    
-    # Chiffrer
-    aesgcm = AESGCM(cle)
-    chiffre = aesgcm.encrypt(nonce, contenu, None)
-    
-    # Nom du fichier de sortie
-    if fichier_sortie is None:
-        fichier_sortie = f"{fichier_entree}.encrypted"
-    
-    # Écrire: nonce (12 octets) + chiffré
-    with open(fichier_sortie, 'wb') as f:
-        f.write(nonce)
-        f.write(chiffre)
-    
-    return fichier_sortie
+    return [
+        {'entropie': h, 'essais': 2 ** (h - 1), 'secondes': 2 ** (h - 1) / essais_s}
+        for h in entropies
+    ]
 
 
-def dechiffrer_fichier(fichier_chiffre: str, cle: bytes, fichier_sortie: Optional[str] = None) -> str:
+def attaque_dictionnaire(cible, mots: Iterable[str], descripteur: str, workers: Optional[int] = None,
+                         limite: Optional[int] = None, taille_paquet: int = 8,
+                         entropies: Iterable[float] = (20, 30, 40, 50, 60, 80),
+                         afficher: bool = True) -> dict:
     """
-    Déchiffre un fichier AES-256-GCM
+    Attaque par dictionnaire (force brute comme au TP1, mais chaque essai
+    coûte une dérivation de clé complète) contre nos propres données
+    
+    Outil d'audit: mesure le coût réel d'un attaquant pour régler le KDF.
+    Les mots sont lus au fil de l'eau et distribués par paquets à un pool
+    de processus (un cœur par dérivation); l'attaque s'arrête au premier
+    mot de passe trouvé.
     
     Args:
-        fichier_chiffre: Chemin du fichier chiffré
-        cle: Clé AES-256
-        fichier_sortie: Chemin du fichier déchiffré (optionnel)
+        cible: Message chiffré (dict) ou chemin d'un fichier chiffré
+        mots: Mots de passe candidats (liste ou fichier ouvert, un par ligne)
+        descripteur: Descripteur du KDF (voir deriver_cle()) utilisé par la cible
+        workers: Nombre de processus (défaut: nombre de cœurs)
+        limite: Nombre maximum d'essais
+        taille_paquet: Mots envoyés à la fois à un processus
+        entropies: Entropies (bits) pour la projection du temps de cassage
+        afficher: Afficher le résultat
         
     Returns:
-        str: Chemin du fichier déchiffré créé
+        dict: {'trouve', 'essais', 'duree', 'essais_s', 'essais_s_par_coeur', 'workers', 'projection'}
     """
-    # Lire le fichier
-    with open(fichier_chiffre, 'rb') as f:
-        nonce = f.read(NONCE_SIZE)
-        chiffre = f.read()
-    
-    # Déchiffrer
-    aesgcm = AESGCM(cle)
-    
-    try:
-        contenu = aesgcm.decrypt(nonce, chiffre, None)
-    except InvalidTag:
-        raise InvalidTag("ERREUR: Le fichier a été altéré ou la clé est incorrecte!")
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    from itertools import islice
+    
+    cible = _cible_depuis_fichier(cible) if isinstance(cible, (str, os.PathLike)) else ('message', cible)
+    workers = workers or os.cpu_count() or 1
+    mots = (m.rstrip("\r\n") for m in mots)
+    if limite is not None:
+        mots = islice(mots, limite)
+    
+    trouve = None
+    essais = 0
+    temps_calcul = 0.0
+    debut = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_attaque,
+                             initargs=(cible, descripteur)) as executeur:
+        en_cours = set()
+        while True:
+            while trouve is None and len(en_cours) < workers * 2:
+                paquet = list(islice(mots, taille_paquet))
+                if not paquet:
+                    break
+                en_cours.add(executeur.submit(_essayer_mots, paquet))
+            if not en_cours:
+                break
+            
+            faits, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in faits:
+                mot, nombre, duree = future.result()
+                essais += nombre
+                temps_calcul += duree
+                if mot is not None and trouve is None:
+                    trouve = mot
+            
+            if trouve is not None:
+                for future in en_cours:
+                    future.cancel()
+                break
     
-    # Nom du fichier de sortie
-    if fichier_sortie is None:
-        if fichier_chiffre.endswith('.encrypted'):
-            fichier_sortie = fichier_chiffre[:-10]  # Enlever '.encrypted'
-        else:
-            fichier_sortie = f"{fichier_chiffre}.decrypted"
+    duree = time.perf_counter() - debut
+    essais_s = essais / duree if duree > 0 else 0.0
+    resultat = {
+        'trouve': trouve,
+        'essais': essais,
+        'duree': duree,
+        'essais_s': essais_s,
+        'essais_s_par_coeur': essais / temps_calcul if temps_calcul > 0 else 0.0,
+        'workers': workers,
+        'projection': projection_cassage(essais_s, entropies) if essais_s > 0 else []
+    }
     
-    # Écrire
-    with open(fichier_sortie, 'wb') as f:
-        f.write(contenu)
+    if afficher:
+        parametres, _ = _decoder_descripteur_kdf(descripteur)
+        print(f"\n🔓 Attaque par dictionnaire ({parametres['kdf']}, {workers} processus)")
+        print(f"   Essais:          {essais} en {duree:.2f} s")
+        print(f"   Débit total:     {essais_s:.1f} essais/s")
+        print(f"   Débit par cœur:  {resultat['essais_s_par_coeur']:.1f} essais/s")
+        print(f"   Résultat:        {'TROUVÉ: ' + repr(trouve) + ' ❌' if trouve is not None else 'non trouvé ✅'}")
+        print(f"\n   ⏱️  Temps moyen de cassage à ce débit:")
+        for p in resultat['projection']:
+            print(f"      {p['entropie']:>3} bits: {_formater_duree(p['secondes'])}")
+    
+    return resultat
+
+
+def benchmark_attaque_dictionnaire(essais: int = 64, descripteur: Optional[str] = None,
+                                   workers: Optional[int] = None, afficher: bool = True) -> dict:
+    """
+    Mesure le débit d'une attaque sur un message chiffré avec les
+    paramètres actuels du KDF (mots de passe candidats tous faux)
+    """
+    if descripteur is None:
+        descripteur = _encoder_descripteur_kdf(parametres_kdf(), secrets.token_bytes(SALT_SIZE))
     
-    return fichier_sortie
+    cle, _ = deriver_cle(secrets.token_urlsafe(24), descripteur)
+    cible = chiffrer_message("benchmark", cle)
+    candidats = (f"candidat{i}" for i in range(essais))
+    return attaque_dictionnaire(cible, candidats, descripteur, workers, afficher=afficher)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-#                    NOUVELLES FONCTIONS V2.0 - SAUVEGARDE
+#                    NOUVELLES FONCTIONS V2.1 - SUITE DE BENCHMARKS
 # ═══════════════════════════════════════════════════════════════════════════
 
-def sauvegarder_message_chiffre(nom: str, donnees_chiffrees: dict, cle: bytes) -> str:
+TAILLES_BENCHMARK = [16, 256, 4 * 1024, 64 * 1024, 1024 ** 2, 16 * 1024 ** 2, 256 * 1024 ** 2, 1024 ** 3]
+BENCHMARK_BUDGET_S = 0.5   # Temps de mesure visé par cas (répétitions automatiques)
+
+
+def _mesurer(fonction, repetitions: Optional[int] = None, echauffement: int = 3,
+             budget_s: float = BENCHMARK_BUDGET_S) -> List[int]:
     """
-    Sauvegarde un message chiffré dans un fichier JSON
+    Mesure une fonction avec perf_counter_ns
+    
+    Après l'échauffement (caches, allocations, JIT d'OpenSSL), le nombre de
+    répétitions est choisi pour remplir `budget_s` (entre 5 et 10000) sauf
+    s'il est imposé. Le ramasse-miettes est suspendu pendant les mesures.
     
-    Args:
-        nom: Nom du message (utilisé pour le fichier)
-        donnees_chiffrees: Dict retourné par chiffrer_aes_gcm()
-        cle: Clé utilisée (sauvegardée séparément)
-        
     Returns:
-        str: Chemin du fichier créé
-    """
-    # Préparer les données pour JSON
-    data = {
-        'nom': nom,
-        'timestamp': time.time(),
-        'chiffre': base64.b64encode(donnees_chiffrees['chiffre']).decode('utf-8'),
-        'nonce': base64.b64encode(donnees_chiffrees['nonce']).decode('utf-8'),
-        'aad': donnees_chiffrees.get('aad'),
-        'cle': base64.b64encode(cle).decode('utf-8')
-    }
+        List[int]: Durée de chaque répétition en nanosecondes
+    """
+    debut = time.perf_counter_ns()
+    for _ in range(max(1, echauffement)):
+        fonction()
+    estimation = (time.perf_counter_ns() - debut) / max(1, echauffement)
     
-    # Nom du fichier
-    fichier = SAVE_DIR / f"{nom.replace(' ', '_')}.json"
+    if repetitions is None:
+        repetitions = int(min(10000, max(5, budget_s * 1e9 / max(estimation, 1))))
     
-    # Sauvegarder
-    with open(fichier, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    durees = []
+    gc_actif = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repetitions):
+            debut = time.perf_counter_ns()
+            fonction()
+            durees.append(time.perf_counter_ns() - debut)
+    finally:
+        if gc_actif:
+            gc.enable()
+    
+    return durees
+
+
+def _percentile(valeurs_triees: List[int], p: float) -> float:
+    """Percentile par interpolation linéaire (valeurs déjà triées)"""
+    if len(valeurs_triees) == 1:
+        return float(valeurs_triees[0])
+    rang = (len(valeurs_triees) - 1) * p / 100
+    bas = int(rang)
+    haut = min(bas + 1, len(valeurs_triees) - 1)
+    return valeurs_triees[bas] + (valeurs_triees[haut] - valeurs_triees[bas]) * (rang - bas)
+
+
+def _statistiques(operation: str, taille: int, durees_ns: List[int]) -> dict:
+    """Résumé statistique d'une série de mesures (débit calculé sur la médiane)"""
+    triees = sorted(durees_ns)
+    n = len(triees)
+    moyenne = sum(triees) / n
+    ecart_type = (sum((d - moyenne) ** 2 for d in triees) / (n - 1)) ** 0.5 if n > 1 else 0.0
+    mediane = _percentile(triees, 50)
     
-    return str(fichier)
+    return {
+        'operation': operation,
+        'taille': taille,
+        'repetitions': n,
+        'min_ns': triees[0],
+        'median_ns': mediane,
+        'moyenne_ns': moyenne,
+        'p90_ns': _percentile(triees, 90),
+        'p99_ns': _percentile(triees, 99),
+        'ecart_type_ns': ecart_type,
+        'mo_s': taille / mediane * 1e3 if taille and mediane else 0.0,   # octets/ns → Mo/s
+        'ops_s': 1e9 / mediane if mediane else 0.0,
+    }
+
+
+def _algorithmes_aead() -> Dict[str, object]:
+    """AEAD disponibles sur cet hôte (AES-GCM-SIV dépend de la version d'OpenSSL)"""
+    algorithmes = {ALGORITHMES[algo]: classe for algo, classe in _classes_aead().items()}
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCMSIV
+        AESGCMSIV(bytes(KEY_SIZE)).encrypt(bytes(NONCE_SIZE), b"", None)
+        algorithmes['aes-256-gcm-siv'] = AESGCMSIV
+    except Exception:
+        pass
+    return algorithmes
 
 
-def charger_message_chiffre(fichier: str) -> Tuple[dict, bytes]:
+def benchmark_suite(tailles: Optional[List[int]] = None, taille_max: Optional[int] = None,
+                    repetitions: Optional[int] = None, echauffement: int = 3,
+                    fichier_json: Optional[str] = None, afficher: bool = True) -> dict:
     """
-    Charge un message chiffré depuis un fichier JSON
+    Suite de benchmarks statistiquement exploitable
+    
+    Couvre le chiffrement et le déchiffrement AEAD (AES-GCM, ChaCha20-Poly1305,
+    AES-GCM-SIV si disponible) pour chaque taille, la dérivation PBKDF2 et
+    les fonctions fichiers (lecture/écriture disque comprises).
     
     Args:
-        fichier: Chemin du fichier JSON
+        tailles: Tailles de charge en octets (défaut: 16 o à 1 Go)
+        taille_max: Ignorer les tailles au-delà (limiter la mémoire)
+        repetitions: Répétitions imposées (défaut: automatique)
+        echauffement: Nombre d'exécutions non mesurées
+        fichier_json: Fichier où écrire les résultats (comparaison entre exécutions)
+        afficher: Afficher un tableau des résultats
         
     Returns:
-        Tuple[dict, bytes]: (donnees_chiffrees, cle)
+        dict: {'meta': {...}, 'resultats': [...]}
     """
-    with open(fichier, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Reconstruire les données
-    donnees_chiffrees = {
-        'chiffre': base64.b64decode(data['chiffre']),
-        'nonce': base64.b64decode(data['nonce']),
-        'aad': data.get('aad')
-    }
-    
-    cle = base64.b64decode(data['cle'])
-    
-    return donnees_chiffrees, cle
-
-
-def lister_messages_sauvegardes() -> list:
-    """Liste tous les messages chiffrés sauvegardés"""
-    fichiers = list(SAVE_DIR.glob("*.json"))
-    
-    messages = []
-    for f in fichiers:
-        try:
-            with open(f, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                messages.append({
-                    'fichier': f.name,
-                    'nom': data['nom'],
-                    'date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(data['timestamp']))
-                })
-        except:
-            pass
+    import platform
+    import tempfile
+    import cryptography
+    
+    tailles = [t for t in (tailles or TAILLES_BENCHMARK) if taille_max is None or t <= taille_max]
+    resultats = []
+    
+    def mesurer(operation: str, taille: int, fonction, reps=repetitions):
+        stats = _statistiques(operation, taille, _mesurer(fonction, reps, echauffement))
+        resultats.append(stats)
+        if afficher:
+            print(f"   {operation:<28} {_formater_taille(taille):>8}  "
+                  f"médiane {stats['median_ns'] / 1e3:>12.2f} µs  p99 {stats['p99_ns'] / 1e3:>12.2f} µs  "
+                  f"{stats['mo_s']:>9.1f} Mo/s  {stats['ops_s']:>11.0f} ops/s")
+    
+    if afficher:
+        print("\n" + "=" * 80)
+        print("⚡ SUITE DE BENCHMARKS")
+        print("=" * 80 + "\n")
     
-    return messages
-
-
-# ═══════════════════════════════════════════════════════════════════════════
-#                    NOUVELLES FONCTIONS V2.0 - GESTION CLÉS
-# ═══════════════════════════════════════════════════════════════════════════
-
-def sauvegarder_cle(nom: str, cle: bytes) -> str:
-    """Sauvegarde une clé dans un fichier"""
-    fichier = KEYS_DIR / f"{nom}.key"
+    cle = generer_cle_aleatoire()
+    nonce = secrets.token_bytes(NONCE_SIZE)
     
-    data = {
-        'nom': nom,
-        'cle': base64.b64encode(cle).decode('utf-8'),
-        'taille': len(cle) * 8,
-        'timestamp': time.time()
+    for nom, algorithme in _algorithmes_aead().items():
+        aead = algorithme(cle)
+        for taille in tailles:
+            donnees = secrets.token_bytes(taille) if taille <= 1024 ** 2 else bytes(taille)
+            chiffre = aead.encrypt(nonce, donnees, None)
+            mesurer(f"{nom}/chiffrer", taille, lambda: aead.encrypt(nonce, donnees, None))
+            mesurer(f"{nom}/dechiffrer", taille, lambda: aead.decrypt(nonce, chiffre, None))
+            del donnees, chiffre
+    
+    salt = secrets.token_bytes(SALT_SIZE)
+    mesurer(f"pbkdf2-sha256/{PBKDF2_ITERATIONS}", 0,
+            lambda: deriver_cle_depuis_mot_de_passe("mot de passe", salt),
+            reps=repetitions or 5)
+    
+    with tempfile.TemporaryDirectory() as dossier:
+        source = os.path.join(dossier, "source.bin")
+        chiffre = os.path.join(dossier, "source.bin.encrypted")
+        dechiffre = os.path.join(dossier, "source.bin.decrypted")
+        for taille in tailles:
+            with open(source, 'wb') as f:
+                f.write(bytes(taille))
+            mesurer("fichier/chiffrer", taille, lambda: chiffrer_fichier(source, cle, chiffre))
+            mesurer("fichier/dechiffrer", taille, lambda: dechiffrer_fichier(chiffre, cle, dechiffre))
+    
+    rapport = {
+        'meta': {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'hote': platform.node(),
+            'machine': platform.machine(),
+            'processeur': platform.processor(),
+            'coeurs': os.cpu_count(),
+            'python': platform.python_version(),
+            'cryptography': cryptography.__version__,
+        },
+        'resultats': resultats,
     }
     
-    with open(fichier, 'w') as f:
-        json.dump(data, f, indent=2)
+    if fichier_json:
+        with open(fichier_json, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2)
+        if afficher:
+            print(f"\n💾 Résultats écrits dans {fichier_json}")
     
-    return str(fichier)
+    return rapport
 
 
-def charger_cle(nom: str) -> bytes:
-    """Charge une clé depuis un fichier"""
-    fichier = KEYS_DIR / f"{nom}.key"
+def comparer_benchmarks(fichier_avant: str, fichier_apres: str, seuil: float = 0.05) -> List[dict]:
+    """
+    Compare deux exécutions de benchmark_suite() (médianes)
     
-    with open(fichier, 'r') as f:
-        data = json.load(f)
+    Args:
+        fichier_avant, fichier_apres: Fichiers JSON produits par benchmark_suite()
+        seuil: Variation relative en dessous de laquelle l'écart est ignoré
+        
+    Returns:
+        List[dict]: Une entrée par cas commun (operation, taille, rapport apres/avant)
+    """
+    with open(fichier_avant, 'r', encoding='utf-8') as f:
+        avant = {(r['operation'], r['taille']): r for r in json.load(f)['resultats']}
+    with open(fichier_apres, 'r', encoding='utf-8') as f:
+        apres = {(r['operation'], r['taille']): r for r in json.load(f)['resultats']}
+    
+    comparaison = []
+    for cas in sorted(avant.keys() & apres.keys()):
+        rapport = apres[cas]['median_ns'] / avant[cas]['median_ns']
+        comparaison.append({'operation': cas[0], 'taille': cas[1], 'rapport': rapport})
+        
+        if abs(rapport - 1) >= seuil:
+            sens = "🐢 plus lent" if rapport > 1 else "🚀 plus rapide"
+            print(f"   {cas[0]:<28} {_formater_taille(cas[1]):>8}  x{rapport:.2f} ({sens})")
     
-    return base64.b64decode(data['cle'])
+    return comparaison
 
 
-def lister_cles() -> list:
-    """Liste toutes les clés sauvegardées"""
-    fichiers = list(KEYS_DIR.glob("*.key"))
-    
-    cles = []
-    for f in fichiers:
-        try:
-            with open(f, 'r') as file:
-                data = json.load(file)
-                cles.append({
-                    'fichier': f.name,
-                    'nom': data['nom'],
-                    'taille': data['taille'],
-                    'date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(data['timestamp']))
-                })
-        except:
-            pass
-    
-    return cles
+def _formater_taille(octets: int) -> str:
+    for unite in ("o", "Ko", "Mo"):
+        if octets < 1024:
+            return f"{octets} {unite}"
+        octets //= 1024
+    return f"{octets} Go"
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -333,7 +4208,10 @@ def lister_cles() -> list:
 def benchmark_cesar_vs_aes():
     """
     Compare le temps de chiffrement César vs AES-GCM
-    Démontre la différence de performance
+    
+    Chaque chiffrement est mesuré avec perf_counter_ns, après échauffement
+    et sur de nombreuses répétitions: on compare des médianes, pas une
+    mesure unique (qui ne serait que du bruit).
     """
     print("\n" + "=" * 80)
     print("⚡ BENCHMARK: CÉSAR vs AES-256-GCM")
@@ -349,15 +4227,17 @@ def benchmark_cesar_vs_aes():
     print(f"\n🔄 CÉSAR:")
     print(f"   Algorithme: Substitution (k=3)")
     
-    start = time.time()
-    # Chiffrement César simple
-    cesar_chiffre = ''.join(
-        chr((ord(c) - ord('A') + 3) % 26 + ord('A')) if c.isalpha() else c
-        for c in message
-    )
-    temps_cesar = time.time() - start
+    def chiffrer_cesar():
+        return ''.join(
+            chr((ord(c) - ord('A') + 3) % 26 + ord('A')) if c.isalpha() else c
+            for c in message
+        )
     
-    print(f"   ⏱️  Temps de chiffrement: {temps_cesar*1000:.4f} ms")
+    cesar_chiffre = chiffrer_cesar()
+    stats_cesar = _statistiques("cesar", len(message), _mesurer(chiffrer_cesar))
+    temps_cesar = stats_cesar['median_ns'] / 1e6
+    
+    print(f"   ⏱️  Temps de chiffrement (médiane sur {stats_cesar['repetitions']}): {temps_cesar:.4f} ms")
     print(f"   🔑 Clés possibles: 26")
     print(f"   💥 Temps force brute: < 1 ms (TRIVIAL!)")
     
@@ -366,12 +4246,11 @@ def benchmark_cesar_vs_aes():
     print(f"   Algorithme: AES-256 + Galois Counter Mode")
     
     cle = generer_cle_aleatoire()
-    
-    start = time.time()
     donnees = chiffrer_aes_gcm(message, cle)
-    temps_aes = time.time() - start
+    stats_aes = _statistiques("aes-256-gcm", len(message), _mesurer(lambda: chiffrer_aes_gcm(message, cle)))
+    temps_aes = stats_aes['median_ns'] / 1e6
     
-    print(f"   ⏱️  Temps de chiffrement: {temps_aes*1000:.4f} ms")
+    print(f"   ⏱️  Temps de chiffrement (médiane sur {stats_aes['repetitions']}): {temps_aes:.4f} ms")
     print(f"   🔑 Clés possibles: 2^256 ≈ 10^77")
     print(f"   💪 Temps force brute: > Âge de l'univers (IMPOSSIBLE!)")
     
@@ -382,9 +4261,9 @@ def benchmark_cesar_vs_aes():
     
     rapport = temps_cesar / temps_aes if temps_aes > 0 else 0
     
-    print(f"\n⚡ Performance:")
-    print(f"   César:   {temps_cesar*1000:.4f} ms")
-    print(f"   AES-GCM: {temps_aes*1000:.4f} ms")
+    print(f"\n⚡ Performance (médiane, p99):")
+    print(f"   César:   {temps_cesar:.4f} ms (p99 {stats_cesar['p99_ns'] / 1e6:.4f} ms)")
+    print(f"   AES-GCM: {temps_aes:.4f} ms (p99 {stats_aes['p99_ns'] / 1e6:.4f} ms)")
     
     if rapport > 1:
         print(f"   → AES est {rapport:.1f}x plus RAPIDE!")
@@ -403,10 +4282,14 @@ def benchmark_cesar_vs_aes():
     print(f"   AES-GCM nonce:     {len(donnees['nonce'])} octets")
     
     print(f"\n💡 CONCLUSION:")
-    print(f"   ✅ AES-GCM est aussi rapide (voire plus rapide)")
+    if rapport > 1:
+        print(f"   ✅ AES-GCM (accéléré matériellement) est plus rapide que César en Python")
+    else:
+        print(f"   ✅ L'écart de performance est négligeable face à l'écart de sécurité")
     print(f"   ✅ AES-GCM est INFINIMENT plus sécurisé")
     print(f"   ✅ AES-GCM offre authentification (tag)")
     print(f"   → Aucune raison d'utiliser César!")
+    print(f"   → Pour des mesures détaillées: suite de benchmarks (menu 16)")
     
     print("\n" + "=" * 80)
 
@@ -481,6 +4364,54 @@ def demo_ecb_vs_gcm():
     print("\n" + "=" * 80)
 
 
+def demo_sessions_x25519(messages: int = 2000):
+    """
+    Échange de clés X25519 + AES-GCM: coût avec et sans cache de sessions
+    """
+    from cryptography.exceptions import InvalidTag
+    
+    print("\n" + "=" * 80)
+    print("🤝 DÉMONSTRATION: SESSIONS X25519 + HKDF + AES-GCM")
+    print("=" * 80)
+    
+    alice, bob = SessionsX25519(), SessionsX25519()
+    print(f"\n🔑 Alice: {alice.publique.hex()[:32]}...")
+    print(f"🔑 Bob:   {bob.publique.hex()[:32]}...")
+    
+    donnees = alice.chiffrer("Bonjour Bob, c'est Alice", bob.publique)
+    print(f"\n📨 Alice → Bob: {donnees['chiffre'].hex()[:48]}...")
+    print(f"📬 Bob lit: {bob.dechiffrer(donnees)}")
+    
+    # Expéditeur usurpé: la clé de session ne correspond plus
+    eve = SessionsX25519()
+    falsifie = dict(donnees, expediteur=eve.publique)
+    try:
+        bob.dechiffrer(falsifie)
+        print("❌ Message usurpé accepté!")
+    except InvalidTag:
+        print("✅ Message prétendument envoyé par Ève: rejeté")
+    
+    # Message capturé puis renvoyé: numéro de séquence déjà vu
+    try:
+        bob.dechiffrer(donnees)
+        print("❌ Message rejoué accepté!")
+    except ValueError:
+        print("✅ Message rejoué: rejeté")
+    
+    print(f"\n⏱️  {messages} messages Alice → Bob:")
+    for nom, ttl in (("Sans cache (échange à chaque message)", 0.0), ("Avec cache de sessions", SESSION_TTL)):
+        alice, bob = SessionsX25519(ttl=ttl), SessionsX25519(ttl=ttl)
+        debut = time.perf_counter()
+        for i in range(messages):
+            bob.dechiffrer(alice.chiffrer(f"message {i}", bob.publique))
+        duree = time.perf_counter() - debut
+        print(f"   {nom:<40} {messages / duree:>9.0f} msg/s ({alice.echanges + bob.echanges} opérations X25519)")
+    
+    print("\n💡 L'échange de clés coûte plus cher que le chiffrement lui-même:")
+    print("   on le fait une fois par session, pas une fois par message.")
+    print("\n" + "=" * 80)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 #                    MODES INTERACTIFS V2.0
 # ═══════════════════════════════════════════════════════════════════════════
@@ -526,9 +4457,9 @@ def mode_chiffrer_interactif():
     aad = input("\n📋 Données additionnelles (optionnel, appuyez sur ENTRÉE pour passer): ").strip()
     aad = aad if aad else None
     
-    # Chiffrer
+    # Chiffrer (AEAD le plus rapide sur cet hôte)
     print(f"\n🔒 Chiffrement en cours...")
-    donnees = chiffrer_aes_gcm(message, cle, aad)
+    donnees = chiffrer_message(message, cle, aad)
     
     print("\n" + "=" * 80)
     print("✅ MESSAGE CHIFFRÉ")
@@ -540,6 +4471,8 @@ def mode_chiffrer_interactif():
     print(f"\n🎲 Nonce:")
     print(f"   {base64.b64encode(donnees['nonce']).decode('utf-8')}")
     
+    print(f"\n⚙️  Algorithme: {ALGORITHMES[donnees['algo']]}")
+    
     if aad:
         print(f"\n📋 AAD:")
         print(f"   {aad}")
@@ -561,6 +4494,8 @@ def mode_chiffrer_interactif():
 
 def mode_dechiffrer_interactif():
     """Mode interactif pour déchiffrer un message"""
+    from cryptography.exceptions import InvalidTag
+    
     print("\n" + "=" * 80)
     print("🔓 MODE INTERACTIF: DÉCHIFFRER UN MESSAGE")
     print("=" * 80)
@@ -587,8 +4522,7 @@ def mode_dechiffrer_interactif():
         idx = int(input(f"\n👉 Choisir (1-{len(messages)}): ")) - 1
         
         if 0 <= idx < len(messages):
-            fichier = SAVE_DIR / messages[idx]['fichier']
-            donnees, cle = charger_message_chiffre(fichier)
+            donnees, cle = charger_message_chiffre(messages[idx]['nom'])
             print(f"✅ Message chargé!")
         else:
             print("❌ Choix invalide!")
@@ -600,10 +4534,13 @@ def mode_dechiffrer_interactif():
         nonce_b64 = input("🎲 Nonce (Base64): ").strip()
         aad = input("📋 AAD (optionnel): ").strip()
         
+        algo = input(f"⚙️  Algorithme ({' / '.join(ALGORITHMES.values())}, ENTRÉE = aes-256-gcm): ").strip()
+        
         donnees = {
             'chiffre': base64.b64decode(chiffre_b64),
             'nonce': base64.b64decode(nonce_b64),
-            'aad': aad if aad else None
+            'aad': aad if aad else None,
+            'algo': next((a for a, n in ALGORITHMES.items() if n == algo), ALGO_AES_GCM)
         }
         
         # Clé
@@ -673,11 +4610,13 @@ def mode_chiffrer_fichier():
         cle_b64 = input("🔑 Clé (Base64): ").strip()
         cle = base64.b64decode(cle_b64)
     
+    compresser = input("🗜️  Compresser avant de chiffrer? (o/N): ").strip().lower() == 'o'
+    
     # Chiffrer
     print(f"\n🔒 Chiffrement en cours...")
     
     try:
-        fichier_chiffre = chiffrer_fichier(fichier, cle)
+        fichier_chiffre = chiffrer_fichier(fichier, cle, compression='auto' if compresser else None)
         
         print(f"\n✅ FICHIER CHIFFRÉ:")
         print(f"   Original: {fichier}")
@@ -690,6 +4629,8 @@ def mode_chiffrer_fichier():
 
 def mode_dechiffrer_fichier():
     """Mode pour déchiffrer un fichier"""
+    from cryptography.exceptions import InvalidTag
+    
     print("\n" + "=" * 80)
     print("🔓 DÉCHIFFREMENT DE FICHIER")
     print("=" * 80)
@@ -749,6 +4690,76 @@ def mode_dechiffrer_fichier():
         print(f"❌ ERREUR: {e}")
 
 
+def mode_traiter_plusieurs_fichiers():
+    """Mode pour chiffrer/déchiffrer plusieurs fichiers en parallèle (asyncio)"""
+    print("\n" + "=" * 80)
+    print("📁 CHIFFREMENT/DÉCHIFFREMENT DE PLUSIEURS FICHIERS")
+    print("=" * 80)
+    
+    print(f"\n📄 Chemins des fichiers (un par ligne, ligne vide pour terminer):")
+    fichiers = []
+    while True:
+        ligne = input("   > ").strip()
+        if not ligne:
+            break
+        if os.path.exists(ligne):
+            fichiers.append(ligne)
+        else:
+            print(f"   ❌ Fichier introuvable: {ligne}")
+    
+    if not fichiers:
+        print("❌ Aucun fichier!")
+        return
+    
+    dechiffrer = input("\n🔓 Déchiffrer au lieu de chiffrer? (o/n): ").strip().lower() == 'o'
+    cle = base64.b64decode(input("🔑 Clé (Base64): ").strip())
+    
+    print(f"\n⚙️  Traitement de {len(fichiers)} fichier(s)...")
+    debut = time.perf_counter()
+    resultats = traiter_fichiers(fichiers, cle, dechiffrer)
+    duree = time.perf_counter() - debut
+    
+    for fichier, resultat in resultats.items():
+        if isinstance(resultat, Exception):
+            print(f"   ❌ {fichier}: {resultat}")
+        else:
+            print(f"   ✅ {fichier} → {resultat}")
+    
+    print(f"\n⏱️  Durée totale: {duree:.2f} s")
+
+
+def mode_chiffrer_repertoire():
+    """Mode pour chiffrer une arborescence complète (reprise possible)"""
+    print("\n" + "=" * 80)
+    print("🗂️  CHIFFREMENT D'UN RÉPERTOIRE")
+    print("=" * 80)
+    
+    racine = input("\n📂 Répertoire à chiffrer: ").strip()
+    
+    if not os.path.isdir(racine):
+        print(f"❌ Répertoire introuvable: {racine}")
+        return
+    
+    destination = input("📁 Répertoire de sortie (ENTRÉE = <répertoire>.encrypted): ").strip() or None
+    cle = base64.b64decode(input("🔑 Clé (Base64): ").strip())
+    
+    print(f"\n🔒 Chiffrement en cours (relancer reprend là où on s'est arrêté)...")
+    chiffrer_repertoire(racine, cle, destination)
+
+
+def mode_benchmark_suite():
+    """Mode pour lancer la suite de benchmarks"""
+    print("\n" + "=" * 80)
+    print("⚡ SUITE DE BENCHMARKS")
+    print("=" * 80)
+    
+    taille_max = input("\n📏 Taille maximale en Mo (ENTRÉE = 64, 1024 = suite complète): ").strip()
+    taille_max = int(taille_max or 64) * 1024 ** 2
+    fichier_json = input("💾 Fichier JSON de résultats (optionnel): ").strip() or None
+    
+    benchmark_suite(taille_max=taille_max, fichier_json=fichier_json)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 #                    DÉMONSTRATIONS V1.0 (CONSERVÉES)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -812,6 +4823,8 @@ def demo_mot_de_passe():
 
 def demo_detection_alteration():
     """Démo détection - Version V1.0"""
+    from cryptography.exceptions import InvalidTag
+    
     print("\n" + "=" * 80)
     print("🎯 DÉMO 3: DÉTECTION D'ALTÉRATION")
     print("=" * 80)
@@ -911,16 +4924,20 @@ def afficher_menu():
 3️⃣  - Démo 3: Détection altération
 4️⃣  - Démo 4: Unicité du nonce
 5️⃣  - Toutes les démos
+1️⃣7️⃣ - Échange de clés X25519 (sessions en cache)
 
 🎮 MODES INTERACTIFS:
 6️⃣  - Chiffrer un message (vous choisissez)
 7️⃣  - Déchiffrer un message
 8️⃣  - Chiffrer un fichier
 9️⃣  - Déchiffrer un fichier
+1️⃣4️⃣ - Chiffrer/déchiffrer plusieurs fichiers (parallèle)
+1️⃣5️⃣ - Chiffrer un répertoire complet (reprise possible)
 
 📊 COMPARAISONS ET BENCHMARKS:
 🔟 - Benchmark César vs AES-GCM
 1️⃣1️⃣ - Comparaison ECB vs GCM
+1️⃣6️⃣ - Suite de benchmarks (percentiles, Mo/s, JSON)
 
 💾 GESTION:
 1️⃣2️⃣ - Lister messages sauvegardés
@@ -980,6 +4997,14 @@ def main():
                 print(f"\n🔑 Clés sauvegardées ({len(cles)}):")
                 for cle in cles:
                     print(f"   • {cle['nom']} ({cle['taille']} bits) - {cle['date']}")
+            elif choix == "14":
+                mode_traiter_plusieurs_fichiers()
+            elif choix == "15":
+                mode_chiffrer_repertoire()
+            elif choix == "16":
+                mode_benchmark_suite()
+            elif choix == "17":
+                demo_sessions_x25519()
             elif choix == "0":
                 print("\n" + "=" * 80)
                 print("👋 Au revoir!")
@@ -1002,7 +5027,283 @@ def main():
             input("\n⏎ Appuyez sur ENTRÉE pour continuer...")
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+#                    INTERFACE EN LIGNE DE COMMANDE V2.1
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _cle_depuis_arguments(args, descripteur: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+    """
+    Clé à utiliser: --key (Base64), --key-name (trousseau), --password,
+    ou les variables d'environnement TP4_CLE / TP4_MOT_DE_PASSE
+    
+    Returns:
+        Tuple[bytes, Optional[str]]: (clé, descripteur du KDF si dérivée d'un mot de passe)
+    """
+    if args.key_name:
+        return charger_cle(args.key_name), None
+    
+    cle_b64 = args.key or os.environ.get('TP4_CLE')
+    if cle_b64:
+        return base64.b64decode(cle_b64), None
+    
+    mot_de_passe = args.password or os.environ.get('TP4_MOT_DE_PASSE')
+    if mot_de_passe:
+        if descripteur is None and getattr(args, 'salt', None):
+            # Salt seul (V2.1 antérieure): PBKDF2 à PBKDF2_ITERATIONS
+            descripteur = _encoder_descripteur_kdf({'kdf': 'pbkdf2', 'iterations': PBKDF2_ITERATIONS},
+                                                   base64.b64decode(args.salt))
+        return deriver_cle(mot_de_passe, descripteur)
+    
+    raise ValueError("Aucune clé: utiliser --key, --key-name, --password, TP4_CLE ou TP4_MOT_DE_PASSE")
+
+
+def _cli_encrypt(args) -> int:
+    message = args.message if args.message is not None else sys.stdin.read()
+    cle, descripteur = _cle_depuis_arguments(args)
+    donnees = chiffrer_message(message, cle, args.aad)
+    
+    if args.save:
+        sauvegarder_message_chiffre(args.save, donnees, cle)
+    
+    sortie = {
+        'chiffre': base64.b64encode(donnees['chiffre']).decode('utf-8'),
+        'nonce': base64.b64encode(donnees['nonce']).decode('utf-8'),
+        'aad': donnees['aad'],
+        'algo': ALGORITHMES[donnees['algo']],
+    }
+    if descripteur is not None:
+        sortie['kdf'] = descripteur
+    
+    print(json.dumps(sortie))
+    return 0
+
+
+def _message_depuis_json(chemin: Optional[str]) -> Tuple[dict, Optional[str]]:
+    """Lit un message produit par `encrypt` (fichier ou stdin): (donnees, descripteur du KDF)"""
+    with (open(chemin, 'r', encoding='utf-8') if chemin else sys.stdin) as f:
+        entree = json.load(f)
+    donnees = {
+        'chiffre': base64.b64decode(entree['chiffre']),
+        'nonce': base64.b64decode(entree['nonce']),
+        'aad': entree.get('aad'),
+        'algo': next((a for a, n in ALGORITHMES.items() if n == entree.get('algo')), ALGO_AES_GCM),
+    }
+    descripteur = entree.get('kdf')
+    if descripteur is None and entree.get('salt'):
+        # Salt seul (V2.1 antérieure): PBKDF2 à PBKDF2_ITERATIONS
+        descripteur = _encoder_descripteur_kdf({'kdf': 'pbkdf2', 'iterations': PBKDF2_ITERATIONS},
+                                               base64.b64decode(entree['salt']))
+    return donnees, descripteur
+
+
+def _cli_decrypt(args) -> int:
+    if args.load:
+        donnees, cle = charger_message_chiffre(args.load)
+        if args.key or args.key_name or args.password:
+            cle, _ = _cle_depuis_arguments(args)
+    else:
+        donnees, descripteur = _message_depuis_json(args.input)
+        cle, _ = _cle_depuis_arguments(args, descripteur)
+    
+    sys.stdout.write(dechiffrer_message(donnees, cle))
+    if sys.stdout.isatty():
+        sys.stdout.write("\n")
+    return 0
+
+
+def _cli_fichiers(args, dechiffrer: bool) -> int:
+    cle, descripteur = _cle_depuis_arguments(args)
+    if descripteur is not None:
+        raise ValueError("Fichiers: utiliser une clé (--key, --key-name ou TP4_CLE), pas un mot de passe")
+    
+    if len(args.fichiers) == 1:
+        if dechiffrer:
+            print(dechiffrer_fichier(args.fichiers[0], cle, args.output))
+        else:
+            print(chiffrer_fichier(args.fichiers[0], cle, args.output, args.compress))
+        return 0
+    
+    if args.output:
+        raise ValueError("--output n'est possible qu'avec un seul fichier")
+    
+    code = 0
+    compression = None if dechiffrer else args.compress
+    for fichier, resultat in traiter_fichiers(args.fichiers, cle, dechiffrer, args.jobs, compression).items():
+        if isinstance(resultat, Exception):
+            print(f"{fichier}: {resultat}", file=sys.stderr)
+            code = 1
+        else:
+            print(resultat)
+    return code
+
+
+def _cli_verify(args) -> int:
+    cle, descripteur = _cle_depuis_arguments(args)
+    if descripteur is not None:
+        raise ValueError("Audit: utiliser une clé (--key, --key-name ou TP4_CLE), pas un mot de passe")
+    
+    code = 0
+    for chemin in args.chemins:
+        stats = auditer_repertoire(chemin, cle, args.pattern, args.jobs, afficher=not args.quiet)
+        if stats['echecs']:
+            code = 1
+            if args.quiet:
+                for relatif, _ in stats['echecs']:
+                    print(os.path.join(chemin, relatif) if os.path.isdir(chemin) else chemin)
+    return code
+
+
+def _cli_scan_nonces(args) -> int:
+    resultat = detecter_reutilisation_nonces(chemins=args.chemins, motif=args.pattern)
+    return 1 if resultat['reutilisations'] else 0
+
+
+def _cli_kdf_calibrate(args) -> int:
+    parametres = calibrer_kdf(args.target_ms, args.kdf)
+    print(json.dumps(parametres))
+    return 0
+
+
+def _cli_crack_bench(args) -> int:
+    entropies = args.entropy or (20, 30, 40, 50, 60, 80)
+    if args.wordlist is None:
+        benchmark_attaque_dictionnaire(args.limit or 64, workers=args.jobs)
+        return 0
+    
+    if args.input and args.input.endswith('.json'):
+        cible, descripteur = _message_depuis_json(args.input)
+    else:
+        cible, descripteur = args.input, None
+    descripteur = args.kdf or descripteur
+    if args.input is None or descripteur is None:
+        raise ValueError("--wordlist demande --input (message JSON, ou fichier chiffré avec --kdf)")
+    
+    with open(args.wordlist, 'r', encoding='utf-8', errors='replace') as mots:
+        resultat = attaque_dictionnaire(cible, mots, descripteur, args.jobs, args.limit, entropies=entropies)
+    return 1 if resultat['trouve'] is not None else 0
+
+
+def _cli_keygen(args) -> int:
+    cle = generer_cle_aleatoire()
+    if args.name:
+        sauvegarder_cle(args.name, cle)
+    print(base64.b64encode(cle).decode('utf-8'))
+    return 0
+
+
+def _cli_bench(args) -> int:
+    benchmark_suite(taille_max=args.max_size * 1024 ** 2, repetitions=args.repetitions,
+                    fichier_json=args.json)
+    return 0
+
+
+def main_cli(argv: List[str]) -> int:
+    """
+    Interface non interactive (scripts shell)
+    
+    Avec `python3 -m`, Python réutilise le bytecode en cache (__pycache__)
+    au lieu de recompiler le script à chaque appel: démarrage plus rapide.
+    
+    Exemples:
+        python3 -m tp4_cryptography keygen --name sauvegarde
+        echo "secret" | python3 -m tp4_cryptography encrypt --key-name sauvegarde > msg.json
+        python3 -m tp4_cryptography decrypt --key-name sauvegarde --input msg.json
+        python3 -m tp4_cryptography encrypt-file --key "$CLE" a.txt b.txt
+        python3 -m tp4_cryptography encrypt-file --key "$CLE" --compress lzma app.log
+        python3 -m tp4_cryptography verify --key "$CLE" archive.encrypted/
+        python3 -m tp4_cryptography bench --max-size 16 --json bench.json
+        python3 -m tp4_cryptography crack-bench --input msg.json --wordlist rockyou.txt
+    
+    Returns:
+        int: Code de sortie (0 = succès)
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="tp4_cryptography.py",
+                                     description="TP4 - Cryptographie moderne (mode non interactif)")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    
+    def options_cle(sous_parser):
+        sous_parser.add_argument('--key', help="Clé en Base64 (ou variable TP4_CLE)")
+        sous_parser.add_argument('--key-name', help="Nom de la clé dans le trousseau")
+        sous_parser.add_argument('--password', help="Mot de passe (ou variable TP4_MOT_DE_PASSE)")
+    
+    p = commandes.add_parser('encrypt', help="Chiffrer un message (stdin ou --message), sortie JSON")
+    options_cle(p)
+    p.add_argument('--message', help="Message (défaut: lu sur stdin)")
+    p.add_argument('--aad', help="Données additionnelles authentifiées")
+    p.add_argument('--save', metavar='NOM', help="Sauvegarder aussi dans le magasin")
+    p.set_defaults(fonction=_cli_encrypt)
+    
+    p = commandes.add_parser('decrypt', help="Déchiffrer un message JSON (stdin, --input ou --load)")
+    options_cle(p)
+    p.add_argument('--salt', help="Salt en Base64 (ancien JSON sans champ 'kdf')")
+    p.add_argument('--input', help="Fichier JSON produit par encrypt")
+    p.add_argument('--load', metavar='NOM', help="Message sauvegardé dans le magasin")
+    p.set_defaults(fonction=_cli_decrypt)
+    
+    for nom, dechiffrer in (('encrypt-file', False), ('decrypt-file', True)):
+        p = commandes.add_parser(nom, help=f"{'Déchiffrer' if dechiffrer else 'Chiffrer'} un ou plusieurs fichiers")
+        options_cle(p)
+        p.add_argument('fichiers', nargs='+')
+        p.add_argument('-o', '--output', help="Fichier de sortie (un seul fichier en entrée)")
+        p.add_argument('-j', '--jobs', type=int, default=8, help="Fichiers traités en parallèle")
+        if not dechiffrer:
+            p.add_argument('--compress', nargs='?', const='auto', choices=['auto', *COMPRESSIONS],
+                           help="Compresser avant chiffrement (ignoré si déjà compressé)")
+        p.set_defaults(fonction=lambda args, d=dechiffrer: _cli_fichiers(args, d))
+    
+    p = commandes.add_parser('verify', help="Vérifier l'intégrité de fichiers chiffrés (rien n'est écrit)")
+    options_cle(p)
+    p.add_argument('chemins', nargs='+', help="Fichiers ou répertoires")
+    p.add_argument('--pattern', default="*.encrypted", help="Motif des fichiers à vérifier (défaut: *.encrypted)")
+    p.add_argument('-j', '--jobs', type=int, help="Threads (défaut: nombre de cœurs)")
+    p.add_argument('-q', '--quiet', action='store_true', help="N'afficher que les chemins en échec")
+    p.set_defaults(fonction=_cli_verify)
+    
+    p = commandes.add_parser('scan-nonces', help="Rechercher les nonces réutilisés (magasin et fichiers)")
+    p.add_argument('chemins', nargs='*', help="Fichiers ou répertoires chiffrés à inclure")
+    p.add_argument('--pattern', default="*.encrypted", help="Motif des fichiers (défaut: *.encrypted)")
+    p.set_defaults(fonction=_cli_scan_nonces)
+    
+    p = commandes.add_parser('kdf-calibrate', help="Calibrer le KDF des mots de passe pour cet hôte")
+    p.add_argument('--target-ms', type=float, default=KDF_LATENCE_CIBLE_MS,
+                   help=f"Latence visée par dérivation (défaut: {KDF_LATENCE_CIBLE_MS} ms)")
+    p.add_argument('--kdf', choices=['pbkdf2', 'scrypt'], default='pbkdf2')
+    p.set_defaults(fonction=_cli_kdf_calibrate)
+    
+    p = commandes.add_parser('crack-bench', help="Attaque par dictionnaire (audit du coût du KDF)")
+    p.add_argument('--input', help="Message JSON (encrypt --password) ou fichier chiffré")
+    p.add_argument('--kdf', help="Descripteur du KDF de la cible (si absent du JSON)")
+    p.add_argument('--wordlist', help="Liste de mots (sans liste: mesure du débit seulement)")
+    p.add_argument('--limit', type=int, help="Nombre maximum d'essais")
+    p.add_argument('--entropy', type=float, nargs='+', help="Entropies (bits) pour la projection")
+    p.add_argument('-j', '--jobs', type=int, help="Processus (défaut: nombre de cœurs)")
+    p.set_defaults(fonction=_cli_crack_bench)
+    
+    p = commandes.add_parser('keygen', help="Générer une clé AES-256 (Base64 sur stdout)")
+    p.add_argument('--name', help="Sauvegarder la clé dans le trousseau sous ce nom")
+    p.set_defaults(fonction=_cli_keygen)
+    
+    p = commandes.add_parser('bench', help="Suite de benchmarks")
+    p.add_argument('--max-size', type=int, default=64, help="Taille maximale en Mo (défaut: 64)")
+    p.add_argument('--repetitions', type=int, help="Répétitions imposées (défaut: automatique)")
+    p.add_argument('--json', help="Fichier JSON de résultats")
+    p.set_defaults(fonction=_cli_bench)
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        return args.fonction(args)
+    except Exception as e:
+        print(f"❌ ERREUR: {e}", file=sys.stderr)
+        return 1
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main_cli(sys.argv[1:]))
+    
     try:
         main()
     except KeyboardInterrupt:
@@ -0,0 +1,1018 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+═══════════════════════════════════════════════════════════════════════════
+    TP3 - VISUALISATION DE LA FAILLE ECB (version Python)
+    Module: Fondamentaux de la Sécurité et Cryptographie
+    ISGA Marrakech
+    
+    Auteur: Farah El Alem
+═══════════════════════════════════════════════════════════════════════════
+
+Même expérience que tp3_ecb_penguin.sh, sans head/tail/openssl/cat ni
+fichiers intermédiaires:
+
+✅ Lecture du vrai en-tête BMP (début des pixels, lignes complétées à 4 octets)
+✅ Chiffrement des pixels en ECB, CBC, CTR ou GCM, en un seul passage
+✅ Images de plusieurs centaines de Mo en mémoire constante
+✅ Traitement d'un répertoire d'images sur un pool de processus
+✅ Détection du mode ECB (blocs chiffrés répétés) dans n'importe quel fichier
+✅ Reconstruction automatique d'une image chiffrée en ECB (sans la clé)
+
+Exemples:
+    python3 tp3_ecb.py encrypt tux.bmp --mode ecb cbc
+    python3 tp3_ecb.py encrypt images/ -o chiffrees/ --mode ecb -j 8
+    python3 tp3_ecb.py decrypt tux_cbc.bmp --key 31323334353637383930313233343536
+    python3 tp3_ecb.py detect archives/ --pattern "*.enc" -j 8
+    python3 tp3_ecb.py reconstruct tux_ecb.bmp
+"""
+
+import os
+import sys
+import math
+import time
+import struct
+import secrets
+from pathlib import Path
+from typing import Tuple, Optional, Iterable, List
+
+# cryptography est importé à la première utilisation (démarrage rapide)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Clé du script shell: "1234567890123456" (AES-128)
+CLE_DEMO = bytes.fromhex("31323334353637383930313233343536")
+BLOC_AES = 16
+
+MODES = ('ecb', 'cbc', 'ctr', 'gcm')
+
+# En-têtes BMP (little-endian)
+BMP_ENTETE_FICHIER = struct.Struct("<2sIHHI")    # "BM", taille, réservé x2, début des pixels
+BMP_TAILLE_DIB = struct.Struct("<I")
+BMP_ENTETE_CORE = struct.Struct("<HHHH")         # BITMAPCOREHEADER (12 octets): largeur, hauteur, plans, bits/pixel
+BMP_ENTETE_INFO = struct.Struct("<iiHHI")        # BITMAPINFOHEADER et suivants: largeur, hauteur, plans, bits/pixel, compression
+
+# Bloc ajouté en fin d'image chiffrée: de quoi la déchiffrer (mode, IV/nonce, tag GCM)
+# Les visionneuses ignorent les octets après les pixels: l'image reste affichable.
+ANNEXE_MAGIC = b"TP3E"
+ANNEXE = struct.Struct(">4sB16s16s")             # magic, mode, IV (ou nonce GCM sur 12 octets), tag
+
+# Lecture par blocs (multiple de 16): mémoire constante quelle que soit l'image
+FLUX_BLOC_TAILLE = 1024 * 1024
+
+# Détection ECB
+ECB_MELANGE = 0x9E3779B97F4A7C15                 # Constante multiplicative (nombre d'or) des empreintes de blocs
+ECB_LOT_BLOCS = 1 << 20                          # Empreintes calculées par lots de 16 Mo
+ECB_ECHANTILLON_TAILLE = 4 * 1024 * 1024         # Échantillon pour trouver l'alignement des blocs
+ECB_SCORE_MIN = 0.001                            # Part de blocs répétés en dessous de laquelle rien n'est signalé
+ECB_REPETES_MAX = 4096                           # Blocs répétés (les plus fréquents) examinés un à un
+ECB_ENTROPIE_TOLERANCE = 0.5                     # Écart toléré (bits/octet) avec 16 octets aléatoires
+ECB_IMPRIMABLES_MAX = 11                         # Octets de texte ASCII tolérés dans un bloc chiffré (5,9 en moyenne)
+ECB_ALEATOIRES_PART = 0.5                        # Part des répétitions dues à des blocs d'aspect aléatoire
+
+# Reconstruction d'images ECB
+RECONSTRUCTION_COULEURS = 255                    # Classes de blocs colorées (les autres en gris)
+RECONSTRUCTION_LOT_PIXELS = 4 * 1024 * 1024      # Pixels reconstruits par lot de lignes
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           LECTURE DE L'EN-TÊTE BMP
+# ═══════════════════════════════════════════════════════════════════════════
+
+def lire_entete_bmp(f) -> dict:
+    """
+    Analyse l'en-tête d'une image BMP
+    
+    Le script shell suppose 54 octets d'en-tête; en réalité les pixels
+    commencent à l'offset indiqué dans l'en-tête (palette, en-têtes V4/V5...)
+    et chaque ligne est complétée pour faire un multiple de 4 octets.
+    
+    Args:
+        f: Fichier ouvert en binaire, positionné au début
+    
+    Returns:
+        dict: largeur, hauteur, bits_pixel, compression, debut_pixels,
+              taille_ligne (avec complément), taille_pixels et de_haut_en_bas
+    """
+    entete = f.read(BMP_ENTETE_FICHIER.size + BMP_TAILLE_DIB.size)
+    if len(entete) < BMP_ENTETE_FICHIER.size + BMP_TAILLE_DIB.size:
+        raise ValueError("Fichier trop court pour être une image BMP")
+    
+    signature, _, _, _, debut_pixels = BMP_ENTETE_FICHIER.unpack_from(entete)
+    if signature != b"BM":
+        raise ValueError("Ce n'est pas une image BMP (signature 'BM' absente)")
+    
+    taille_dib, = BMP_TAILLE_DIB.unpack_from(entete, BMP_ENTETE_FICHIER.size)
+    if taille_dib == 12:
+        largeur, hauteur, _, bits_pixel = BMP_ENTETE_CORE.unpack(f.read(BMP_ENTETE_CORE.size))
+        compression = 0
+    elif taille_dib >= 40:
+        largeur, hauteur, _, bits_pixel, compression = BMP_ENTETE_INFO.unpack(f.read(BMP_ENTETE_INFO.size))
+    else:
+        raise ValueError(f"En-tête BMP inconnu ({taille_dib} octets)")
+    
+    if largeur <= 0 or hauteur == 0 or bits_pixel not in (1, 2, 4, 8, 16, 24, 32):
+        raise ValueError(f"En-tête BMP invalide ({largeur}x{hauteur}, {bits_pixel} bits)")
+    
+    # Hauteur négative: lignes stockées de haut en bas
+    taille_ligne = (bits_pixel * largeur + 31) // 32 * 4
+    return {
+        'largeur': largeur,
+        'hauteur': abs(hauteur),
+        'bits_pixel': bits_pixel,
+        'compression': compression,
+        'debut_pixels': debut_pixels,
+        'taille_ligne': taille_ligne,
+        'taille_pixels': taille_ligne * abs(hauteur),
+        'de_haut_en_bas': hauteur < 0,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           CHIFFREMENT DES PIXELS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _contexte(mode: str, cle: bytes, iv: bytes, dechiffrer: bool, tag: Optional[bytes] = None):
+    """Chiffreur (ou déchiffreur) AES en flux pour le mode demandé"""
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    
+    if mode == 'ecb':
+        mode_aes = modes.ECB()
+    elif mode == 'cbc':
+        mode_aes = modes.CBC(iv)
+    elif mode == 'ctr':
+        mode_aes = modes.CTR(iv)
+    elif mode == 'gcm':
+        mode_aes = modes.GCM(iv[:12], tag)
+    else:
+        raise ValueError(f"Mode inconnu: {mode} (modes: {', '.join(MODES)})")
+    
+    chiffre = Cipher(algorithms.AES(cle), mode_aes)
+    return chiffre.decryptor() if dechiffrer else chiffre.encryptor()
+
+
+def _traiter_pixels(source: str, destination: str, cle: bytes, mode: str, iv: bytes,
+                    dechiffrer: bool, tag: Optional[bytes] = None, fin: Optional[int] = None) -> Optional[bytes]:
+    """
+    Recopie l'image en (dé)chiffrant le tableau de pixels, en un seul passage
+    
+    Un tampon de lecture et un tampon de sortie sont alloués une fois puis
+    réutilisés: chaque bloc est lu avec readinto(), (dé)chiffré avec
+    update_into() via des memoryviews et écrit, sans copie intermédiaire.
+    
+    ECB et CBC n'opèrent que sur des blocs complets de 16 octets: si le
+    tableau de pixels n'est pas aligné, les derniers octets (moins de 16)
+    restent en clair, pour garder exactement la taille et le format de
+    l'image (le script shell ajoutait un bloc de bourrage).
+    
+    Args:
+        fin: Fin des données de l'image (défaut: fin du fichier)
+    
+    Returns:
+        bytes: Tag GCM (chiffrement en mode GCM), sinon None
+    """
+    with open(source, 'rb') as entree:
+        info = lire_entete_bmp(entree)
+        if info['compression'] not in (0, 3, 6):
+            raise ValueError("Image BMP compressée (RLE/JPEG/PNG): les pixels ne sont pas un tableau brut")
+        
+        taille_fichier = os.fstat(entree.fileno()).st_size if fin is None else fin
+        debut = info['debut_pixels']
+        taille = min(info['taille_pixels'], taille_fichier - debut)
+        if taille <= 0:
+            raise ValueError("Image BMP tronquée (pas de pixels)")
+        if mode in ('ecb', 'cbc'):
+            taille -= taille % BLOC_AES
+        
+        contexte = _contexte(mode, cle, iv, dechiffrer, tag)
+        if mode == 'gcm':
+            # En-tête authentifié: une image dont on modifie les dimensions est rejetée
+            entree.seek(0)
+            contexte.authenticate_additional_data(entree.read(debut))
+        
+        tampon = bytearray(FLUX_BLOC_TAILLE)
+        sortie_tampon = bytearray(FLUX_BLOC_TAILLE + BLOC_AES - 1)
+        vue, vue_sortie = memoryview(tampon), memoryview(sortie_tampon)
+        
+        with open(destination, 'wb') as sortie:
+            # En-tête (et palette) recopiés tels quels
+            entree.seek(0)
+            sortie.write(entree.read(debut))
+            
+            restant = taille
+            while restant:
+                n = entree.readinto(vue[:min(restant, FLUX_BLOC_TAILLE)])
+                if not n:
+                    raise ValueError("Image BMP tronquée")
+                m = contexte.update_into(vue[:n], vue_sortie)
+                sortie.write(vue_sortie[:m])
+                restant -= n
+            
+            # Finalisation: le tag GCM est vérifié ici (déchiffrement)
+            sortie.write(contexte.finalize())
+            
+            # Reste de l'image (octets non alignés, profil ICC...) recopié tel quel
+            restant = taille_fichier - debut - taille
+            while restant:
+                n = entree.readinto(vue[:min(restant, FLUX_BLOC_TAILLE)])
+                if not n:
+                    break
+                sortie.write(vue[:n])
+                restant -= n
+    
+    return contexte.tag if mode == 'gcm' and not dechiffrer else None
+
+
+def chiffrer_image(source: str, destination: Optional[str] = None, cle: bytes = CLE_DEMO,
+                   mode: str = 'ecb', iv: Optional[bytes] = None) -> str:
+    """
+    Chiffre les pixels d'une image BMP (l'en-tête reste lisible)
+    
+    Args:
+        source: Image BMP
+        destination: Image chiffrée (défaut: <nom>_<mode>.bmp à côté de la source)
+        cle: Clé AES (16, 24 ou 32 octets)
+        mode: 'ecb', 'cbc', 'ctr' ou 'gcm'
+        iv: IV (CBC/CTR, 16 octets) ou nonce (GCM, 12 octets); aléatoire par défaut
+    
+    Returns:
+        str: Chemin de l'image chiffrée
+    """
+    mode = mode.lower()
+    if mode not in MODES:
+        raise ValueError(f"Mode inconnu: {mode} (modes: {', '.join(MODES)})")
+    
+    if destination is None:
+        base, _ = os.path.splitext(source)
+        destination = f"{base}_{mode}.bmp"
+    
+    if mode == 'ecb':
+        iv = bytes(BLOC_AES)
+    elif iv is None:
+        iv = secrets.token_bytes(12 if mode == 'gcm' else BLOC_AES)
+    iv = iv.ljust(BLOC_AES, b"\x00")
+    
+    temporaire = f"{destination}.tmp"
+    try:
+        tag = _traiter_pixels(source, temporaire, cle, mode, iv, dechiffrer=False)
+        with open(temporaire, 'ab') as sortie:
+            sortie.write(ANNEXE.pack(ANNEXE_MAGIC, MODES.index(mode), iv, tag or bytes(16)))
+        os.replace(temporaire, destination)
+    finally:
+        if os.path.exists(temporaire):
+            os.unlink(temporaire)
+    
+    return destination
+
+
+def dechiffrer_image(source: str, destination: Optional[str] = None, cle: bytes = CLE_DEMO) -> str:
+    """
+    Déchiffre une image produite par chiffrer_image()
+    
+    Le mode et l'IV sont lus dans l'annexe en fin de fichier.
+    
+    Args:
+        source: Image chiffrée
+        destination: Image déchiffrée (défaut: <nom>_dechiffre.bmp)
+        cle: Clé AES
+    
+    Returns:
+        str: Chemin de l'image déchiffrée
+    """
+    from cryptography.exceptions import InvalidTag
+    
+    taille = os.path.getsize(source)
+    with open(source, 'rb') as f:
+        f.seek(max(taille - ANNEXE.size, 0))
+        annexe = f.read()
+    if len(annexe) != ANNEXE.size or not annexe.startswith(ANNEXE_MAGIC):
+        raise ValueError(f"{source}: image non chiffrée par tp3_ecb.py (annexe absente)")
+    _, numero_mode, iv, tag = ANNEXE.unpack(annexe)
+    if numero_mode >= len(MODES):
+        raise ValueError(f"{source}: mode inconnu ({numero_mode})")
+    mode = MODES[numero_mode]
+    
+    if destination is None:
+        base, _ = os.path.splitext(source)
+        destination = f"{base}_dechiffre.bmp"
+    
+    temporaire = f"{destination}.tmp"
+    try:
+        try:
+            _traiter_pixels(source, temporaire, cle, mode, iv, dechiffrer=True,
+                            tag=tag if mode == 'gcm' else None, fin=taille - ANNEXE.size)
+        except InvalidTag:
+            raise ValueError(f"{source}: image modifiée ou mauvaise clé (tag GCM invalide)") from None
+        os.replace(temporaire, destination)
+    finally:
+        if os.path.exists(temporaire):
+            os.unlink(temporaire)
+    
+    return destination
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           DÉTECTION DU MODE ECB
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _module_numpy():
+    """Module numpy s'il est installé, sinon None (repli en pur Python)"""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def _cles_blocs(np, blocs, sortie=None):
+    """
+    Empreinte 64 bits de chaque bloc de 16 octets (vue (n, 2) en uint64)
+    
+    Deux blocs différents n'ont la même empreinte qu'avec une probabilité
+    de l'ordre de n²/2^65: négligeable, et les blocs affichés sont relus.
+    """
+    sortie = np.multiply(blocs[:, 0], np.uint64(ECB_MELANGE), out=sortie)
+    sortie ^= blocs[:, 1]
+    return sortie
+
+
+def _repetitions_numpy(np, octets, top: int) -> Tuple[int, int, List[Tuple[bytes, int]]]:
+    """Compte les blocs répétés par tri des empreintes: (blocs, distincts, top)"""
+    blocs = np.frombuffer(octets, dtype='<u8').reshape(-1, 2)
+    n = len(blocs)
+    if n == 0:
+        return 0, 0, []
+    
+    cles = np.empty(n, dtype=np.uint64)
+    for i in range(0, n, ECB_LOT_BLOCS):
+        _cles_blocs(np, blocs[i:i + ECB_LOT_BLOCS], cles[i:i + ECB_LOT_BLOCS])
+    cles.sort()
+    
+    # Début de chaque série d'empreintes identiques
+    debuts = np.flatnonzero(np.concatenate(([True], cles[1:] != cles[:-1])))
+    distincts = len(debuts)
+    if distincts == n or top <= 0:
+        return n, distincts, []
+    
+    effectifs = np.diff(np.append(debuts, n))
+    k = min(top, distincts)
+    meilleurs = np.argpartition(effectifs, -k)[-k:]
+    meilleurs = meilleurs[effectifs[meilleurs] > 1]
+    meilleurs = meilleurs[np.argsort(-effectifs[meilleurs], kind='stable')]
+    recherchees = cles[debuts[meilleurs]]
+    del cles
+    
+    # Second passage pour retrouver le contenu d'un bloc par empreinte
+    exemples = {}
+    for i in range(0, n, ECB_LOT_BLOCS):
+        lot = _cles_blocs(np, blocs[i:i + ECB_LOT_BLOCS])
+        indices = np.flatnonzero(np.isin(lot, recherchees))
+        trouvees, premiers = np.unique(lot[indices], return_index=True)
+        for cle, j in zip(trouvees.tolist(), indices[premiers].tolist()):
+            exemples.setdefault(cle, blocs[i + j].tobytes())
+        if len(exemples) == len(recherchees):
+            break
+    
+    return n, distincts, [(exemples[int(c)], int(e)) for c, e in zip(recherchees, effectifs[meilleurs])]
+
+
+def _repetitions_python(octets, top: int) -> Tuple[int, int, List[Tuple[bytes, int]]]:
+    """Même calcul avec un dictionnaire (sans numpy, bien plus lent)"""
+    from collections import Counter
+    
+    vue = memoryview(octets)
+    compteur = Counter(vue[i:i + BLOC_AES].tobytes() for i in range(0, len(vue) - len(vue) % BLOC_AES, BLOC_AES))
+    n = sum(compteur.values())
+    top_blocs = [(bloc, e) for bloc, e in compteur.most_common(top) if e > 1] if top > 0 else []
+    return n, len(compteur), top_blocs
+
+
+def _repetitions(octets, top: int) -> Tuple[int, int, List[Tuple[bytes, int]]]:
+    octets = memoryview(octets)[:len(octets) - len(octets) % BLOC_AES]
+    np = _module_numpy()
+    if np is None:
+        return _repetitions_python(octets, top)
+    return _repetitions_numpy(np, octets, top)
+
+
+def _entropie_aleatoire(m: int) -> float:
+    """
+    Entropie attendue (bits/octet) de m octets aléatoires
+    
+    Toujours inférieure à 8 sur un petit échantillon (3,94 pour 16 octets,
+    7,96 pour 4 Kio): chaque valeur apparaît c ~ Binomiale(m, 1/256) fois.
+    """
+    if m >= 65536:
+        return 8 - 255 / (2 * m * math.log(2))   # Développement asymptotique (biais de Miller-Madow)
+    p, total = 1 / 256, 0.0
+    for c in range(1, m + 1):
+        log_p = (math.lgamma(m + 1) - math.lgamma(c + 1) - math.lgamma(m - c + 1)
+                 + c * math.log(p) + (m - c) * math.log1p(-p))
+        if log_p < -60 and c > m * p:
+            break
+        total += math.exp(log_p) * c / m * math.log2(m / c)
+    return 256 * total
+
+
+def _bloc_aleatoire(bloc: bytes, entropie_min: float) -> bool:
+    """
+    Un bloc de 16 octets a-t-il l'aspect d'un bloc chiffré?
+    
+    Son entropie doit être proche de celle de 16 octets aléatoires, et il
+    ne doit pas être fait de texte ASCII: un bloc chiffré en contient 5,9
+    octets en moyenne, plus de ECB_IMPRIMABLES_MAX dans 0,2 % des cas.
+    Les zéros, le remplissage et le texte répétés sont ainsi écartés.
+    """
+    from collections import Counter
+    
+    entropie = -sum(e / BLOC_AES * math.log2(e / BLOC_AES) for e in Counter(bloc).values())
+    imprimables = sum(0x20 <= o < 0x7F or o in (0x09, 0x0A, 0x0D) for o in bloc)
+    return entropie >= entropie_min and imprimables <= ECB_IMPRIMABLES_MAX
+
+
+def _meilleur_decalage(octets) -> int:
+    """
+    Alignement des blocs ECB (0 à 15) qui maximise les répétitions
+    
+    Les blocs chiffrés commencent après un éventuel en-tête en clair
+    (54 octets pour tux_ecb.bmp: décalage 6); un échantillon suffit.
+    """
+    echantillon = memoryview(octets)[:ECB_ECHANTILLON_TAILLE + BLOC_AES]
+    scores = [_repetitions(echantillon[d:], 0)[:2] for d in range(BLOC_AES)]
+    return max(range(BLOC_AES), key=lambda d: scores[d][0] - scores[d][1])
+
+
+def analyser_ecb(donnees, decalage: Optional[int] = None, top: int = 5) -> dict:
+    """
+    Cherche la trace du mode ECB: des blocs chiffrés identiques
+    
+    Avec CBC, CTR ou GCM, deux blocs chiffrés de 16 octets identiques
+    n'apparaissent qu'avec une probabilité de l'ordre de n²/2^129. Mais des
+    données en clair (texte, fichiers creux, remplissage de zéros) ont
+    aussi des blocs répétés. Les blocs répétés eux-mêmes (les
+    ECB_REPETES_MAX plus fréquents, sur tout le fichier) sont donc examinés
+    un à un: le verdict 'ecb' exige au moins ECB_SCORE_MIN de blocs répétés,
+    dont au moins ECB_ALEATOIRES_PART dus à des blocs d'aspect aléatoire
+    (_bloc_aleatoire()). Sinon le verdict est 'clair'.
+    Le contenu est vu comme un tableau de blocs de 16 octets (numpy si
+    disponible, sinon un dictionnaire), sans copie.
+    
+    Args:
+        donnees: Chiffré (bytes, bytearray, memoryview ou mmap)
+        decalage: Début du premier bloc (défaut: détecté sur un échantillon)
+        top: Nombre de blocs les plus répétés à retourner
+        
+    Returns:
+        dict: blocs, distincts, repetes, score (part de blocs répétés),
+              decalage, top [(bloc, occurrences)], aleatoires (répétitions
+              dues à des blocs d'aspect aléatoire), verdict ('aucun', 'ecb'
+              ou 'clair') et ecb_probable (verdict == 'ecb')
+    """
+    if decalage is None:
+        decalage = _meilleur_decalage(donnees)
+    
+    blocs, distincts, repetes_blocs = _repetitions(memoryview(donnees)[decalage:], max(top, ECB_REPETES_MAX))
+    repetes = blocs - distincts
+    score = repetes / blocs if blocs else 0.0
+    aleatoires = 0
+    
+    if repetes == 0 or score < ECB_SCORE_MIN:
+        verdict = 'aucun'
+    else:
+        entropie_min = _entropie_aleatoire(BLOC_AES) - ECB_ENTROPIE_TOLERANCE
+        aleatoires = sum(n - 1 for bloc, n in repetes_blocs[:ECB_REPETES_MAX] if _bloc_aleatoire(bloc, entropie_min))
+        if aleatoires >= ECB_ALEATOIRES_PART * repetes and aleatoires / blocs >= ECB_SCORE_MIN:
+            verdict = 'ecb'
+        else:
+            verdict = 'clair'
+    
+    return {
+        'blocs': blocs,
+        'distincts': distincts,
+        'repetes': repetes,
+        'score': score,
+        'decalage': decalage,
+        'top': repetes_blocs[:top] if top > 0 else [],
+        'aleatoires': aleatoires,
+        'verdict': verdict,
+        'ecb_probable': verdict == 'ecb',
+    }
+
+
+def analyser_fichier_ecb(chemin: str, decalage: Optional[int] = None, top: int = 5) -> dict:
+    """
+    analyser_ecb() sur un fichier, projeté en mémoire (mmap) plutôt que lu
+    
+    Returns:
+        dict: Résultat de analyser_ecb() avec 'chemin' et 'taille'
+    """
+    import mmap
+    
+    taille = os.path.getsize(chemin)
+    if taille < BLOC_AES:
+        resultat = analyser_ecb(b"", 0, top)
+    else:
+        with open(chemin, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as projection:
+            resultat = analyser_ecb(projection, decalage, top)
+    resultat.update(chemin=chemin, taille=taille)
+    return resultat
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           RECONSTRUCTION D'UNE IMAGE ECB
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _palette_reconstruction() -> bytes:
+    """
+    Palette BMP (BGRA) de l'image reconstruite
+    
+    0 = blanc (bloc le plus fréquent: le fond), 1 = noir, 2 à 254 = teintes
+    bien séparées (angle d'or), 255 = gris (blocs uniques: contours, bruit).
+    """
+    import colorsys
+    
+    couleurs = [(255, 255, 255), (0, 0, 0)]
+    for i in range(2, RECONSTRUCTION_COULEURS):
+        r, v, b = colorsys.hsv_to_rgb((i * 0.618033988749895) % 1.0, 0.75, 0.9)
+        couleurs.append((int(r * 255), int(v * 255), int(b * 255)))
+    couleurs.append((128, 128, 128))
+    return b"".join(bytes((b, v, r, 0)) for r, v, b in couleurs)
+
+
+def _classes_blocs(np, blocs) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Blocs distincts (empreintes triées) et leurs effectifs, par lots
+    
+    Chaque lot est réduit à ses blocs distincts (np.unique), puis les
+    résultats sont fusionnés: la mémoire dépend du nombre de blocs
+    distincts, faible pour une image ECB, pas de la taille de l'image.
+    """
+    cles, effectifs, en_attente = [], [], 0
+    
+    def fusionner():
+        toutes = np.concatenate(cles)
+        distinctes, inverse = np.unique(toutes, return_inverse=True)
+        cumul = np.bincount(inverse.ravel(), weights=np.concatenate(effectifs), minlength=len(distinctes))
+        cles[:] = [distinctes]
+        effectifs[:] = [cumul.astype(np.int64)]
+        return len(distinctes)
+    
+    for i in range(0, len(blocs), ECB_LOT_BLOCS):
+        distinctes, nombres = np.unique(_cles_blocs(np, blocs[i:i + ECB_LOT_BLOCS]), return_counts=True)
+        cles.append(distinctes)
+        effectifs.append(nombres)
+        en_attente += len(distinctes)
+        if en_attente > ECB_LOT_BLOCS:
+            en_attente = fusionner()
+    
+    if not cles:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    fusionner()
+    return cles[0], effectifs[0]
+
+
+def reconstruire_image_ecb(source: str, destination: Optional[str] = None) -> dict:
+    """
+    Redessine automatiquement une image chiffrée en ECB
+    
+    En ECB, un même bloc de pixels clairs donne toujours le même bloc
+    chiffré: chaque bloc chiffré distinct est donc une « couleur » de
+    l'image d'origine. Les blocs sont regroupés par empreinte (np.unique),
+    classés par fréquence, puis une table (dictionnaire vectorisé)
+    associe à chaque classe une couleur de palette: le fond devient blanc,
+    la couleur suivante noir, etc. Chaque pixel prend la couleur du bloc
+    qui le contient.
+    
+    Le résultat est une image BMP 8 bits de mêmes dimensions, calculée par
+    lots de lignes: mémoire bornée, même pour des gigapixels.
+    
+    Args:
+        source: Image BMP dont les pixels sont chiffrés en ECB (depuis le début des pixels)
+        destination: Image reconstruite (défaut: <nom>_reconstruit.bmp)
+        
+    Returns:
+        dict: chemin, largeur, hauteur, blocs, distincts, duree
+    """
+    np = _module_numpy()
+    if np is None:
+        raise RuntimeError("La reconstruction demande numpy (pip install numpy)")
+    
+    debut_chrono = time.perf_counter()
+    with open(source, 'rb') as f:
+        info = lire_entete_bmp(f)
+    largeur, hauteur, bits = info['largeur'], info['hauteur'], info['bits_pixel']
+    taille_ligne = info['taille_ligne']
+    
+    taille = min(info['taille_pixels'], os.path.getsize(source) - info['debut_pixels'])
+    nombre_blocs = max(taille, 0) // BLOC_AES
+    if nombre_blocs == 0:
+        raise ValueError("Image BMP tronquée (pas de pixels)")
+    
+    if destination is None:
+        base, _ = os.path.splitext(source)
+        destination = f"{base}_reconstruit.bmp"
+    
+    pixels = np.memmap(source, dtype='<u8', mode='r', offset=info['debut_pixels'], shape=(nombre_blocs, 2))
+    
+    # 1) Blocs distincts et effectifs; 2) table classe → indice de palette
+    distinctes, effectifs = _classes_blocs(np, pixels)
+    rangs = np.empty(len(distinctes), dtype=np.int64)
+    rangs[np.argsort(-effectifs, kind='stable')] = np.arange(len(distinctes))
+    table = np.where((rangs < RECONSTRUCTION_COULEURS) & (effectifs > 1), rangs, 255).astype(np.uint8)
+    
+    # 3) Image 8 bits: chaque pixel prend l'indice du bloc qui contient son premier octet
+    ligne_sortie = (largeur + 3) & ~3
+    palette = _palette_reconstruction()
+    debut_sortie = BMP_ENTETE_FICHIER.size + 40 + len(palette)
+    taille_sortie = ligne_sortie * hauteur
+    entete = BMP_ENTETE_FICHIER.pack(b"BM", debut_sortie + taille_sortie, 0, 0, debut_sortie) + struct.pack(
+        "<IiiHHIIiiII", 40, largeur, -hauteur if info['de_haut_en_bas'] else hauteur, 1, 8, 0, taille_sortie,
+        2835, 2835, 256, 0)
+    
+    bits_colonnes = np.arange(largeur, dtype=np.int64) * bits
+    lignes_par_lot = max(1, RECONSTRUCTION_LOT_PIXELS // largeur)
+    
+    temporaire = f"{destination}.tmp"
+    try:
+        with open(temporaire, 'wb') as sortie:
+            sortie.write(entete)
+            sortie.write(palette)
+            
+            for premiere in range(0, hauteur, lignes_par_lot):
+                lignes = np.arange(premiere, min(premiere + lignes_par_lot, hauteur), dtype=np.int64)
+                numeros = (lignes[:, None] * (taille_ligne * 8) + bits_colonnes[None, :]) >> 7   # bits → blocs de 128 bits
+                
+                # Empreintes des seuls blocs couverts par ces lignes
+                premier_bloc = int(numeros[0, 0])
+                dernier_bloc = min(int(numeros[-1, -1]) + 1, nombre_blocs)
+                cles = _cles_blocs(np, pixels[premier_bloc:dernier_bloc])
+                indices = np.append(table[np.searchsorted(distinctes, cles)], np.uint8(255))
+                
+                # Pixels au-delà du dernier bloc complet: gris
+                numeros -= premier_bloc
+                np.minimum(numeros, len(indices) - 1, out=numeros)
+                
+                lot = np.zeros((len(lignes), ligne_sortie), dtype=np.uint8)
+                lot[:, :largeur] = indices[numeros]
+                sortie.write(lot.tobytes())
+        os.replace(temporaire, destination)
+    finally:
+        if os.path.exists(temporaire):
+            os.unlink(temporaire)
+    
+    return {
+        'chemin': destination,
+        'largeur': largeur,
+        'hauteur': hauteur,
+        'blocs': nombre_blocs,
+        'distincts': len(distinctes),
+        'duree': time.perf_counter() - debut_chrono,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           TRAITEMENT PAR LOTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _lister_images(chemins: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Fichiers BMP donnés ou contenus (récursivement) dans les répertoires donnés
+    
+    Returns:
+        List[Tuple[str, str]]: (chemin, chemin relatif à reproduire sous le dossier de sortie)
+    """
+    images = []
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            images.extend(sorted((str(p), str(p.relative_to(chemin)))
+                                 for p in Path(chemin).rglob("*") if p.suffix.lower() == ".bmp"))
+        else:
+            images.append((chemin, os.path.basename(chemin)))
+    return images
+
+
+def _base_sortie(source: str, relatif: str, dossier_sortie: Optional[str]) -> str:
+    """Chemin de sortie sans extension: à côté de la source, ou sous dossier_sortie (arborescence conservée)"""
+    if not dossier_sortie:
+        return os.path.splitext(source)[0]
+    base = os.path.join(dossier_sortie, os.path.splitext(relatif)[0])
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    return base
+
+
+def _tache_image(source: str, destination: str, cle: bytes, mode: Optional[str]) -> int:
+    """Une image (exécutée dans un processus du pool); retourne la taille traitée"""
+    if mode is None:
+        dechiffrer_image(source, destination, cle)
+    else:
+        chiffrer_image(source, destination, cle, mode)
+    return os.path.getsize(source)
+
+
+def traiter_images(chemins: Iterable[str], cle: bytes = CLE_DEMO, modes: Iterable[Optional[str]] = ('ecb', 'cbc'),
+                   dossier_sortie: Optional[str] = None, workers: Optional[int] = None,
+                   afficher: bool = True) -> dict:
+    """
+    Chiffre (ou déchiffre) un lot d'images sur un pool de processus
+    
+    Chaque image est produite dans chacun des modes demandés:
+    tux.bmp → tux_ecb.bmp, tux_cbc.bmp... (comme le script shell).
+    Sous dossier_sortie, l'arborescence des répertoires sources est
+    conservée; deux sources qui produiraient le même fichier sont refusées.
+    
+    Args:
+        chemins: Images BMP ou répertoires
+        cle: Clé AES
+        modes: Modes de chiffrement; (None,) pour déchiffrer
+        dossier_sortie: Répertoire de sortie (défaut: à côté des sources)
+        workers: Nombre de processus (défaut: nombre de cœurs)
+        afficher: Afficher le résultat
+    
+    Returns:
+        dict: Statistiques (images, echecs, octets, duree, debit_mo_s)
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    
+    workers = workers or os.cpu_count() or 1
+    if dossier_sortie:
+        os.makedirs(dossier_sortie, exist_ok=True)
+    
+    stats = {'images': 0, 'echecs': [], 'octets': 0}
+    debut = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=workers) as executeur:
+        en_cours = {}
+        
+        def recolter(bloquant: bool):
+            faits, _ = wait(en_cours, timeout=None if bloquant else 0, return_when=FIRST_COMPLETED)
+            for future in faits:
+                destination = en_cours.pop(future)
+                try:
+                    stats['octets'] += future.result()
+                    stats['images'] += 1
+                except Exception as e:
+                    stats['echecs'].append((destination, str(e)))
+        
+        destinations = set()
+        for source, relatif in _lister_images(chemins):
+            base = _base_sortie(source, relatif, dossier_sortie)
+            
+            for mode in modes:
+                destination = f"{base}_{mode or 'dechiffre'}.bmp"
+                cle_destination = os.path.normcase(os.path.abspath(destination))
+                if cle_destination in destinations:
+                    stats['echecs'].append((destination, f"sortie déjà produite par une autre source ({source})"))
+                    continue
+                destinations.add(cle_destination)
+                
+                # File d'attente bornée
+                while len(en_cours) >= workers * 2:
+                    recolter(bloquant=True)
+                
+                en_cours[executeur.submit(_tache_image, source, destination, cle, mode)] = destination
+                recolter(bloquant=False)
+        
+        while en_cours:
+            recolter(bloquant=True)
+    
+    duree = time.perf_counter() - debut
+    stats['duree'] = duree
+    stats['debit_mo_s'] = stats['octets'] / duree / 1e6 if duree > 0 else 0.0
+    
+    if afficher:
+        print(f"\n✅ {stats['images']} image(s) traitée(s) en {duree:.2f} s ({stats['debit_mo_s']:.1f} Mo/s)")
+        for destination, erreur in stats['echecs']:
+            print(f"   ❌ {destination}: {erreur}")
+    
+    return stats
+
+
+def scanner_ecb(chemins: Iterable[str], motif: str = "*", workers: Optional[int] = None,
+                top: int = 3, afficher: bool = True) -> dict:
+    """
+    Recherche les fichiers chiffrés en ECB dans une arborescence
+    
+    Chaque fichier est analysé par analyser_fichier_ecb() sur un pool de
+    processus (un fichier par processus, au plus 2 par processus en attente).
+    
+    Args:
+        chemins: Fichiers ou répertoires
+        motif: Motif des fichiers à analyser dans les répertoires
+        workers: Nombre de processus (défaut: nombre de cœurs)
+        top: Blocs les plus répétés à retenir par fichier
+        afficher: Afficher les fichiers suspects
+        
+    Returns:
+        dict: fichiers, octets, duree, debit_mo_s, suspects (verdict 'ecb',
+              triés par score décroissant), autres (blocs répétés mais verdict
+              'clair') et echecs
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    
+    workers = workers or os.cpu_count() or 1
+    stats = {'fichiers': 0, 'octets': 0, 'suspects': [], 'autres': [], 'echecs': []}
+    debut = time.perf_counter()
+    
+    def fichiers():
+        for chemin in chemins:
+            if os.path.isdir(chemin):
+                yield from (str(p) for p in Path(chemin).rglob(motif) if p.is_file())
+            else:
+                yield chemin
+    
+    with ProcessPoolExecutor(max_workers=workers) as executeur:
+        en_cours = {}
+        
+        def recolter(bloquant: bool):
+            faits, _ = wait(en_cours, timeout=None if bloquant else 0, return_when=FIRST_COMPLETED)
+            for future in faits:
+                chemin = en_cours.pop(future)
+                try:
+                    resultat = future.result()
+                except Exception as e:
+                    stats['echecs'].append((chemin, str(e)))
+                    continue
+                stats['fichiers'] += 1
+                stats['octets'] += resultat['taille']
+                if resultat['ecb_probable']:
+                    stats['suspects'].append(resultat)
+                elif resultat['verdict'] != 'aucun':
+                    stats['autres'].append(resultat)
+        
+        for chemin in fichiers():
+            while len(en_cours) >= workers * 2:
+                recolter(bloquant=True)
+            en_cours[executeur.submit(analyser_fichier_ecb, chemin, None, top)] = chemin
+            recolter(bloquant=False)
+        
+        while en_cours:
+            recolter(bloquant=True)
+    
+    stats['suspects'].sort(key=lambda r: -r['score'])
+    stats['autres'].sort(key=lambda r: -r['score'])
+    duree = time.perf_counter() - debut
+    stats['duree'] = duree
+    stats['debit_mo_s'] = stats['octets'] / duree / 1e6 if duree > 0 else 0.0
+    
+    if afficher:
+        print(f"\n🔍 {stats['fichiers']} fichier(s) analysé(s) en {duree:.2f} s ({stats['debit_mo_s']:.1f} Mo/s)")
+        if not stats['suspects'] and not stats['autres']:
+            print("   ✅ Aucun bloc chiffré répété: pas de trace d'ECB")
+        elif not stats['suspects']:
+            print("   ✅ Pas de trace d'ECB (blocs répétés non aléatoires seulement)")
+        for r in stats['suspects']:
+            print(f"   ❌ {r['chemin']}: {r['repetes']}/{r['blocs']} blocs répétés "
+                  f"(score {r['score']:.3f}, décalage {r['decalage']})")
+            for bloc, occurrences in r['top']:
+                print(f"      {bloc.hex()} × {occurrences}")
+        for r in stats['autres']:
+            print(f"   ℹ️  {r['chemin']}: {r['repetes']}/{r['blocs']} blocs répétés, dont {r['aleatoires']} "
+                  f"d'aspect aléatoire: données en clair?")
+        for chemin, erreur in stats['echecs']:
+            print(f"   ⚠️  {chemin}: {erreur}")
+    
+    return stats
+
+
+def reconstruire_images(chemins: Iterable[str], dossier_sortie: Optional[str] = None,
+                        workers: Optional[int] = None, afficher: bool = True) -> dict:
+    """
+    Reconstruit un lot d'images ECB sur un pool de processus
+    
+    Sous dossier_sortie, l'arborescence des répertoires sources est
+    conservée; deux sources qui produiraient le même fichier sont refusées.
+    
+    Args:
+        chemins: Images BMP chiffrées en ECB ou répertoires
+        dossier_sortie: Répertoire de sortie (défaut: à côté des sources)
+        workers: Nombre de processus (défaut: nombre de cœurs)
+        afficher: Afficher le résultat
+        
+    Returns:
+        dict: images (résultats de reconstruire_image_ecb()), echecs, duree
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    
+    workers = workers or os.cpu_count() or 1
+    if dossier_sortie:
+        os.makedirs(dossier_sortie, exist_ok=True)
+    
+    stats = {'images': [], 'echecs': []}
+    debut = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=workers) as executeur:
+        en_cours = {}
+        
+        def recolter(bloquant: bool):
+            faits, _ = wait(en_cours, timeout=None if bloquant else 0, return_when=FIRST_COMPLETED)
+            for future in faits:
+                source = en_cours.pop(future)
+                try:
+                    stats['images'].append(future.result())
+                except Exception as e:
+                    stats['echecs'].append((source, str(e)))
+        
+        destinations = set()
+        for source, relatif in _lister_images(chemins):
+            destination = f"{_base_sortie(source, relatif, dossier_sortie)}_reconstruit.bmp"
+            cle_destination = os.path.normcase(os.path.abspath(destination))
+            if cle_destination in destinations:
+                stats['echecs'].append((source, f"sortie déjà produite par une autre source ({destination})"))
+                continue
+            destinations.add(cle_destination)
+            
+            while len(en_cours) >= workers * 2:
+                recolter(bloquant=True)
+            en_cours[executeur.submit(reconstruire_image_ecb, source, destination)] = source
+            recolter(bloquant=False)
+        
+        while en_cours:
+            recolter(bloquant=True)
+    
+    stats['duree'] = time.perf_counter() - debut
+    
+    if afficher:
+        print(f"\n🐧 {len(stats['images'])} image(s) reconstruite(s) en {stats['duree']:.2f} s")
+        for r in stats['images']:
+            print(f"   ✅ {r['chemin']}: {r['largeur']}x{r['hauteur']}, "
+                  f"{r['distincts']} blocs distincts sur {r['blocs']} ({r['duree']:.2f} s)")
+        for source, erreur in stats['echecs']:
+            print(f"   ❌ {source}: {erreur}")
+    
+    return stats
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#                           INTERFACE EN LIGNE DE COMMANDE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _cli_traiter(args, dechiffrer: bool) -> int:
+    cle = bytes.fromhex(args.key)
+    if len(cle) not in (16, 24, 32):
+        raise ValueError("La clé doit faire 16, 24 ou 32 octets (32, 48 ou 64 caractères hexadécimaux)")
+    
+    modes = (None,) if dechiffrer else args.mode
+    stats = traiter_images(args.images, cle, modes, args.output, args.jobs)
+    return 1 if stats['echecs'] else 0
+
+
+def _cli_detect(args) -> int:
+    stats = scanner_ecb(args.chemins, args.pattern, args.jobs, args.top)
+    return 2 if stats['suspects'] else (1 if stats['echecs'] else 0)
+
+
+def _cli_reconstruct(args) -> int:
+    stats = reconstruire_images(args.images, args.output, args.jobs)
+    return 1 if stats['echecs'] else 0
+
+
+def main(argv: List[str]) -> int:
+    """
+    Point d'entrée en ligne de commande
+    
+    Returns:
+        int: Code de sortie (0 = succès)
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="tp3_ecb.py", description="TP3 - Visualisation de la faille ECB")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    
+    for nom, dechiffrer in (('encrypt', False), ('decrypt', True)):
+        p = commandes.add_parser(nom, help=f"{'Déchiffrer' if dechiffrer else 'Chiffrer'} les pixels d'images BMP")
+        p.add_argument('images', nargs='+', help="Images BMP ou répertoires")
+        p.add_argument('--key', default=CLE_DEMO.hex(), help="Clé AES en hexadécimal (défaut: celle du script shell)")
+        p.add_argument('-o', '--output', help="Répertoire de sortie (défaut: à côté des images)")
+        p.add_argument('-j', '--jobs', type=int, help="Processus (défaut: nombre de cœurs)")
+        if not dechiffrer:
+            p.add_argument('--mode', nargs='+', choices=MODES, default=['ecb', 'cbc'],
+                           help="Modes de chiffrement (défaut: ecb cbc)")
+        p.set_defaults(fonction=lambda args, d=dechiffrer: _cli_traiter(args, d))
+    
+    p = commandes.add_parser('detect', help="Détecter le mode ECB (blocs chiffrés répétés) dans des fichiers")
+    p.add_argument('chemins', nargs='+', help="Fichiers ou répertoires")
+    p.add_argument('--pattern', default="*", help="Motif des fichiers dans les répertoires (défaut: *)")
+    p.add_argument('--top', type=int, default=3, help="Blocs les plus répétés affichés par fichier")
+    p.add_argument('-j', '--jobs', type=int, help="Processus (défaut: nombre de cœurs)")
+    p.set_defaults(fonction=_cli_detect)
+    
+    p = commandes.add_parser('reconstruct', help="Reconstruire des images chiffrées en ECB (sans la clé)")
+    p.add_argument('images', nargs='+', help="Images BMP ou répertoires")
+    p.add_argument('-o', '--output', help="Répertoire de sortie (défaut: à côté des images)")
+    p.add_argument('-j', '--jobs', type=int, help="Processus (défaut: nombre de cœurs)")
+    p.set_defaults(fonction=_cli_reconstruct)
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        return args.fonction(args)
+    except Exception as e:
+        print(f"❌ ERREUR: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))